@@ -1,16 +1,23 @@
 import mathlib
+from mathlib.web.app.pipeline import init_worker
 
 
 def main(lexer=None, parser=None, builder=None, simplifier=None, calculator=None,
-         plotter=None, latex=None, gui=False):
+         plotter=None, latex=None, text=None, gui=False,
+         workers=0, max_pending=8, timeout=10.0, budget=None, cache_path=None):
+    if budget is None and gui:
+        budget = mathlib.Budget(max_nodes=10000, max_exponent=1000000, max_time=5.0, max_steps=1000000)
+
     lexer = lexer or mathlib.Lexer(mathlib.default_lexer_grammar)
     parser = parser or mathlib.Parser(mathlib.default_parser_grammar, lexer)
 
-    builder = builder or mathlib.NodeBuilder()
-    simplifier = simplifier or mathlib.NodeSimplifier()
-    calculator = calculator or mathlib.Calculator(simplifier)
-    plotter = plotter or mathlib.Plotter()
+    builder = builder or mathlib.NodeBuilder(budget)
+    simplifier = simplifier or mathlib.NodeSimplifier(budget)
+    calculator = calculator or mathlib.Calculator(simplifier, budget)
+    plotter = plotter or mathlib.Plotter(tiles=mathlib.TileCache())
     latex = latex or mathlib.LaTeXGenerator()
+    text = text or mathlib.TextGenerator()
+    cache = mathlib.FormCache(cache_path) if cache_path is not None else None
 
     if gui:
         math_app = mathlib.math_app
@@ -21,8 +28,16 @@ def main(lexer=None, parser=None, builder=None, simplifier=None, calculator=None
         math_app.config['calculator'] = calculator
         math_app.config['plotter'] = plotter
         math_app.config['latex'] = latex
+        math_app.config['text'] = text
+        math_app.config['cache'] = cache
+
+        if workers > 0:
+            components = dict(lexer=lexer, parser=parser, builder=builder, simplifier=simplifier,
+                              calculator=calculator, plotter=plotter, latex=latex, text=text, cache=cache)
+            math_app.config['executor'] = mathlib.PipelineExecutor(
+                workers, max_pending, timeout, initializer=init_worker, initargs=(components,))
 
-        mathlib.math_app.run()
+        mathlib.math_app.run(threaded=True)
 
     else:
         print(mathlib.manual())
@@ -35,13 +50,15 @@ def main(lexer=None, parser=None, builder=None, simplifier=None, calculator=None
             tree = builder.build(tree)
             tree, exclusion = simplifier.canonicalize(tree)
 
-            print('Representation: {}'.format(tree))
-            print(' - LaTeX: {}'.format(latex.generate(tree)))
+            deriv, de_ex = calculator.derivate(tree, list(exclusion), 'x')
+            tree_latex, deriv_latex = latex.generate_all([tree, deriv])
+
+            print('Representation: {}'.format(text.generate(tree)))
+            print(' - LaTeX: {}'.format(tree_latex))
             plotter.plot(tree, exclusion, 'x', (-10, 10))
 
-            deriv, de_ex = calculator.derivate(tree, exclusion, 'x')
-            print('Derivative: {}'.format(deriv))
-            print(' - LaTeX: {}'.format(latex.generate(deriv)))
+            print('Derivative: {}'.format(text.generate(deriv)))
+            print(' - LaTeX: {}'.format(deriv_latex))
             plotter.plot(deriv, de_ex, 'x', (-10, 10))
 
         print('Goodbye!')
@@ -1,5 +1,6 @@
 import math
 import os
+from .version import __version__
 from . import core
 from . import ui
 from . import io
@@ -12,7 +13,7 @@ from .io import *
 from .utils import *
 from .web.app import *
 
-__all__ = ['math']
+__all__ = ['math', '__version__']
 __all__.extend(core.__all__)
 __all__.extend(ui.__all__)
 __all__.extend(io.__all__)
@@ -1,8 +1,23 @@
+from .analysis import *
+from .arraytree import *
+from .budget import *
 from .builder import *
 from .calculator import *
+from .expression import *
+from .folding import *
+from .functions import *
+from .grid import *
+from .integrator import *
+from .interval import *
 from .node import *
+from .planner import *
+from .series import *
 from .simplifier import *
+from .solver import *
 
-__all__ = ['ParseNode', 'NodeBuilder', 'Calculator', 'NodeSimplifier',
+__all__ = ['FreeVars', 'Exclusions', 'IsZero', 'analyze_node', 'ArrayTree', 'Budget', 'BudgetExceeded', 'ParseNode', 'NodeBuilder', 'Calculator',
+           'ExpressionSet', 'ConstantFolder', 'GridEvaluator', 'Function', 'register_function', 'get_function',
+           'Integrator', 'Interval', 'IntervalEvaluator', 'EvaluationPlanner', 'NodeSimplifier', 'Solver',
+           'series', 'DerivativeCache', 'ChebyshevApproximation', 'ApproximationCache',
            'TermNode', 'FactorNode', 'PolyNode', 'ExpoNode', 'LogNode', 'TriNode',
            'VarNode', 'NumNode']
@@ -0,0 +1,69 @@
+from mathlib.core.node import *
+from mathlib.core.functions import functions
+from mathlib.utils.visitor import *
+
+
+class FreeVars(NodeAnalysis):
+
+    def combine_VarNode(self, node: VarNode, children: list):
+        return {node.name}
+
+    def combine_default(self, node, children: list):
+        return set().union(*children)
+
+
+# the exclusion groups of the nodes of a canonical tree, for `NodeSimplifier._neaten_exclusion`.
+# the bodies of powers and functions were checked when they were preprocessed
+class Exclusions(NodeAnalysis):
+
+    def combine_TermNode(self, node: TermNode, children: list):
+        return [e for c in children for e in c]
+
+    combine_FactorNode = combine_TermNode
+
+    def combine_PolyNode(self, node: PolyNode, children: list):
+        if node.dim % 1 != 0:
+            return [[[node.body, '<', 0]]]
+        return []
+
+    def combine_ExpoNode(self, node: ExpoNode, children: list):
+        return [[[node.base, '<', 0], [node.body, 'not', int]]]
+
+    def combine_LogNode(self, node: LogNode, children: list):
+        return [[[node.base, '<=', 0]], [[node.base, '==', 1]], [[node.body, '<=', 0]]]
+
+    def combine_TriNode(self, node: TriNode, children: list):
+        return functions[node.func].exclusion(node.body)
+
+    def combine_default(self, node, children: list):
+        return []
+
+
+class IsZero(NodeAnalysis):
+
+    def combine_TermNode(self, node: TermNode, children: list):
+        return len(node.factors) == 0
+
+    def combine_FactorNode(self, node: FactorNode, children: list):
+        return node.coef[0] == 0 or any(children[:len(node.numerator)])
+
+    def combine_NumNode(self, node: NumNode, children: list):
+        return node.value == 0
+
+    def combine_PolyNode(self, node: PolyNode, children: list):
+        return children[0]
+
+    def combine_ExpoNode(self, node: ExpoNode, children: list):
+        return children[0]
+
+    def combine_default(self, node, children: list):
+        return False
+
+
+def analyze_node(node: MathNode):
+    # free variables, exclusion groups and the zero check in one traversal
+    return FusedAnalysis(FreeVars(), Exclusions(), IsZero()).run(node)
+
+
+if __name__ == '__main__':
+    pass
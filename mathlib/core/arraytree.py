@@ -0,0 +1,383 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.core.functions import functions
+from mathlib.utils.node_codes import *
+from mathlib.utils.node_util import IdTable
+
+import numpy as np
+
+
+class _ArrayBuilder:
+    # appends nodes in topological order, equal signatures are stored once
+
+    def __init__(self):
+        self.table = {}
+        self.ops, self.a, self.b, self.split = [], [], [], []
+        self.children = []
+        self.constant_table, self.constants = {}, []
+        self.string_table, self.strings = {}, []
+
+    def constant(self, c):
+        key = constant_key(c)
+        idx = self.constant_table.get(key)
+        if idx is None:
+            idx = self.constant_table[key] = len(self.constants)
+            self.constants.append(c)
+        return idx
+
+    def string(self, s: str):
+        idx = self.string_table.get(s)
+        if idx is None:
+            idx = self.string_table[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def add(self, op, a=-1, b=-1, children=(), split=None):
+        children = tuple(children)
+        split = len(children) if split is None else split
+        sig = op, a, b, split, children
+        idx = self.table.get(sig)
+        if idx is None:
+            idx = self.table[sig] = len(self.ops)
+            self.ops.append(op)
+            self.a.append(a)
+            self.b.append(b)
+            self.split.append(split)
+            self.children.append(children)
+        return idx
+
+    def node(self, node, keys: IdTable):
+        idx = keys.get(node)
+        if idx is not None:
+            return idx
+
+        cls = node.__class__
+        if cls is int or cls is float:
+            idx = self.add(OP_RAW, self.constant(node))
+        elif cls is NumNode:
+            idx = self.add(OP_NUM, self.constant(node.value))
+        elif cls is VarNode:
+            idx = self.add(OP_VAR, self.string(node.name))
+        elif cls is TermNode:
+            idx = self.add(OP_TERM, children=[self.node(x, keys) for x in node.factors])
+        elif cls is FactorNode:
+            nu = [self.node(x, keys) for x in node.numerator]
+            deno = [self.node(x, keys) for x in node.denominator]
+            idx = self.add(OP_FACTOR, self.constant(node.coef[0]), self.constant(node.coef[1]), nu + deno, len(nu))
+        elif cls is PolyNode:
+            idx = self.add(OP_POLY, self.constant(node.dim), children=[self.node(node.body, keys)])
+        elif cls is ExpoNode or cls is LogNode:
+            idx = self.add(OP_EXPO if cls is ExpoNode else OP_LOG,
+                           children=[self.node(node.base, keys), self.node(node.body, keys)])
+        elif cls is TriNode:
+            idx = self.add(OP_TRI, self.string(node.func), children=[self.node(node.body, keys)])
+        else:
+            raise TypeError('cannot convert {}'.format(cls.__name__))
+        return keys.put(node, idx)
+
+    def build(self, roots: list):
+        tree = ArrayTree.__new__(ArrayTree)
+        tree.ops = np.array(self.ops, dtype=np.uint8)
+        tree.a = np.array(self.a, dtype=np.int32)
+        tree.b = np.array(self.b, dtype=np.int32)
+        tree.split = np.array(self.split, dtype=np.int32)
+        tree.start = np.zeros(len(self.ops) + 1, dtype=np.int32)
+        np.cumsum([len(x) for x in self.children], out=tree.start[1:])
+        tree.children = np.fromiter((i for x in self.children for i in x), dtype=np.int32, count=tree.start[-1])
+        tree.constants = np.empty(len(self.constants), dtype=object)
+        tree.constants[:] = self.constants
+        tree.numbers = np.array([float(x) for x in self.constants], dtype=float)
+        tree.strings = np.array(self.strings, dtype=object)
+        tree.roots = np.array(roots, dtype=np.int32)
+        return tree
+
+
+# struct-of-arrays form of node trees. every node is a row of `ops`, `a`, `b` and `split`,
+# its children are `children[start[i]:start[i + 1]]`, and rows are ordered children first.
+# `a` and `b` index `constants` (numbers, dims and coefficients) or `strings` (names, functions).
+# a factor's first `split` children are the numerator, the rest the denominator
+class ArrayTree:
+
+    def __init__(self, nodes: list):
+        builder, keys = _ArrayBuilder(), IdTable()
+        roots = [builder.node(x, keys) for x in nodes]
+        self.__dict__.update(builder.build(roots).__dict__)
+
+    def __len__(self):
+        return len(self.ops)
+
+    @property
+    def nbytes(self):
+        arrays = [self.ops, self.a, self.b, self.split, self.start, self.children, self.numbers, self.roots]
+        return sum(x.nbytes for x in arrays)
+
+    def child_list(self, i: int):
+        return self.children[self.start[i]:self.start[i + 1]]
+
+    def to_nodes(self):
+        # separate objects for every occurrence, nodes are mutated in place elsewhere
+        return [self._to_node(i) for i in self.roots]
+
+    def _to_node(self, i):
+        op = self.ops[i]
+        children = self.child_list(i)
+        if op == OP_RAW:
+            return self.constants[self.a[i]]
+        if op == OP_NUM:
+            node = NumNode.__new__(NumNode)
+            node.value = self.constants[self.a[i]]
+        elif op == OP_VAR:
+            node = VarNode.__new__(VarNode)
+            node.name = self.strings[self.a[i]]
+        elif op == OP_TERM:
+            node = TermNode.__new__(TermNode)
+            node.factors = [self._to_node(x) for x in children]
+        elif op == OP_FACTOR:
+            node = FactorNode.__new__(FactorNode)
+            node.numerator = [self._to_node(x) for x in children[:self.split[i]]]
+            node.denominator = [self._to_node(x) for x in children[self.split[i]:]]
+            node.coef = tuple.__new__(Coef, (self.constants[self.a[i]], self.constants[self.b[i]]))
+        elif op == OP_POLY:
+            node = PolyNode.__new__(PolyNode)
+            node.body = self._to_node(children[0])
+            node.dim = self.constants[self.a[i]]
+        elif op == OP_EXPO or op == OP_LOG:
+            node = ExpoNode.__new__(ExpoNode) if op == OP_EXPO else LogNode.__new__(LogNode)
+            node.base = self._to_node(children[0])
+            node.body = self._to_node(children[1])
+        else:
+            node = TriNode.__new__(TriNode)
+            node.func = self.strings[self.a[i]]
+            node.body = self._to_node(children[0])
+        return node
+
+    def variables(self):
+        return set(self.strings[self.a[self.ops == OP_VAR]])
+
+    def depends_on(self, var: str):
+        # whether each row has the variable somewhere below it
+        ans = np.zeros(len(self), dtype=bool)
+        rows = np.flatnonzero(self.ops == OP_VAR)
+        ans[rows] = self.strings[self.a[rows]] == var
+        for i in np.flatnonzero(np.diff(self.start)):
+            # children come first, one pass in row order is enough
+            ans[i] = ans[self.child_list(i)].any()
+        return ans
+
+    def tree_sizes(self):
+        # number of nodes below each row when shared rows are counted at every occurrence
+        sizes = np.ones(len(self), dtype=np.int64)
+        for i in np.flatnonzero(np.diff(self.start)):
+            sizes[i] += sizes[self.child_list(i)].sum()
+        return sizes
+
+    def eval(self, **kwargs):
+        env = {k: np.asarray(v, dtype=float) for k, v in kwargs.items()}
+        shape = np.broadcast(*env.values()).shape if len(env) > 0 else ()
+        # plain lists, indexing numpy scalars row by row is slower than the ops themselves
+        numbers, ops, a, b, split, start, children = [x.tolist() for x in [
+            self.numbers, self.ops, self.a, self.b, self.split, self.start, self.children]]
+
+        values = []
+        with np.errstate(all='ignore'):
+            for i in range(len(ops)):
+                op = ops[i]
+                kids = children[start[i]:start[i + 1]]
+                if op == OP_RAW or op == OP_NUM:
+                    ans = numbers[a[i]]
+                elif op == OP_VAR:
+                    name = self.strings[a[i]]
+                    if name not in env:
+                        raise ArithmeticError('{} is not defined.'.format(name))
+                    ans = env[name]
+                elif op == OP_TERM:
+                    ans = 0
+                    for k in kids:
+                        ans = ans + values[k]
+                elif op == OP_FACTOR:
+                    nu, deno = numbers[a[i]], numbers[b[i]]
+                    for k in kids[:split[i]]:
+                        nu = nu * values[k]
+                    if len(kids) == split[i] and deno != 0:
+                        ans = nu if deno == 1 else nu / deno
+                    else:
+                        for k in kids[split[i]:]:
+                            deno = deno * values[k]
+                        ans = np.where(deno == 0, math.nan, np.true_divide(nu, deno))
+                elif op == OP_POLY:
+                    body, dim = values[kids[0]], numbers[a[i]]
+                    ans = np.power(np.asarray(body, dtype=float), dim)
+                    if dim % 1 != 0:
+                        ans = np.where(body < 0, math.nan, ans)
+                    if dim < 0:
+                        ans = np.where(body == 0, math.nan, ans)
+                elif op == OP_EXPO:
+                    base, body = values[kids[0]], values[kids[1]]
+                    ans = np.power(np.asarray(base, dtype=float), body)
+                    invalid = (base < 0) & (body % 1 != 0) | (base == 0) & (body < 0)
+                    ans = np.where(invalid, math.nan, ans)
+                elif op == OP_LOG:
+                    base, body = values[kids[0]], values[kids[1]]
+                    ans = np.log(body) / np.log(base)
+                    invalid = (body <= 0) | (base == 1) | (base <= 0)
+                    ans = np.where(invalid, math.nan, ans)
+                else:
+                    ans = functions[self.strings[a[i]]].vector(values[kids[0]])
+                values.append(ans)
+        return [np.broadcast_to(values[i], shape).astype(float) for i in self.roots]
+
+    def derivate(self, var: str):
+        # derivatives of every root as a new tree, rows of this tree are reused as they are.
+        # the result is not canonical, `to_nodes` and a simplifier give the usual form
+        builder = _DerivativeBuilder(self, var)
+        return builder.build([builder.derivative(i) for i in self.roots])
+
+
+class _DerivativeBuilder(_ArrayBuilder):
+
+    def __init__(self, tree: ArrayTree, var: str):
+        super(_DerivativeBuilder, self).__init__()
+        self.tree = tree
+        self.var = var
+        self.depends = tree.depends_on(var)
+        self.memo = {}
+        self.rows = []
+        for i in range(len(tree)):
+            self.rows.append(self._copy(i))
+
+    def _copy(self, i):
+        tree = self.tree
+        op, a, b = int(tree.ops[i]), int(tree.a[i]), int(tree.b[i])
+        if op in [OP_RAW, OP_NUM, OP_POLY, OP_FACTOR]:
+            a = self.constant(tree.constants[a])
+        if op == OP_FACTOR:
+            b = self.constant(tree.constants[b])
+        if op in [OP_VAR, OP_TRI]:
+            a = self.string(tree.strings[a])
+        children = [self.rows[x] for x in tree.child_list(i)]
+        return self.add(op, a, b, children, int(tree.split[i]))
+
+    def number(self, value):
+        return self.add(OP_NUM, self.constant(value))
+
+    def term(self, children):
+        children = [x for x in children if x is not None]
+        if len(children) == 0:
+            return None
+        if len(children) == 1:
+            return children[0]
+        return self.add(OP_TERM, children=children)
+
+    def factor(self, coef, nu, deno=()):
+        # numbers are folded into the coefficient like `FactorNode.update_coef`
+        coef = Coef(*coef)
+        _nu, _deno = [], []
+        for x in nu:
+            if self.ops[x] == OP_NUM:
+                coef = coef * self.constants[self.a[x]]
+            else:
+                _nu.append(x)
+        for x in deno:
+            if self.ops[x] == OP_NUM:
+                coef = coef / self.constants[self.a[x]]
+            else:
+                _deno.append(x)
+        if len(_nu) == 1 and len(_deno) == 0 and coef == (1, 1):
+            return _nu[0]
+        return self.add(OP_FACTOR, self.constant(coef[0]), self.constant(coef[1]), _nu + _deno, len(_nu))
+
+    def log(self, body):
+        e = self.number(math.e)
+        return self.add(OP_LOG, children=[e, body])
+
+    def derivative(self, i):
+        # None stands for zero
+        if not self.depends[i]:
+            return None
+        if i in self.memo:
+            return self.memo[i]
+        ans = self._derivative(i)
+        self.memo[i] = ans
+        return ans
+
+    def _derivative(self, i):
+        tree, rows = self.tree, self.rows
+        op = tree.ops[i]
+        kids = [int(x) for x in tree.child_list(i)]
+
+        if op == OP_VAR:
+            return self.number(1)
+
+        if op == OP_TERM:
+            return self.term([self.derivative(x) for x in kids])
+
+        if op == OP_FACTOR:
+            coef = tree.constants[tree.a[i]], tree.constants[tree.b[i]]
+            nu, deno = kids[:tree.split[i]], kids[tree.split[i]:]
+            parts = []
+            for k, x in enumerate(nu):
+                d = self.derivative(x)
+                if d is not None:
+                    others = [rows[y] for y in nu[:k] + nu[k + 1:]]
+                    parts.append(self.factor(coef, [d] + others, [rows[y] for y in deno]))
+            for k, x in enumerate(deno):
+                # (1/v)' = -v'/v^2
+                d = self.derivative(x)
+                if d is not None:
+                    parts.append(self.factor(-Coef(*coef), [d] + [rows[y] for y in nu],
+                                             [rows[y] for y in deno] + [rows[x]]))
+            return self.term(parts)
+
+        if op == OP_POLY:
+            dim = tree.constants[tree.a[i]]
+            d = self.derivative(kids[0])
+            if dim == 1:
+                return d
+            if dim == 2:
+                power = rows[kids[0]]
+            else:
+                power = self.add(OP_POLY, self.constant(dim - 1), children=[rows[kids[0]]])
+            return self.factor((dim, 1), [power, d])
+
+        if op == OP_EXPO:
+            base, body = kids
+            db, dx = self.derivative(base), self.derivative(body)
+            parts = []
+            if dx is not None:
+                # a^u: a^u * ln(a) * u'
+                parts.append(self.factor((1, 1), [rows[i], self.log(rows[base]), dx]))
+            if db is not None:
+                # v^b: b * v^(b - 1) * v'
+                power = self.add(OP_EXPO, children=[rows[base], self.term([rows[body], self.number(-1)])])
+                parts.append(self.factor((1, 1), [rows[body], power, db]))
+            return self.term(parts)
+
+        if op == OP_LOG:
+            base, body = kids
+            db, dx = self.derivative(base), self.derivative(body)
+            ln_base = self.log(rows[base])
+            parts = []
+            if dx is not None:
+                # u' / (u * ln(b))
+                parts.append(self.factor((1, 1), [dx], [rows[body], ln_base]))
+            if db is not None:
+                # -log_b(u) * b' / (b * ln(b))
+                parts.append(self.factor((-1, 1), [rows[i], db], [rows[base], ln_base]))
+            return self.term(parts)
+
+        # f'(u) of the registry with a placeholder for the body, which is the existing row
+        body = VarNode(None)
+        outer = functions[tree.strings[tree.a[i]]].derivative(body)
+        keys = IdTable()
+        keys.put(body, rows[kids[0]])
+        nu = [self.node(x, keys) for x in outer.numerator]
+        deno = [self.node(x, keys) for x in outer.denominator]
+        return self.factor(outer.coef, nu + [self.derivative(kids[0])], deno)
+
+    def build(self, roots: list):
+        # a zero derivative is still a row
+        return super(_DerivativeBuilder, self).build([self.number(0) if x is None else x for x in roots])
+
+
+if __name__ == '__main__':
+    pass
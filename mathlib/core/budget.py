@@ -0,0 +1,72 @@
+import math
+import time
+
+
+class BudgetExceeded(ArithmeticError):
+    pass
+
+
+class Budget:
+
+    def __init__(self, max_nodes=None, max_exponent=None, max_time=None, max_steps=None):
+        self.max_nodes = max_nodes
+        self.max_exponent = max_exponent
+        self.max_time = max_time
+        self.max_steps = max_steps
+
+    def __repr__(self):
+        return 'Budget(nodes={}, exponent={}, time={}, steps={})'.format(
+            self.max_nodes, self.max_exponent, self.max_time, self.max_steps)
+
+    def start(self):
+        return BudgetMeter(self)
+
+
+class BudgetMeter:
+    time_interval = 1024
+
+    def __init__(self, budget: Budget=None):
+        self.budget = budget or unlimited
+        self.nodes = 0
+        self.steps = 0
+
+        self.deadline = math.inf
+        if self.budget.max_time is not None:
+            self.deadline = time.monotonic() + self.budget.max_time
+
+    def count_nodes(self, n=1):
+        self.nodes += n
+        if self.budget.max_nodes is not None and self.nodes > self.budget.max_nodes:
+            raise BudgetExceeded('more than {} nodes'.format(self.budget.max_nodes))
+
+    def step(self, n=1):
+        self.steps += n
+        if self.budget.max_steps is not None and self.steps > self.budget.max_steps:
+            raise BudgetExceeded('more than {} steps'.format(self.budget.max_steps))
+        if self.steps % self.time_interval < n:
+            self.check_time()
+
+    def check_time(self):
+        if time.monotonic() > self.deadline:
+            raise BudgetExceeded('more than {} seconds'.format(self.budget.max_time))
+
+    def check_power(self, base, exponent):
+        # only integer powers can allocate arbitrarily large numbers,
+        # float powers overflow to an error or inf right away.
+        # the limit is on the binary exponent of the result, i.e. its bit length
+        if self.budget.max_exponent is None:
+            return
+        if base.__class__ is not int or exponent.__class__ is not int or abs(base) <= 1:
+            return
+        if abs(exponent) * base.bit_length() > self.budget.max_exponent:
+            raise BudgetExceeded('{}^{} is larger than 2^{}'.format(
+                _describe(base), _describe(exponent), self.budget.max_exponent))
+
+
+def _describe(n: int):
+    if n.bit_length() <= 64:
+        return str(n)
+    return '({} bits)'.format(n.bit_length())
+
+
+unlimited = Budget()
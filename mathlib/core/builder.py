@@ -1,4 +1,7 @@
 from mathlib.utils.node_util import *
+from mathlib.core.budget import *
+from mathlib.core.folding import ConstantFolder
+import copy
 
 
 class ParseNode:
@@ -25,14 +28,30 @@ class ParseNode:
 
 class NodeBuilder:
 
-    def __init__(self):
-        self.math_tree = None
+    def __init__(self, budget: Budget=None):
+        self.budget = budget or unlimited
+        self.meter = None
 
     def build(self, parse_tree: ParseNode):
-        self.math_tree = self._traverse(parse_tree)
-        return self.math_tree
+        return self._context()._build(parse_tree)[0]
+
+    def build_folded(self, parse_tree: ParseNode):
+        # (tree, number of nodes constant folding saved)
+        return self._context()._build(parse_tree)
+
+    def _context(self):
+        # like NodeSimplifier, each call meters on its own shallow copy
+        context = copy.copy(self)
+        context.meter = self.budget.start()
+        return context
+
+    def _build(self, parse_tree: ParseNode):
+        # variable-free subtrees are numbers from here on
+        return ConstantFolder(self.meter).fold(self._traverse(parse_tree))
 
     def _traverse(self, node: ParseNode) -> MathNode:
+        self.meter.step()
+
         if node.type in ['expr', 'term', 'body']:
             return self._flatten(node)
 
@@ -40,6 +59,7 @@ class NodeBuilder:
             prefix, body = node.childs
             n = self._traverse(body)
             if len(prefix.childs) > 0:
+                self.meter.count_nodes()
                 n = -n
             return n
 
@@ -48,6 +68,8 @@ class NodeBuilder:
                 return self._traverse(node.childs[1])   # ( expr )
             return self._traverse(node.childs[0])
 
+        self.meter.count_nodes()
+
         if node.type == 'triangular':
             func_name = node.childs[0].childs[0].value
             return TriNode(func_name, self._traverse(node.childs[1]))
@@ -75,6 +97,7 @@ class NodeBuilder:
                 factors.append(f)
                 cur = cur.childs[2]
 
+            self.meter.count_nodes()
             return TermNode(factors)
 
         if node.type == 'term':
@@ -93,6 +116,7 @@ class NodeBuilder:
 
             if len(nu) == 1 and len(deno) == 0:
                 return nu[0]
+            self.meter.count_nodes()
             return FactorNode(nu, deno)
 
         if node.type == 'body':
@@ -101,8 +125,10 @@ class NodeBuilder:
 
             while len(cur.childs) > 0:
                 n = self._traverse(cur.childs[1])
+                self.meter.count_nodes()
                 if isinstance(base, NumNode):
                     if isinstance(n, NumNode):
+                        self.meter.check_power(base.value, n.value)
                         base = NumNode(base.value ** n.value)
                     else:
                         base = ExpoNode(base, n)
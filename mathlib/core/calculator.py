@@ -1,27 +1,32 @@
 from mathlib.core.node import *
+from mathlib.core.functions import functions, op_dict
 from mathlib.core.simplifier import NodeSimplifier
-import operator
+from mathlib.core.budget import *
+from mathlib.utils.visitor import *
+import copy
 
 
-op_dict = {
-    '+': operator.add, '-': operator.sub, '*': operator.mul,
-    '/': operator.truediv, '%': operator.mod,
-    '<': operator.lt, '>': operator.gt,
-    '==': operator.eq, '!=': operator.ne,
-    '<=': operator.le, '>=': operator.ge,
-    'is': lambda x, t: isinstance(x, t),
-    'not': lambda x, t: not isinstance(x, t),
-}
+class Calculator(NodeVisitor):
 
+    dispatch = ('_eval_', '_derivate_')
 
-class Calculator:
-
-    def __init__(self, simplifier=None):
+    def __init__(self, simplifier=None, budget: Budget=None):
         self.simplifier = simplifier
         if simplifier is None:
-            self.simplifier = NodeSimplifier()
+            self.simplifier = NodeSimplifier(budget)
+        self.budget = budget or unlimited
+        self.meter = BudgetMeter()
 
     def eval(self, node: MathNode, exclusion: list, **kwargs):
+        return self._context()._eval(node, exclusion, **kwargs)
+
+    def _context(self):
+        # like NodeSimplifier, each call meters on its own shallow copy
+        context = copy.copy(self)
+        context.meter = self.budget.start()
+        return context
+
+    def _eval(self, node: MathNode, exclusion: list, **kwargs):
         for x in exclusion:
             ans = True
             for e in x:
@@ -46,62 +51,70 @@ class Calculator:
         return result
 
     def _eval_node(self, node: MathNode, **kwargs):
-        if node.__class__ in [int, float]:
-            return node
-        if isinstance(node, TermNode):
-            ans = 0
-            for x in node.factors:
-                ans += self._eval_node(x, **kwargs)
-            return ans
-
-        if isinstance(node, FactorNode):
-            nu, deno = node.coef[0], node.coef[1]
-            for x in node.numerator:
-                nu *= self._eval_node(x, **kwargs)
-            for x in node.denominator:
-                deno *= self._eval_node(x, **kwargs)
-            if deno == 0:
-                # raise ZeroDivisionError('in {}'.format(node))
-                return math.nan
-            return nu / deno
-
-        if isinstance(node, PolyNode):
-            body = self._eval_node(node.body, **kwargs)
-            if body < 0 and node.dim % 1 != 0:
-                return math.nan
-            return body ** node.dim
-
-        if isinstance(node, ExpoNode):
-            base = self._eval_node(node.base, **kwargs)
-            body = self._eval_node(node.body, **kwargs)
-            if base < 0 and body % 1 != 0:
-                return math.nan
-            return base ** body
-
-        if isinstance(node, LogNode):
-            body = self._eval_node(node.body, **kwargs)
-            base = self._eval_node(node.base, **kwargs)
-            if body <= 0 or base == 1 or base <= 0:
-                return math.nan
-            return math.log(body, base)
-
-        if isinstance(node, TriNode):
-            func_dict = {'sin': math.sin, 'cos': math.cos, 'tan': math.tan}
-            body = self._eval_node(node.body, **kwargs)
-            if node.func == 'tan' and body % (2*math.pi) == math.pi / 2:
-                return math.nan
-            return func_dict[node.func](body)
-
-        if isinstance(node, VarNode):
-            if node.name not in kwargs:
-                raise ArithmeticError('{} is not defined.'.format(node.name))
-            return kwargs[node.name]
-
-        if isinstance(node, NumNode):
-            return node.value
+        self.meter.step()
+        return self._eval_table[node.__class__](self, node, **kwargs)
+
+    def _eval_number(self, node, **kwargs):
+        return node
+
+    def _eval_TermNode(self, node: TermNode, **kwargs):
+        ans = 0
+        for x in node.factors:
+            ans += self._eval_node(x, **kwargs)
+        return ans
+
+    def _eval_FactorNode(self, node: FactorNode, **kwargs):
+        nu, deno = node.coef[0], node.coef[1]
+        for x in node.numerator:
+            nu *= self._eval_node(x, **kwargs)
+        for x in node.denominator:
+            deno *= self._eval_node(x, **kwargs)
+        if deno == 0:
+            # raise ZeroDivisionError('in {}'.format(node))
+            return math.nan
+        return nu / deno
+
+    def _eval_PolyNode(self, node: PolyNode, **kwargs):
+        body = self._eval_node(node.body, **kwargs)
+        if body < 0 and node.dim % 1 != 0:
+            return math.nan
+        self.meter.check_power(body, node.dim)
+        return body ** node.dim
+
+    def _eval_ExpoNode(self, node: ExpoNode, **kwargs):
+        base = self._eval_node(node.base, **kwargs)
+        body = self._eval_node(node.body, **kwargs)
+        if base < 0 and body % 1 != 0:
+            return math.nan
+        self.meter.check_power(base, body)
+        return base ** body
+
+    def _eval_LogNode(self, node: LogNode, **kwargs):
+        body = self._eval_node(node.body, **kwargs)
+        base = self._eval_node(node.base, **kwargs)
+        if body <= 0 or base == 1 or base <= 0:
+            return math.nan
+        return math.log(body, base)
+
+    def _eval_TriNode(self, node: TriNode, **kwargs):
+        body = self._eval_node(node.body, **kwargs)
+        return functions[node.func].scalar(body)
+
+    def _eval_VarNode(self, node: VarNode, **kwargs):
+        if node.name not in kwargs:
+            raise ArithmeticError('{} is not defined.'.format(node.name))
+        return kwargs[node.name]
+
+    def _eval_NumNode(self, node: NumNode, **kwargs):
+        return node.value
 
     def derivate(self, node: MathNode, exclusion: list, var: str):
-        n = self._derivate(node, var)
+        return self._context()._differentiate(node, exclusion, var)
+
+    def _differentiate(self, node: MathNode, exclusion: list, var: str):
+        # the derivative shares subtrees with node and canonicalize rewrites its input,
+        # a copy keeps the given tree as it is
+        n = copy.deepcopy(self._derivate(node, var))
         n, _ex = self.simplifier.canonicalize(n)
 
         exclusion += _ex
@@ -115,77 +128,73 @@ class Calculator:
         return n, ex
 
     def _derivate(self, node: MathNode, var: str):
+        self.meter.step()
         if not self._formular_of(node, var) or isinstance(node, NumNode):
             return NumNode(0)
-
-        if isinstance(node, VarNode):
-            return NumNode(1)
-
-        if isinstance(node, TermNode):
-            factors = [self._derivate(x, var) for x in node.factors]
-            return TermNode(factors)
-
-        if isinstance(node, FactorNode):
-            if len(node.numerator) == 0 and len(node.denominator) == 1:
-                d = node.denominator[0]
-                return FactorNode([self._derivate(d, var)], [PolyNode(d, 2)], (-node.coef[0], node.coef[1]))
-
-            c_nu = [x for x in node.numerator if not self._formular_of(x, var)]
-            c_deno = [x for x in node.denominator if not self._formular_of(x, var)]
-
-            nu = [x for x in node.numerator if x not in c_nu]
-            deno = [FactorNode([], [x]) for x in node.denominator
-                    if x not in c_deno]
-
-            target = nu + deno
-            factors = []
-            for t in target:
-                others = [self._derivate(t, var)] + [x for x in target if x != t]
-                factors.append(FactorNode(others + c_nu, c_deno, node.coef))
-
-            return TermNode(factors)
-
-        if isinstance(node, PolyNode):
-            if node.dim == 1:
-                return self._derivate(node.body, var)
-            return FactorNode([PolyNode(node.body, node.dim - 1),
-                               self._derivate(node.body, var)], [],
-                              (node.dim, 1))
-
-        if isinstance(node, ExpoNode):
-            if not self._formular_of(node.base, var):
-                # form of a^f(x)
-                return FactorNode([node, LogNode(NumNode(math.e), node.base),
-                                   self._derivate(node.body, var)])
-            if not self._formular_of(node.body, var):
-                # form of f(x)^a
-                return FactorNode([node.body,
-                                  ExpoNode(node.base,
-                                           TermNode([node.body, NumNode(-1)]))])
-            # form of f(x)^g(x)
-            return self._derivate(ExpoNode(NumNode(math.e),
-                                           FactorNode([LogNode(NumNode(math.e), node.base),
-                                                       node.body])), var)
-
-        if isinstance(node, LogNode):
-            if not self._formular_of(node.base, var):
-                # form of log(a)_f(x)
-                return FactorNode([self._derivate(node.body, var)],
-                                  [LogNode(NumNode(math.e), node.base),
-                                   node.body])
-            return self._derivate(FactorNode([LogNode(NumNode(math.e), node.body)],
-                                             [LogNode(NumNode(math.e), node.base)]), var)
-
-        if isinstance(node, TriNode):
-            if node.func == 'sin':
-                return FactorNode([TriNode('cos', node.body),
-                                   self._derivate(node.body, var)])
-            if node.func == 'cos':
-                return FactorNode([TriNode('sin', node.body),
-                                   self._derivate(node.body, var)], [], (-1, 1))
-            if node.func == 'tan':
-                return FactorNode([self._derivate(node.body, var)],
-                                  [PolyNode(TriNode('cos', node.body), 2)])
+        return self._derivate_table[node.__class__](self, node, var)
+
+    def _derivate_VarNode(self, node: VarNode, var: str):
+        return NumNode(1)
+
+    def _derivate_TermNode(self, node: TermNode, var: str):
+        factors = [self._derivate(x, var) for x in node.factors]
+        return TermNode(factors)
+
+    def _derivate_FactorNode(self, node: FactorNode, var: str):
+        if len(node.numerator) == 0 and len(node.denominator) == 1:
+            d = node.denominator[0]
+            return FactorNode([self._derivate(d, var)], [PolyNode(d, 2)], -node.coef)
+
+        c_nu = [x for x in node.numerator if not self._formular_of(x, var)]
+        c_deno = [x for x in node.denominator if not self._formular_of(x, var)]
+
+        nu = [x for x in node.numerator if x not in c_nu]
+        deno = [FactorNode([], [x]) for x in node.denominator
+                if x not in c_deno]
+
+        target = nu + deno
+        factors = []
+        for t in target:
+            others = [self._derivate(t, var)] + [x for x in target if x != t]
+            factors.append(FactorNode(others + c_nu, c_deno, node.coef))
+
+        return TermNode(factors)
+
+    def _derivate_PolyNode(self, node: PolyNode, var: str):
+        if node.dim == 1:
+            return self._derivate(node.body, var)
+        return FactorNode([PolyNode(node.body, node.dim - 1),
+                           self._derivate(node.body, var)], [],
+                          (node.dim, 1))
+
+    def _derivate_ExpoNode(self, node: ExpoNode, var: str):
+        if not self._formular_of(node.base, var):
+            # form of a^f(x)
+            return FactorNode([node, LogNode(NumNode(math.e), node.base),
+                               self._derivate(node.body, var)])
+        if not self._formular_of(node.body, var):
+            # form of f(x)^a
+            return FactorNode([node.body,
+                              ExpoNode(node.base,
+                                       TermNode([node.body, NumNode(-1)]))])
+        # form of f(x)^g(x)
+        return self._derivate(ExpoNode(NumNode(math.e),
+                                       FactorNode([LogNode(NumNode(math.e), node.base),
+                                                   node.body])), var)
+
+    def _derivate_LogNode(self, node: LogNode, var: str):
+        if not self._formular_of(node.base, var):
+            # form of log(a)_f(x)
+            return FactorNode([self._derivate(node.body, var)],
+                              [LogNode(NumNode(math.e), node.base),
+                               node.body])
+        return self._derivate(FactorNode([LogNode(NumNode(math.e), node.body)],
+                                         [LogNode(NumNode(math.e), node.base)]), var)
+
+    def _derivate_TriNode(self, node: TriNode, var: str):
+        outer = functions[node.func].derivative(node.body)
+        return FactorNode(outer.numerator + [self._derivate(node.body, var)],
+                          outer.denominator, outer.coef)
 
     def _formular_of(self, node: MathNode, var: str):
         return var in str(node)
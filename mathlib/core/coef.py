@@ -0,0 +1,101 @@
+import math
+
+
+# (numerator, denominator) of a FactorNode. integer pairs are exact fractions
+# reduced by gcd with a positive denominator, a pair with an inexact float
+# collapses to (value, 1), and a zero denominator is kept so it evaluates to nan
+class Coef(tuple):
+    __slots__ = ()
+
+    def __new__(cls, nu=1, deno=1):
+        if nu.__class__ is int and deno.__class__ is int:
+            # fast path for the common small integer coefficients
+            if deno == 1:
+                return tuple.__new__(cls, (nu, 1))
+            return tuple.__new__(cls, cls._reduce(nu, deno))
+
+        nu, deno = _intify(nu), _intify(deno)
+        if nu.__class__ is int and deno.__class__ is int:
+            return tuple.__new__(cls, cls._reduce(nu, deno))
+        if deno == 0:
+            return tuple.__new__(cls, (nu, deno))
+        return tuple.__new__(cls, (_intify(nu / deno), 1))
+
+    def __getnewargs__(self):
+        # copies and pickles are rebuilt from the pair
+        return tuple(self)
+
+    @staticmethod
+    def _reduce(nu: int, deno: int):
+        if deno == 0:
+            return nu, deno
+        if deno < 0:
+            nu, deno = -nu, -deno
+        g = math.gcd(nu, deno)
+        if g > 1:
+            nu, deno = nu // g, deno // g
+        return nu, deno
+
+    @property
+    def value(self):
+        nu, deno = self
+        if deno == 1:
+            return nu
+        if deno == 0:
+            return math.nan
+        return nu / deno
+
+    def is_fraction(self):
+        nu, deno = self
+        return nu.__class__ is int and deno != 1
+
+    def sign(self):
+        nu = self[0]
+        return (nu > 0) - (nu < 0)
+
+    def inverse(self):
+        nu, deno = self
+        return Coef(deno, nu)
+
+    def __add__(self, other):
+        a, b = self
+        c, d = _coef(other)
+        if b == d == 1:
+            return Coef(a + c, 1)
+        return Coef(a * d + c * b, b * d)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        a, b = self
+        c, d = _coef(other)
+        if b == d == 1:
+            return Coef(a * c, 1)
+        return Coef(a * c, b * d)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self * _coef(other).inverse()
+
+    def __neg__(self):
+        nu, deno = self
+        return tuple.__new__(Coef, (-nu, deno))
+
+    def __abs__(self):
+        nu, deno = self
+        return tuple.__new__(Coef, (abs(nu), deno))
+
+
+def _intify(x):
+    if x.__class__ is float and x.is_integer():
+        return int(x)
+    return x
+
+
+def _coef(x):
+    if isinstance(x, Coef):
+        return x
+    if isinstance(x, tuple):
+        return Coef(*x)
+    return Coef(x)
@@ -0,0 +1,146 @@
+from mathlib.core.node import *
+from mathlib.utils.node_util import *
+from mathlib.core.planner import EvaluationPlanner
+from mathlib.core.functions import functions
+
+import numpy as np
+
+
+vector_ops = {
+    '+': np.add, '-': np.subtract, '*': np.multiply,
+    '/': np.true_divide, '%': np.mod,
+    '<': np.less, '>': np.greater,
+    '==': np.equal, '!=': np.not_equal,
+    '<=': np.less_equal, '>=': np.greater_equal,
+}
+
+
+default_planner = EvaluationPlanner()
+
+
+class ExpressionSet:
+
+    def __init__(self, nodes: list, exclusions: list=None, planner: EvaluationPlanner=default_planner):
+        if exclusions is None:
+            exclusions = [[] for _ in nodes]
+        if len(exclusions) != len(nodes):
+            raise ValueError('{} exclusions are given for {} nodes'.format(len(exclusions), len(nodes)))
+
+        self.planner = planner
+        if planner is not None:
+            nodes = [planner.plan(x) for x in nodes]
+            exclusions = [[[self._plan_equation(e) for e in ex] for ex in exclusion] for exclusion in exclusions]
+
+        self.interner = NodeInterner()
+        self.outputs = [self.interner.intern(x) for x in nodes]
+        self.exclusions = [[[self._intern_equation(e) for e in ex] for ex in exclusion]
+                           for exclusion in exclusions]
+
+    def __len__(self):
+        return len(self.interner)
+
+    def _plan_equation(self, equation):
+        if not isinstance(equation[0], MathNode):
+            return equation
+        return [self.planner.plan(equation[0])] + list(equation[1:])
+
+    def _intern_equation(self, equation):
+        if len(equation) == 3:
+            a, cmp, b = equation
+            return self.interner.intern(a), None, None, cmp, b
+        if len(equation) == 5:
+            a, op, m, cmp, b = equation
+            return self.interner.intern(a), op, self.interner.intern(m), cmp, b
+        raise ValueError('invalid equation: {}'.format(equation))
+
+    def eval(self, **kwargs):
+        env = {k: np.asarray(v, dtype=float) for k, v in kwargs.items()}
+        shape = np.broadcast(*env.values()).shape if len(env) > 0 else ()
+
+        with np.errstate(all='ignore'):
+            values = []
+            for node, sig in zip(self.interner.nodes, self.interner.signatures):
+                values.append(self._eval_op(node, sig, values, env))
+
+            masks = {}
+            results = []
+            for i, exclusion in zip(self.outputs, self.exclusions):
+                result = np.broadcast_to(values[i], shape).astype(float)
+                for ex in exclusion:
+                    mask = np.ones(shape, dtype=bool)
+                    for e in ex:
+                        if e not in masks:
+                            masks[e] = self._eval_equation(e, values)
+                        mask = mask & masks[e]
+                    result[mask] = math.nan
+                results.append(result)
+        return results
+
+    def _eval_equation(self, equation, values):
+        a, op, m, cmp, b = equation
+        a = values[a]
+        if op is not None:
+            a = vector_ops[op](a, values[m])
+        if cmp == 'is':
+            return a % 1 == 0 if b is int else np.zeros_like(a, dtype=bool)
+        if cmp == 'not':
+            return a % 1 != 0 if b is int else np.ones_like(a, dtype=bool)
+        return vector_ops[cmp](a, b)
+
+    def _eval_op(self, node, sig, values, env):
+        kind = sig[0]
+        if kind in [int, float]:
+            return float(node)
+
+        if kind is TermNode:
+            ans = 0
+            for i in sig[1]:
+                ans = ans + values[i]
+            return ans
+
+        if kind is FactorNode:
+            nu, deno = float(node.coef[0]), float(node.coef[1])
+            for i in sig[2]:
+                nu = nu * values[i]
+            if len(sig[3]) == 0 and deno != 0:
+                return nu if deno == 1 else nu / deno
+            for i in sig[3]:
+                deno = deno * values[i]
+            return np.where(deno == 0, math.nan, np.true_divide(nu, deno))
+
+        if kind is PolyNode:
+            body = values[sig[2]]
+            dim = node.dim
+            ans = np.power(np.asarray(body, dtype=float), dim)
+            if dim % 1 != 0:
+                ans = np.where(body < 0, math.nan, ans)
+            if dim < 0:
+                ans = np.where(body == 0, math.nan, ans)
+            return ans
+
+        if kind is ExpoNode:
+            base, body = values[sig[1]], values[sig[2]]
+            ans = np.power(np.asarray(base, dtype=float), body)
+            invalid = (base < 0) & (body % 1 != 0) | (base == 0) & (body < 0)
+            return np.where(invalid, math.nan, ans)
+
+        if kind is LogNode:
+            base, body = values[sig[1]], values[sig[2]]
+            ans = np.log(body) / np.log(base)
+            invalid = (body <= 0) | (base == 1) | (base <= 0)
+            return np.where(invalid, math.nan, ans)
+
+        if kind is TriNode:
+            return functions[node.func].vector(values[sig[2]])
+
+        if kind is VarNode:
+            if node.name not in env:
+                raise ArithmeticError('{} is not defined.'.format(node.name))
+            return env[node.name]
+
+        if kind is NumNode:
+            return float(node.value)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,175 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.core.budget import *
+from mathlib.core.functions import functions, op_dict
+from mathlib.utils.node_util import count_nodes, constant_node
+from mathlib.utils.visitor import *
+
+from fractions import Fraction
+
+
+def _number(value):
+    if value.__class__ is Fraction:
+        return constant_node(Coef(value.numerator, value.denominator))
+    return NumNode(value)
+
+
+def _coef(value):
+    if value.__class__ is Fraction:
+        return Coef(value.numerator, value.denominator)
+    return Coef(value)
+
+
+def _finite(value):
+    return value if value.__class__ is Fraction or math.isfinite(value) else None
+
+
+# collapses every subtree without variables to a number. rational arithmetic stays exact and a value
+# which is not an integer becomes a coefficient, anything else folds to a float. a subtree which is not
+# defined, like log(1)_2, 1/0 or tan(pi/2), is kept whole so the exclusion of the tree still finds it
+class ConstantFolder(NodeVisitor):
+
+    dispatch = ('_fold_',)
+
+    def __init__(self, meter: BudgetMeter=None):
+        self.meter = meter or BudgetMeter()
+
+    def fold(self, node: MathNode):
+        # (folded tree, number of nodes it has less), the given tree is not changed
+        n, value = self._fold(node)
+        if value is not None:
+            n = self._replace(n, value)
+        return n, count_nodes(node) - count_nodes(n)
+
+    def _fold(self, node: MathNode):
+        # (node with its constant subtrees folded, its value when it is constant and defined)
+        self.meter.step()
+        return self._fold_table[node.__class__](self, node)
+
+    def _replace(self, node: MathNode, value):
+        if isinstance(node, NumNode) or isinstance(node, FactorNode) and node.numerator == node.denominator == []:
+            return node
+        return _number(value)
+
+    def _fold_default(self, node):
+        return node, None
+
+    def _fold_NumNode(self, node: NumNode):
+        return node, Fraction(node.value) if node.value.__class__ is int else _finite(node.value)
+
+    def _fold_TermNode(self, node: TermNode):
+        folded = [self._fold(x) for x in node.factors]
+        if all(v is not None for _, v in folded):
+            return TermNode([n for n, _ in folded]), sum(v for _, v in folded)
+
+        # the constant terms add up to one number in front
+        factors = [n for n, v in folded if v is None]
+        constants = [v for _, v in folded if v is not None]
+        if len(constants) > 0 and sum(constants) != 0:
+            factors.insert(0, _number(sum(constants)))
+        return TermNode(factors), None
+
+    def _fold_FactorNode(self, node: FactorNode):
+        nu = [self._fold(x) for x in node.numerator]
+        deno = [self._fold(x) for x in node.denominator]
+        a, b = node.coef
+        coef = Fraction(a, b) if a.__class__ is int and b.__class__ is int and b != 0 else \
+            _finite(a / b) if b != 0 else None
+
+        # constants of the denominator move into the coefficient unless they are zero
+        nu_values = [v for _, v in nu if v is not None]
+        deno_values = [v for _, v in deno if v is not None and v != 0]
+        numerator = [n for n, v in nu if v is None]
+        denominator = [n for n, v in deno if v is None or v == 0]
+
+        c = node.coef
+        for v in nu_values:
+            c = c * _coef(v)
+        for v in deno_values:
+            c = c / _coef(v)
+        n = FactorNode(numerator, denominator, c)
+
+        if coef is None or len(numerator) + len(denominator) > 0:
+            return n, None
+        value = coef
+        for v in nu_values:
+            value = value * v
+        for v in deno_values:
+            value = value / v
+        return n, _finite(value)
+
+    def _power(self, base, dim):
+        # base ^ dim of two constants, None where it is not defined
+        if dim.__class__ is Fraction and dim.denominator == 1:
+            dim = dim.numerator
+        if base == 0 and dim < 0:
+            return None
+        if base.__class__ is Fraction and dim.__class__ is int:
+            self.meter.check_power(base.numerator, dim)
+            self.meter.check_power(base.denominator, dim)
+            return base ** dim
+        if base < 0 and dim % 1 != 0:
+            return None
+        try:
+            return _finite(float(base) ** float(dim))
+        except OverflowError:
+            return None
+
+    def _fold_PolyNode(self, node: PolyNode):
+        body, value = self._fold(node.body)
+        if value is not None:
+            value = self._power(value, Fraction(node.dim) if node.dim.__class__ is int else node.dim)
+        if value is None:
+            return PolyNode(body, node.dim), None
+        return PolyNode(self._replace(body, value), node.dim), value
+
+    def _fold_ExpoNode(self, node: ExpoNode):
+        (base, a), (body, b) = self._fold(node.base), self._fold(node.body)
+        n = ExpoNode(base if a is None else self._replace(base, a), body if b is None else self._replace(body, b))
+        if a is None or b is None:
+            return n, None
+        value = self._power(a, b)
+        if value is None:
+            return ExpoNode(base, body), None
+        return n, value
+
+    def _fold_LogNode(self, node: LogNode):
+        (base, a), (body, b) = self._fold(node.base), self._fold(node.body)
+        if a is not None and (a <= 0 or a == 1) or b is not None and b <= 0:
+            # LogNode refuses a number as such a base, it keeps the subtree it was built with
+            return LogNode(base, body), None
+        n = LogNode(base if a is None else self._replace(base, a), body if b is None else self._replace(body, b))
+        if a is None or b is None:
+            return n, None
+        value = math.log(b, a)
+        if a.__class__ is Fraction and b.__class__ is Fraction:
+            # log of an exact power is exact
+            k = round(value)
+            if abs(k) < 64 and a ** k == b:
+                return n, Fraction(k)
+        return n, _finite(value)
+
+    def _fold_TriNode(self, node: TriNode):
+        body, value = self._fold(node.body)
+        if value is not None:
+            function = functions[node.func]
+            x = float(value)
+            value = None if self._excluded(function.exclusion(x)) else _finite(function.scalar(x))
+        if value is None:
+            return TriNode(node.func, body), None
+        return TriNode(node.func, self._replace(body, value)), value
+
+    @staticmethod
+    def _excluded(exclusion: list):
+        for group in exclusion:
+            ans = True
+            for e in group:
+                if len(e) == 3:
+                    a, cmp, b = e
+                else:
+                    a, op, m, cmp, b = e
+                    a = op_dict[op](a, m)
+                ans = ans and op_dict[cmp](a, b)
+            if ans:
+                return True
+        return False
@@ -0,0 +1,156 @@
+from mathlib.core.node import *
+
+import operator
+import numpy as np
+
+
+# operators of the exclusion equations, `[a, cmp, b]` or `[a, op, m, cmp, b]`
+op_dict = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul,
+    '/': operator.truediv, '%': operator.mod,
+    '<': operator.lt, '>': operator.gt,
+    '==': operator.eq, '!=': operator.ne,
+    '<=': operator.le, '>=': operator.ge,
+    'is': lambda x, t: isinstance(x, t),
+    'not': lambda x, t: not isinstance(x, t),
+}
+
+
+# a unary function of `TriNode`. `derivative` gives f'(u) of a body u as a FactorNode,
+# the chain rule is applied by the caller. `exclusion` gives the exclusion groups of
+# a body outside the domain. `interval` bounds an `Interval`, None is unbounded
+class Function:
+
+    def __init__(self, name: str, scalar, vector, derivative, exclusion=None, interval=None,
+                 latex=None, grouped=False):
+        self.name = name
+        self._scalar = scalar
+        self._vector = vector
+        self.derivative = derivative
+        self.exclusion = exclusion or (lambda body: [])
+        self.interval = interval
+        # `\sin (x)` or `\sqrt{x}` when grouped
+        self.latex = latex or '\\' + name
+        self.grouped = grouped
+
+    def __repr__(self):
+        return 'Function({})'.format(self.name)
+
+    def scalar(self, x):
+        try:
+            return self._scalar(x)
+        except ValueError:
+            return math.nan
+        except OverflowError:
+            return float(self.vector(x))
+
+    def vector(self, x):
+        with np.errstate(all='ignore'):
+            return self._vector(x)
+
+
+functions = {}
+
+
+def register_function(function: Function):
+    if function.name in functions:
+        raise ValueError('function {} is already registered'.format(function.name))
+    functions[function.name] = function
+    # functions sort in the order of registration
+    func_order[function.name] = len(func_order)
+    return function
+
+
+def get_function(name: str):
+    if name not in functions:
+        raise ValueError('unknown function: {}'.format(name))
+    return functions[name]
+
+
+def _tan(x):
+    if x % (2*math.pi) == math.pi / 2:
+        return math.nan
+    return math.tan(x)
+
+
+def _vector_tan(x):
+    return np.where(x % (2*math.pi) == math.pi / 2, math.nan, np.tan(x))
+
+
+def _domain(func, lo, hi):
+    def scalar(x):
+        return func(x) if lo <= x <= hi else math.nan
+    return scalar
+
+
+def _square(body):
+    return PolyNode(body, 2)
+
+
+def _one_minus_square(body):
+    return TermNode([NumNode(1), FactorNode([_square(body)], [], (-1, 1))])
+
+
+def _outside(lo, hi):
+    def exclusion(body):
+        return [[[body, '<', lo]], [[body, '>', hi]]]
+    return exclusion
+
+
+register_function(Function(
+    'sin', math.sin, np.sin,
+    lambda u: FactorNode([TriNode('cos', u)]),
+    interval=lambda x: x.sin()))
+
+register_function(Function(
+    'cos', math.cos, np.cos,
+    lambda u: FactorNode([TriNode('sin', u)], [], (-1, 1)),
+    interval=lambda x: x.cos()))
+
+register_function(Function(
+    'tan', _tan, _vector_tan,
+    lambda u: FactorNode([], [PolyNode(TriNode('cos', u), 2)]),
+    exclusion=lambda u: [[[u, '%', math.pi, '==', 0.5*math.pi]]],
+    interval=lambda x: x.tan()))
+
+register_function(Function(
+    'sinh', math.sinh, np.sinh,
+    lambda u: FactorNode([TriNode('cosh', u)]),
+    interval=lambda x: x.sinh()))
+
+register_function(Function(
+    'cosh', math.cosh, np.cosh,
+    lambda u: FactorNode([TriNode('sinh', u)]),
+    interval=lambda x: x.cosh()))
+
+register_function(Function(
+    'tanh', math.tanh, np.tanh,
+    lambda u: FactorNode([], [PolyNode(TriNode('cosh', u), 2)]),
+    interval=lambda x: x.tanh()))
+
+register_function(Function(
+    'asin', _domain(math.asin, -1, 1), np.arcsin,
+    lambda u: FactorNode([], [PolyNode(_one_minus_square(u), 0.5)]),
+    exclusion=_outside(-1, 1),
+    interval=lambda x: x.asin(), latex='\\arcsin'))
+
+register_function(Function(
+    'acos', _domain(math.acos, -1, 1), np.arccos,
+    lambda u: FactorNode([], [PolyNode(_one_minus_square(u), 0.5)], (-1, 1)),
+    exclusion=_outside(-1, 1),
+    interval=lambda x: x.acos(), latex='\\arccos'))
+
+register_function(Function(
+    'atan', math.atan, np.arctan,
+    lambda u: FactorNode([], [TermNode([NumNode(1), _square(u)])]),
+    interval=lambda x: x.atan(), latex='\\arctan'))
+
+register_function(Function(
+    'sqrt', _domain(math.sqrt, 0, math.inf), np.sqrt,
+    lambda u: FactorNode([], [TriNode('sqrt', u)], (1, 2)),
+    exclusion=lambda u: [[[u, '<', 0]]],
+    interval=lambda x: x.sqrt(), grouped=True))
+
+
+if __name__ == '__main__':
+    pass
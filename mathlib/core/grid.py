@@ -0,0 +1,55 @@
+from mathlib.core.node import *
+from mathlib.core.expression import ExpressionSet
+
+import numpy as np
+
+
+class GridEvaluator:
+
+    def __init__(self, node: MathNode, exclusion: list, shape=(200, 200)):
+        self.expr = ExpressionSet([node], [exclusion])
+        self.shape = shape
+
+    def eval(self, xvar: str, yvar: str, xlim: tuple, ylim: tuple, shape=None, **kwargs):
+        # values over a (ny, nx) grid, excluded and undefined points are nan
+        ny, nx = shape or self.shape
+        for l, r in [xlim, ylim]:
+            if not (math.isfinite(l) and math.isfinite(r)) or l >= r:
+                raise ValueError('invalid range: ({}, {})'.format(l, r))
+        if xvar == yvar:
+            raise ValueError('two different variables are needed: {}, {}'.format(xvar, yvar))
+
+        xs = np.linspace(xlim[0], xlim[1], nx)
+        ys = np.linspace(ylim[0], ylim[1], ny)
+        # a row and a column broadcast to the grid inside the evaluation,
+        # no meshgrid is materialized for the inputs
+        kwargs = dict(kwargs, **{xvar: xs[None, :], yvar: ys[:, None]})
+        zs = np.broadcast_to(self.expr.eval(**kwargs)[0], (ny, nx))
+        return xs, ys, np.array(zs)
+
+
+def downsample(xs, ys, zs, shape):
+    # block means that skip nan, a block is nan only when all of it is
+    ny, nx = zs.shape
+    fy, fx = max(1, -(-ny // shape[0])), max(1, -(-nx // shape[1]))
+    if fy == 1 and fx == 1:
+        return xs, ys, zs
+
+    py, px = -ny % fy, -nx % fx
+    zs = np.pad(zs, ((0, py), (0, px)), constant_values=math.nan)
+    xs = np.pad(xs, (0, px), constant_values=math.nan)
+    ys = np.pad(ys, (0, py), constant_values=math.nan)
+
+    blocks = zs.reshape(zs.shape[0] // fy, fy, zs.shape[1] // fx, fx)
+    with np.errstate(all='ignore'):
+        finite = np.isfinite(blocks)
+        count = finite.sum(axis=(1, 3))
+        total = np.where(finite, blocks, 0).sum(axis=(1, 3))
+        zs = np.where(count > 0, total / np.maximum(count, 1), math.nan)
+    xs = np.nanmean(xs.reshape(-1, fx), axis=1)
+    ys = np.nanmean(ys.reshape(-1, fy), axis=1)
+    return xs, ys, zs
+
+
+if __name__ == '__main__':
+    pass
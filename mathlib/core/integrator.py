@@ -0,0 +1,92 @@
+from mathlib.core.node import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.solver import Solver
+
+import numpy as np
+
+
+# 15-point Gauss-Kronrod rule with its embedded 7-point Gauss rule on [-1, 1]
+_xgk = [0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+        0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+        0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+        0.207784955007898467600689403773245, 0.000000000000000000000000000000000]
+_wgk = [0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+        0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+        0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+        0.204432940075298892414161999234649, 0.209482141084727828012999174891714]
+_wg = [0, 0.129484966168869693270611432679082, 0, 0.279705391489276667901467771423780,
+       0, 0.381830050505118944950369775488975, 0, 0.417959183673469387755102040816327]
+
+kronrod_nodes = np.array([-x for x in _xgk[:-1]] + _xgk[::-1])
+kronrod_weights = np.array(_wgk[:-1] + _wgk[::-1])
+gauss_weights = np.array(_wg[:-1] + _wg[::-1])
+
+
+class Integrator:
+
+    def __init__(self, solver: Solver=None, tol=1e-10, rel_tol=1e-10, max_intervals=2000):
+        self.solver = solver
+        if solver is None:
+            self.solver = Solver()
+        self.tol = tol
+        self.rel_tol = rel_tol
+        self.max_intervals = max_intervals
+
+    def integrate(self, node: MathNode, exclusion: list, var: str, lim: tuple, tol=None, **kwargs):
+        l, r = lim
+        if not (math.isfinite(l) and math.isfinite(r)):
+            raise ValueError('invalid range: ({}, {})'.format(l, r))
+        if l == r:
+            return 0, 0, 0
+        if l > r:
+            value, error, evaluations = self.integrate(node, exclusion, var, (r, l), tol, **kwargs)
+            return -value, error, evaluations
+        tol = self.tol if tol is None else tol
+
+        # split at the holes of the domain so no interval has a pole inside,
+        # the rule never evaluates the end points of an interval
+        holes = [x for x in self.solver.holes(exclusion, var, lim, **kwargs) if l < x < r]
+        points = np.array([l] + holes + [r], dtype=float)
+
+        expr = ExpressionSet([node], [exclusion])
+        a, b = points[:-1], points[1:]
+        values, errors = [], []
+        evaluations = 0
+
+        while len(a) > 0:
+            center, half = (a + b) / 2, (b - a) / 2
+            xs = center[:, None] + half[:, None] * kronrod_nodes
+            fs = np.broadcast_to(expr.eval(**dict(kwargs, **{var: xs}))[0], xs.shape)
+            evaluations += fs.size
+
+            with np.errstate(all='ignore'):
+                kronrod = half * (fs @ kronrod_weights)
+                error = np.abs(kronrod - half * (fs @ gauss_weights))
+
+            finite = np.isfinite(fs).all(axis=1) & np.isfinite(error)
+            tiny = half <= 1e-12 * (1 + np.abs(center))
+            if (~finite & tiny).any():
+                x = center[~finite & tiny][0]
+                raise ArithmeticError('{} is not integrable around {}={:g}'.format(node, var, x))
+
+            # each interval may take its share of the tolerance by width
+            local = np.maximum(tol, self.rel_tol * np.abs(kronrod)) * (b - a) / (r - l)
+            accepted = finite & ((error <= local) | tiny)
+            if len(a) + np.count_nonzero(~accepted) > self.max_intervals:
+                # out of intervals, keep the current estimates and report their error
+                if not finite.all():
+                    raise ArithmeticError('{} is not integrable on ({}, {})'.format(node, l, r))
+                accepted[:] = True
+
+            values.extend(kronrod[accepted].tolist())
+            errors.extend(error[accepted].tolist())
+
+            rest = ~accepted
+            a, b, center = a[rest], b[rest], center[rest]
+            a, b = np.concatenate([a, center]), np.concatenate([center, b])
+
+        return math.fsum(values), math.fsum(errors), evaluations
+
+
+if __name__ == '__main__':
+    pass
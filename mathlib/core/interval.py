@@ -0,0 +1,264 @@
+from mathlib.core.node import *
+from mathlib.core.functions import functions
+from mathlib.utils.node_util import *
+
+import numpy as np
+
+
+def _down(x):
+    return np.nextafter(x, -np.inf)
+
+
+def _up(x):
+    return np.nextafter(x, np.inf)
+
+
+def _product(a, b):
+    # 0 * inf is 0 for bounds, the infinite end is never reached
+    with np.errstate(all='ignore'):
+        p = a * b
+    return np.where(np.isnan(p) & ~np.isnan(a) & ~np.isnan(b), 0.0, p)
+
+
+# closed intervals [lo, hi] with outward rounding, vectorized over numpy arrays.
+# nan on both ends is the empty interval, where the node is not defined at all
+class Interval:
+    __slots__ = ('lo', 'hi')
+
+    def __init__(self, lo, hi=None):
+        self.lo = np.asarray(lo, dtype=float)
+        self.hi = np.asarray(lo if hi is None else hi, dtype=float)
+
+    @classmethod
+    def everything(cls, like):
+        lo = np.where(cls._empty_of(like), math.nan, -np.inf)
+        return cls(lo, -lo)
+
+    @staticmethod
+    def _empty_of(x):
+        return np.isnan(x.lo) | np.isnan(x.hi)
+
+    def __repr__(self):
+        return 'Interval({}, {})'.format(self.lo, self.hi)
+
+    def is_empty(self):
+        return self._empty_of(self)
+
+    def is_finite(self):
+        return np.isfinite(self.lo) & np.isfinite(self.hi)
+
+    def contains(self, value):
+        return (self.lo <= value) & (value <= self.hi)
+
+    def restrict(self, lo=-np.inf, hi=np.inf):
+        # intersects with the domain of a function, disjoint parts become empty
+        a, b = np.maximum(self.lo, lo), np.minimum(self.hi, hi)
+        empty = a > b
+        return Interval(np.where(empty, math.nan, a), np.where(empty, math.nan, b))
+
+    def __add__(self, other):
+        other = _interval(other)
+        with np.errstate(all='ignore'):
+            return Interval(_down(self.lo + other.lo), _up(self.hi + other.hi))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Interval(-self.hi, -self.lo)
+
+    def __sub__(self, other):
+        return self + -_interval(other)
+
+    def __mul__(self, other):
+        other = _interval(other)
+        products = [_product(a, b) for a in [self.lo, self.hi] for b in [other.lo, other.hi]]
+        return Interval(_down(np.minimum.reduce(products)), _up(np.maximum.reduce(products)))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self * _interval(other).inverse()
+
+    def inverse(self):
+        lo, hi = self.lo, self.hi
+        with np.errstate(all='ignore'):
+            inv = Interval(_down(1 / hi), _up(1 / lo))
+        zero = (lo <= 0) & (hi >= 0)
+        point = (lo == 0) & (hi == 0)
+        # a pole inside, the reciprocal is unbounded on both sides
+        return Interval(np.where(point, math.nan, np.where(zero, -np.inf, inv.lo)),
+                        np.where(point, math.nan, np.where(zero, np.inf, inv.hi)))
+
+    def pow(self, dim):
+        if dim == 0:
+            return Interval(np.where(self.is_empty(), math.nan, 1.0))
+        if dim % 1 != 0:
+            # defined for non-negative bodies only, like `PolyNode` with a float dim
+            x = self.restrict(0)
+            with np.errstate(all='ignore'):
+                a, b = np.power(x.lo, dim), np.power(x.hi, dim)
+            if dim > 0:
+                return Interval(np.maximum(_down(a), 0), _up(b))
+            # 0^dim is a pole, an interval of just 0 has no defined value
+            return Interval(np.where(x.hi == 0, math.nan, np.maximum(_down(b), 0)), _up(a))
+        if dim < 0:
+            return self.pow(-dim).inverse()
+
+        with np.errstate(all='ignore'):
+            a, b = np.power(self.lo, dim), np.power(self.hi, dim)
+        if dim % 2 == 1:
+            return Interval(_down(a), _up(b))
+        zero = (self.lo <= 0) & (self.hi >= 0)
+        lo = np.where(zero, 0.0, _down(np.minimum(a, b)))
+        return Interval(np.where(self.is_empty(), math.nan, lo), _up(np.maximum(a, b)))
+
+    def exp(self):
+        with np.errstate(all='ignore'):
+            return Interval(np.maximum(_down(np.exp(self.lo)), 0), _up(np.exp(self.hi)))
+
+    def log(self):
+        x = self.restrict(0)
+        with np.errstate(all='ignore'):
+            return Interval(_down(np.log(x.lo)), _up(np.log(x.hi)))
+
+    def sin(self):
+        return self._periodic(np.sin, math.pi / 2)
+
+    def cos(self):
+        return self._periodic(np.cos, 0)
+
+    def _increasing(self, func, lo=-np.inf, hi=np.inf, bounds=(-np.inf, np.inf)):
+        # monotone functions map the ends, within their domain [lo, hi] and range `bounds`
+        x = self.restrict(lo, hi)
+        with np.errstate(all='ignore'):
+            a, b = func(x.lo), func(x.hi)
+        return Interval(np.maximum(_down(a), bounds[0]), np.minimum(_up(b), bounds[1]))
+
+    def sinh(self):
+        return self._increasing(np.sinh)
+
+    def cosh(self):
+        with np.errstate(all='ignore'):
+            a, b = np.cosh(self.lo), np.cosh(self.hi)
+        zero = (self.lo <= 0) & (self.hi >= 0)
+        lo = np.where(zero, 1.0, np.maximum(_down(np.minimum(a, b)), 1))
+        return Interval(np.where(self.is_empty(), math.nan, lo), _up(np.maximum(a, b)))
+
+    def tanh(self):
+        return self._increasing(np.tanh, bounds=(-1, 1))
+
+    def asin(self):
+        return self._increasing(np.arcsin, -1, 1, (-math.pi / 2, math.pi / 2))
+
+    def acos(self):
+        # decreasing, the ends swap
+        x = self.restrict(-1, 1)
+        with np.errstate(all='ignore'):
+            a, b = np.arccos(x.hi), np.arccos(x.lo)
+        return Interval(np.maximum(_down(a), 0), np.minimum(_up(b), math.pi))
+
+    def atan(self):
+        return self._increasing(np.arctan, bounds=(-math.pi / 2, math.pi / 2))
+
+    def sqrt(self):
+        return self._increasing(np.sqrt, 0, bounds=(0, np.inf))
+
+    def _periodic(self, func, peak):
+        # max at peak + 2k*pi, min at peak + pi + 2k*pi
+        lo, hi = self.lo, self.hi
+        with np.errstate(all='ignore'):
+            a, b = func(lo), func(hi)
+            k = np.ceil((lo - peak) / (2 * math.pi))
+            has_max = peak + 2 * math.pi * k <= hi
+            k = np.ceil((lo - peak - math.pi) / (2 * math.pi))
+            has_min = peak + math.pi + 2 * math.pi * k <= hi
+        wide = ~(hi - lo < 2 * math.pi)
+        _lo = np.where(has_min | wide, -1.0, np.maximum(_down(np.minimum(a, b)), -1))
+        _hi = np.where(has_max | wide, 1.0, np.minimum(_up(np.maximum(a, b)), 1))
+        empty = self.is_empty()
+        return Interval(np.where(empty, math.nan, _lo), np.where(empty, math.nan, _hi))
+
+    def tan(self):
+        lo, hi = self.lo, self.hi
+        with np.errstate(all='ignore'):
+            k = np.ceil((lo - math.pi / 2) / math.pi)
+            pole = ~(math.pi / 2 + math.pi * k > hi)
+            a, b = _down(np.tan(lo)), _up(np.tan(hi))
+        empty = self.is_empty()
+        return Interval(np.where(empty, math.nan, np.where(pole, -np.inf, a)),
+                        np.where(empty, math.nan, np.where(pole, np.inf, b)))
+
+
+def _interval(x):
+    if isinstance(x, Interval):
+        return x
+    if isinstance(x, tuple):
+        return Interval(*x)
+    return Interval(x)
+
+
+class IntervalEvaluator:
+
+    def __init__(self, nodes: list):
+        self.interner = NodeInterner()
+        self.outputs = [self.interner.intern(x) for x in nodes]
+
+    def eval(self, **kwargs):
+        # each variable is an Interval, a (lo, hi) tuple or a number
+        env = {k: _interval(v) for k, v in kwargs.items()}
+        values = []
+        for node, sig in zip(self.interner.nodes, self.interner.signatures):
+            values.append(self._eval_op(node, sig, values, env))
+        return [values[i] for i in self.outputs]
+
+    def _eval_op(self, node, sig, values, env):
+        kind = sig[0]
+        if kind in [int, float]:
+            return Interval(node)
+
+        if kind is TermNode:
+            ans = Interval(0.0)
+            for i in sig[1]:
+                ans = ans + values[i]
+            return ans
+
+        if kind is FactorNode:
+            nu, deno = node.coef
+            ans = Interval(float(nu))
+            for i in sig[2]:
+                ans = ans * values[i]
+            for i in sig[3]:
+                ans = ans / values[i]
+            return ans / Interval(float(deno))
+
+        if kind is PolyNode:
+            return values[sig[2]].pow(node.dim)
+
+        if kind is ExpoNode:
+            base, body = values[sig[1]], values[sig[2]]
+            ans = (body * base.log()).exp()
+            # negative bases are defined for integer powers only, no cheap bound there
+            whole = Interval.everything(body)
+            positive = base.lo > 0
+            return Interval(np.where(positive, ans.lo, whole.lo), np.where(positive, ans.hi, whole.hi))
+
+        if kind is LogNode:
+            base, body = values[sig[1]], values[sig[2]]
+            return body.log() / base.log()
+
+        if kind is TriNode:
+            body = values[sig[2]]
+            kernel = functions[node.func].interval
+            return Interval.everything(body) if kernel is None else kernel(body)
+
+        if kind is VarNode:
+            if node.name not in env:
+                raise ArithmeticError('{} is not defined.'.format(node.name))
+            return env[node.name]
+
+        if kind is NumNode:
+            return Interval(float(node.value))
+
+
+if __name__ == '__main__':
+    pass
@@ -2,6 +2,8 @@ import abc
 import math
 import functools
 
+from mathlib.core.coef import Coef
+
 
 @functools.total_ordering
 class MathNode(metaclass=abc.ABCMeta):
@@ -63,9 +65,13 @@ class MathNode(metaclass=abc.ABCMeta):
         pass
 
 
+# sorting order of `TriNode` functions, filled by `register_function`
+func_order = {}
+
+
 def is_negative(node: MathNode):
     if isinstance(node, FactorNode):
-        return node.coef[0] / node.coef[1] < 0
+        return node.coef.sign() < 0
     if isinstance(node, NumNode):
         return node.value < 0
     return False
@@ -175,7 +181,7 @@ class FactorNode(MathNode):
         super(FactorNode, self).__init__()
         self.numerator = sorted(numerator)
         self.denominator = sorted(denominator)
-        self.coef = coef
+        self.coef = Coef(*coef)
 
         self.update_coef()
 
@@ -217,7 +223,7 @@ class FactorNode(MathNode):
 
     def __str__(self):
         s = ''
-        if self.coef[0] / self.coef[1] < 0:
+        if self.coef.sign() < 0:
             s += '-'
         c_nu = '{}'.format(abs(self.coef[0]))
         c_deno = '{}'.format(abs(self.coef[1]))
@@ -238,7 +244,7 @@ class FactorNode(MathNode):
                     s += '{}'.format(c_nu)
 
             if nu != '':
-                if c_nu != '1':
+                if c_nu != '1' or c_deno != '1':
                     s += '*'
                 s += '{}'.format(nu)
         else:
@@ -269,17 +275,11 @@ class FactorNode(MathNode):
         k = [x.orders() for x in self.numerator] + [x.orders() for x in self.denominator]
         return max(k) if len(k) > 0 else 7
 
-    def _intify(self, coef):
-        a, b = coef
-        if a % 1 == 0:
-            a = int(a)
-        if b % 1 == 0:
-            b = int(b)
-        return a, b
-
     def update_coef(self):
         nu = [x for x in self.numerator if isinstance(x, NumNode)]
         deno = [x for x in self.denominator if isinstance(x, NumNode)]
+        if len(nu) == 0 and len(deno) == 0:
+            return
 
         a, b = self.coef
         for x in nu:
@@ -289,35 +289,24 @@ class FactorNode(MathNode):
 
         self.numerator = [x for x in self.numerator if not isinstance(x, NumNode)]
         self.denominator = [x for x in self.denominator if not isinstance(x, NumNode)]
-
-        if self.coef[0] % 1 != 0 and self.coef[1] % 1 != 0:     # (x.xx / x.xx)
-            self.coef = self.coef[0] / self.coef[1], 1
-        self.coef = self._intify((a, b))
+        self.coef = Coef(a, b)
 
     def inverse(self):
-        a, b = self.coef
-        return FactorNode(self.denominator, self.numerator, (b, a))
+        return FactorNode(self.denominator, self.numerator, self.coef.inverse())
 
     def _add(self, other):
-        a, b = self.coef
-        c, d = other.coef
-
-        gcd = math.gcd(b, d)
-        nu = (a * gcd / b) + (c * gcd / d)
-        self.coef = self._intify((nu, gcd))
+        self.coef = self.coef + other.coef
         return self
 
     def _mul(self, other):
         if isinstance(other, FactorNode):
             nu = self.numerator + other.numerator
             deno = self.denominator + other.denominator
-            coef = self.coef[0] * other.coef[0], self.coef[1] * other.coef[1]
 
-            return FactorNode(nu, deno, coef)
+            return FactorNode(nu, deno, self.coef * other.coef)
 
     def __neg__(self):
-        return FactorNode(self.numerator, self.denominator,
-                          (-self.coef[0], self.coef[1]))
+        return FactorNode(self.numerator, self.denominator, -self.coef)
 
 
 class PolyNode(MathNode):
@@ -498,7 +487,6 @@ class TriNode(MathNode):
         return '{}({})'.format(self.func, self.body)
 
     def _compare(self, other):
-        func_order = {'sin': 0, 'cos': 1, 'tan': 2}
         return func_order[self.func] < func_order[other.func]
 
     def orders(self):
@@ -0,0 +1,140 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.core.polynomial import Polynomial
+from mathlib.utils.node_util import *
+
+
+def _trim(exponents: tuple):
+    n = len(exponents)
+    while n > 0 and exponents[n - 1] == 0:
+        n -= 1
+    return exponents[:n]
+
+
+# rewrites sums of monomials into nested horner form for evaluation only,
+# the planned tree has the same values but is not canonical any more
+class EvaluationPlanner(NodeVisitor):
+
+    dispatch = ('_plan_', '_monomial_')
+
+    def __init__(self, min_terms=3, min_degree=3):
+        self.min_terms = min_terms
+        self.min_degree = min_degree
+
+    def plan(self, node: MathNode):
+        return self._plan_table[node.__class__](self, node)
+
+    def _plan_default(self, node):
+        return node
+
+    def _plan_FactorNode(self, node: FactorNode):
+        return FactorNode([self.plan(x) for x in node.numerator],
+                          [self.plan(x) for x in node.denominator], node.coef)
+
+    def _plan_PolyNode(self, node: PolyNode):
+        return PolyNode(self.plan(node.body), node.dim)
+
+    def _plan_ExpoNode(self, node: ExpoNode):
+        return ExpoNode(self.plan(node.base), self.plan(node.body))
+
+    def _plan_LogNode(self, node: LogNode):
+        return LogNode(self.plan(node.base), self.plan(node.body))
+
+    def _plan_TriNode(self, node: TriNode):
+        return TriNode(node.func, self.plan(node.body))
+
+    def _plan_TermNode(self, node: TermNode):
+        interner, slots, symbols = NodeInterner(), {}, []
+
+        def symbol(x):
+            k = interner.intern(x)
+            if k not in slots:
+                slots[k] = len(symbols)
+                symbols.append(x)
+            return Polynomial.symbol(slots[k])
+
+        p = Polynomial()
+        for x in node.factors:
+            p = p + self._monomial(x, symbol)
+
+        degrees = [sum(k) for k in p.terms]
+        if len([d for d in degrees if d > 0]) < self.min_terms or max(degrees, default=0) < self.min_degree:
+            return TermNode([self.plan(x) for x in node.factors])
+
+        # the symbol with the highest power is factored out first
+        top = {}
+        for k in p.terms:
+            for i, e in enumerate(k):
+                top[i] = max(top.get(i, 0), e)
+        order = sorted(top, key=lambda i: -top[i])
+        return self._horner(p.terms, order, [self.plan(x) for x in symbols])
+
+    def _monomial(self, node: MathNode, symbol):
+        return self._monomial_table[node.__class__](self, node, symbol)
+
+    def _monomial_default(self, node, symbol):
+        return symbol(node)
+
+    def _monomial_number(self, node, symbol):
+        return Polynomial.constant(node)
+
+    def _monomial_NumNode(self, node: NumNode, symbol):
+        return Polynomial.constant(node.value)
+
+    def _monomial_FactorNode(self, node: FactorNode, symbol):
+        if len(node.denominator) > 0:
+            return symbol(node)
+        if any(isinstance(x, (TermNode, FactorNode)) for x in node.numerator):
+            return symbol(node)
+        ans = Polynomial.constant(node.coef)
+        for x in node.numerator:
+            ans = ans * self._monomial(x, symbol)
+        return ans
+
+    def _monomial_PolyNode(self, node: PolyNode, symbol):
+        if node.dim % 1 == 0 and node.dim > 0 and not isinstance(node.body, (TermNode, FactorNode)):
+            return symbol(node.body).pow(int(node.dim))
+        return symbol(node)
+
+    def _horner(self, terms: dict, order: list, symbols: list):
+        if len(terms) == 0:
+            return NumNode(0)
+        for i in order:
+            if any(len(k) > i and k[i] > 0 for k in terms):
+                break
+        else:
+            return constant_node(terms[()])
+
+        # p = x^e0 * (q0 + x^(e1-e0) * (q1 + x^(e2-e1) * (...)))
+        groups = {}
+        for k, c in terms.items():
+            e = k[i] if len(k) > i else 0
+            rest = _trim(k[:i] + (0,) + k[i + 1:])
+            groups.setdefault(e, {})[rest] = c
+        es = sorted(groups)
+
+        x = symbols[i]
+        ans = self._horner(groups[es[-1]], order, symbols)
+        for lo, hi in reversed(list(zip(es, es[1:]))):
+            ans = TermNode([self._horner(groups[lo], order, symbols), self._multiply(self._power(x, hi - lo), ans)])
+        if es[0] > 0:
+            ans = self._multiply(self._power(x, es[0]), ans)
+        return ans
+
+    @staticmethod
+    def _power(node: MathNode, dim: int):
+        if dim == 1:
+            return node
+        return PolyNode(node, dim)
+
+    @staticmethod
+    def _multiply(a: MathNode, b: MathNode):
+        if isinstance(b, FactorNode) and len(b.denominator) == 0:
+            return FactorNode([a] + b.numerator, [], b.coef)
+        if isinstance(b, NumNode):
+            return FactorNode([a], [], Coef(b.value))
+        return FactorNode([a, b], [])
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,260 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.core.budget import *
+from mathlib.utils.node_util import *
+
+
+class ExpansionLimit(ArithmeticError):
+    pass
+
+
+def _add_exponents(a: tuple, b: tuple):
+    if len(a) < len(b):
+        a, b = b, a
+    return tuple(x + y for x, y in zip(a, b)) + a[len(b):]
+
+
+# sparse polynomial over numbered symbols, a dict from exponent tuples to Coef.
+# exponent tuples have no trailing zeros, so () is the constant monomial
+class Polynomial:
+
+    def __init__(self, terms: dict=None):
+        self.terms = terms if terms is not None else {}
+
+    @classmethod
+    def constant(cls, coef):
+        coef = coef if isinstance(coef, Coef) else Coef(coef)
+        if coef[0] == 0:
+            return cls()
+        return cls({(): coef})
+
+    @classmethod
+    def symbol(cls, index: int):
+        return cls({(0,) * index + (1,): Coef(1)})
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __repr__(self):
+        return 'Polynomial({})'.format(self.terms)
+
+    def is_constant(self):
+        return len(self.terms) == 0 or len(self.terms) == 1 and () in self.terms
+
+    def is_monomial(self):
+        return len(self.terms) <= 1
+
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for k, c in other.terms.items():
+            c = terms[k] + c if k in terms else c
+            if c[0] == 0:
+                terms.pop(k, None)
+            else:
+                terms[k] = c
+        return Polynomial(terms)
+
+    def __mul__(self, other):
+        return self.mul(other)
+
+    def mul(self, other, max_terms=None, meter: BudgetMeter=None):
+        work = len(self.terms) * len(other.terms)
+        if max_terms is not None and work > max_terms * 64:
+            raise ExpansionLimit('more than {} products'.format(max_terms * 64))
+        if meter is not None:
+            meter.step(work)
+        terms = {}
+        for k1, c1 in self.terms.items():
+            for k2, c2 in other.terms.items():
+                k = _add_exponents(k1, k2)
+                c = c1 * c2
+                terms[k] = terms[k] + c if k in terms else c
+        terms = {k: c for k, c in terms.items() if c[0] != 0}
+        if max_terms is not None and len(terms) > max_terms:
+            raise ExpansionLimit('more than {} terms'.format(max_terms))
+        return Polynomial(terms)
+
+    def pow(self, n: int, max_terms=None, meter: BudgetMeter=None):
+        if n < 0:
+            raise ValueError('negative power of a polynomial: {}'.format(n))
+        if self.is_monomial():
+            # powers of a single monomial need no multiplication
+            terms = {}
+            for k, c in self.terms.items():
+                if meter is not None and c[1] == 1:
+                    meter.check_power(c[0], n)
+                nu, deno = c
+                terms[tuple(e * n for e in k)] = Coef(nu ** n, deno ** n)
+            return Polynomial(terms) if n > 0 else Polynomial.constant(1)
+
+        # square and multiply, so oversized powers hit max_terms after a few steps
+        ans, base = Polynomial.constant(1), self
+        while n > 0:
+            if n & 1:
+                ans = ans.mul(base, max_terms, meter)
+            n >>= 1
+            if n > 0:
+                base = base.mul(base, max_terms, meter)
+        return ans
+
+    def to_node(self, symbols: list) -> MathNode:
+        if self.is_constant():
+            return constant_node(self.terms.get((), Coef(0)))
+
+        factors = []
+        for k, c in self.terms.items():
+            nu = []
+            for i, e in enumerate(k):
+                if e == 0:
+                    continue
+                x = symbols[i]
+                if e == 1:
+                    nu.append(x)
+                elif isinstance(x, PolyNode):
+                    nu.append(PolyNode(x.body, x.dim * e))
+                else:
+                    nu.append(PolyNode(x, e))
+            factors.append(FactorNode(nu, [], c))
+        return TermNode(factors)
+
+
+# expands sums, products and non-negative integer powers bottom-up. products of several polynomial
+# factors with a sum among them are multiplied out, like (x-1)^2*(x+3). sums, powers and a single
+# factor with a coefficient are expanded only where their terms merge into fewer operations, so a
+# lone power of a sum like (x-3)^12 stays factored and keeps its precision near the roots.
+# with cheaper_only, products follow that rule too.
+# functions, fractional powers and denominators are opaque symbols with their own children
+# expanded, and they are never distributed over a sum
+class PolynomialExpander(NodeVisitor):
+
+    dispatch = ('_expand_', '_convert_')
+
+    def __init__(self, max_terms=1000, meter: BudgetMeter=None, cheaper_only=False):
+        self.max_terms = max_terms
+        self.meter = meter or BudgetMeter()
+        self.cheaper_only = cheaper_only
+        self.interner = NodeInterner()
+        self.slots = {}
+        self.symbols = []
+        self.opaque = set()
+        # polynomials of the subtrees already converted, with the node so its id is not reused
+        self.polynomials = {}
+
+    def expand(self, node: MathNode):
+        if node.__class__ in [int, float]:
+            return node
+        return self._expand(node)
+
+    def _expand(self, node: MathNode):
+        self.meter.step()
+        return self._expand_table[node.__class__](self, node)
+
+    def _expand_default(self, node):
+        return node
+
+    def _expand_TermNode(self, node: TermNode):
+        return self._cheaper(TermNode([self._expand(x) for x in node.factors]))
+
+    def _expand_FactorNode(self, node: FactorNode):
+        n = FactorNode([self._expand(x) for x in node.numerator],
+                       [self._expand(x) for x in node.denominator], node.coef)
+        if not self.cheaper_only and self._is_product(n):
+            return self._multiply(n)
+        return self._cheaper(n)
+
+    def _expand_PolyNode(self, node: PolyNode):
+        n = PolyNode(self._expand(node.body), node.dim)
+        if node.dim % 1 == 0 and node.dim >= 0:
+            return self._cheaper(n)
+        return n
+
+    def _expand_ExpoNode(self, node: ExpoNode):
+        return ExpoNode(self._expand(node.base), self._expand(node.body))
+
+    def _expand_LogNode(self, node: LogNode):
+        return LogNode(self._expand(node.base), self._expand(node.body))
+
+    def _expand_TriNode(self, node: TriNode):
+        return TriNode(node.func, self._expand(node.body))
+
+    def _cheaper(self, node: MathNode):
+        try:
+            n = self._polynomial(node).to_node(self.symbols)
+        except ExpansionLimit:
+            return node
+        return n if count_ops(n) < count_ops(node) else node
+
+    def _is_product(self, node: FactorNode):
+        # several factors with a variable, one of them a sum
+        try:
+            factors = [self._polynomial(x) for x in node.numerator]
+        except ExpansionLimit:
+            return False
+        factors = [x for x in factors if not x.is_constant()]
+        return len(factors) > 1 and any(not x.is_monomial() for x in factors)
+
+    def _multiply(self, node: FactorNode):
+        try:
+            p = self._polynomial(node)
+        except ExpansionLimit:
+            return node
+        if p.is_monomial() and self._is_opaque(p):
+            # a product with opaque factors stays as it is
+            return node
+        return p.to_node(self.symbols)
+
+    def _symbol(self, node: MathNode):
+        k = self.interner.intern(node)
+        if k not in self.slots:
+            self.slots[k] = len(self.symbols)
+            self.symbols.append(node)
+            if not isinstance(node, VarNode):
+                self.opaque.add(self.slots[k])
+        return Polynomial.symbol(self.slots[k])
+
+    def _is_opaque(self, p: Polynomial):
+        return any(i in self.opaque for k in p.terms for i, e in enumerate(k) if e > 0)
+
+    def _polynomial(self, node: MathNode):
+        # the children of node are expanded already
+        if id(node) not in self.polynomials:
+            self.polynomials[id(node)] = node, self._convert(node)
+        return self.polynomials[id(node)][1]
+
+    def _convert(self, node: MathNode):
+        self.meter.step()
+        return self._convert_table[node.__class__](self, node)
+
+    def _convert_default(self, node):
+        return self._symbol(node)
+
+    def _convert_NumNode(self, node: NumNode):
+        return Polynomial.constant(node.value)
+
+    def _convert_TermNode(self, node: TermNode):
+        ans = Polynomial()
+        for x in node.factors:
+            ans = ans + self._polynomial(x)
+        if len(ans) > self.max_terms:
+            raise ExpansionLimit('more than {} terms'.format(self.max_terms))
+        return ans
+
+    def _convert_FactorNode(self, node: FactorNode):
+        factors = [self._polynomial(x) for x in node.numerator]
+        if len(node.denominator) > 0:
+            # the denominator stays a single opaque reciprocal
+            factors.append(self._symbol(FactorNode([], node.denominator)))
+        if any(not x.is_monomial() for x in factors) and any(self._is_opaque(x) for x in factors):
+            return self._symbol(node)
+        ans = Polynomial.constant(node.coef)
+        for x in factors:
+            ans = ans.mul(x, self.max_terms, self.meter)
+        return ans
+
+    def _convert_PolyNode(self, node: PolyNode):
+        if node.dim % 1 == 0 and node.dim >= 0:
+            return self._polynomial(node.body).pow(int(node.dim), self.max_terms, self.meter)
+        return self._symbol(node)
+
+if __name__ == '__main__':
+    pass
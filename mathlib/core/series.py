@@ -0,0 +1,210 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.core.calculator import Calculator
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.solver import Solver
+from mathlib.utils.node_util import *
+
+import copy
+import collections
+import numpy as np
+from numpy.polynomial import chebyshev
+
+
+# chains of derivatives by the structure of the tree, the least recently used chain leaves first.
+# the chain starts from a copy of the given tree, so a later change of that tree does not reach it
+class DerivativeCache:
+
+    def __init__(self, calculator: Calculator=None, max_entries=64):
+        self.calculator = calculator
+        if calculator is None:
+            self.calculator = Calculator()
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def derivatives(self, node: MathNode, exclusion: list, var: str, order: int):
+        # [(f, ex), (f', ex'), ...] up to the given order, each derivative is taken once
+        key = repr(node), repr(exclusion), var
+        chain = self.entries.get(key)
+        if chain is None:
+            chain = [(copy.deepcopy(node), copy.deepcopy(exclusion))]
+            self.entries[key] = chain
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        while len(chain) <= order:
+            d, ex = chain[-1]
+            chain.append(self.calculator.derivate(d, list(ex), var))
+        return chain[:order + 1]
+
+
+def taylor_coefficients(node: MathNode, exclusion: list, var: str, x0, order: int,
+                        cache: DerivativeCache=None, **kwargs):
+    if cache is None:
+        cache = DerivativeCache()
+    coefficients = []
+    for k, (d, ex) in enumerate(cache.derivatives(node, exclusion, var, order)):
+        value = cache.calculator.eval(d, ex, **dict(kwargs, **{var: x0}))
+        if not math.isfinite(value):
+            if k == 0:
+                raise ArithmeticError('{} is not defined at {}={}'.format(node, var, x0))
+            raise ArithmeticError('{} is not differentiable {} times at {}={}'.format(node, k, var, x0))
+        coefficients.append(value / math.factorial(k))
+    return coefficients
+
+
+def series(node: MathNode, var: str, x0, order: int, exclusion: list=None,
+           cache: DerivativeCache=None, **kwargs):
+    coefficients = taylor_coefficients(node, exclusion or [], var, x0, order, cache, **kwargs)
+
+    x = VarNode(var)
+    if x0 != 0:
+        x = TermNode([x, NumNode(-x0)])
+    factors = []
+    for k, c in enumerate(coefficients):
+        if c == 0:
+            continue
+        if k == 0:
+            factors.append(FactorNode([], [], Coef(c)))
+        else:
+            factors.append(FactorNode([x if k == 1 else PolyNode(x, k)], [], Coef(c)))
+    if len(factors) == 0:
+        return NumNode(0)
+    return TermNode(factors)
+
+
+class ChebyshevApproximation:
+
+    def __init__(self, node: MathNode, exclusion: list, var: str, lim: tuple,
+                 degree=16, tol=1e-10, max_pieces=64, **kwargs):
+        l, r = lim
+        if not (math.isfinite(l) and math.isfinite(r)) or l >= r:
+            raise ValueError('invalid range: ({}, {})'.format(l, r))
+        self.var = var
+        self.lim = lim
+        self.degree = degree
+        self.tol = tol
+        self.kwargs = kwargs
+
+        self.expr = ExpressionSet([node], [exclusion])
+        # excluded points stay nan, the mask alone is much cheaper than the node
+        self.mask = ExpressionSet([NumNode(0)], [exclusion]) if len(exclusion) > 0 else None
+
+        # pieces never reach over a hole of the domain
+        holes = [x for x in Solver().holes(exclusion, var, lim, **kwargs) if l < x < r]
+        pending = [(a, b) for a, b in zip([l] + holes, holes + [r])]
+        min_width = (r - l) / max_pieces / 64
+
+        pieces = []
+        while len(pending) > 0:
+            a, b = pending.pop()
+            coefs, error = self._fit(a, b)
+            if coefs is None or error <= tol or b - a <= min_width \
+                    or len(pieces) + len(pending) + 2 > max_pieces:
+                if error > tol:
+                    # does not converge here, falls back to the exact tree
+                    coefs, error = None, 0.0
+                pieces.append((a, b, coefs, error))
+            else:
+                m = (a + b) / 2
+                pending.extend([(m, b), (a, m)])
+
+        pieces.sort(key=lambda x: x[0])
+        self.edges = np.array([p[0] for p in pieces] + [r])
+        self.exact = np.array([p[2] is None for p in pieces])
+        # one row per chebyshev order, so each step of the recurrence gathers a row
+        self.coefs = np.array([np.zeros(degree + 1) if p[2] is None else p[2] for p in pieces]).T.copy()
+        self.errors = [p[3] for p in pieces]
+
+    @property
+    def error(self):
+        return max(self.errors)
+
+    def __len__(self):
+        return len(self.errors)
+
+    def _exact(self, x):
+        values = self.expr.eval(**dict(self.kwargs, **{self.var: x}))[0]
+        return np.broadcast_to(values, np.shape(x))
+
+    def _fit(self, a, b):
+        def f(t):
+            return self._exact((a + b) / 2 + (b - a) / 2 * t)
+
+        with np.errstate(all='ignore'):
+            coefs = chebyshev.chebinterpolate(f, self.degree)
+            t = np.linspace(-1, 1, 2 * self.degree + 1)
+            y = f(t)
+            if not np.any(np.isfinite(y)):
+                # not defined anywhere here, the exact tree gives nan without splitting
+                return None, 0.0
+            if not (np.all(np.isfinite(coefs)) and np.all(np.isfinite(y))):
+                return np.zeros(self.degree + 1), math.inf
+            # the tail of the series and the error between the nodes, whichever is worse
+            tail = np.sum(np.abs(coefs[-2:]))
+            error = max(tail, float(np.max(np.abs(chebyshev.chebval(t, coefs) - y))))
+        return coefs, error / max(1.0, float(np.max(np.abs(y))))
+
+    def eval(self, x):
+        x = np.asarray(x, dtype=float)
+        index = np.searchsorted(self.edges, x, side='right') - 1
+        n = len(self.errors)
+        index[x == self.edges[-1]] = n - 1
+        inside = (index >= 0) & (index < n)
+        index = np.clip(index, 0, n - 1)
+
+        # clenshaw recurrence with the coefficients of each point's piece
+        a, b = self.edges[index], self.edges[index + 1]
+        t = (2 * x - a - b) / (b - a)
+        c = self.coefs
+        t2 = 2 * t
+        b1, b2 = np.zeros(x.shape), np.zeros(x.shape)
+        for k in range(self.degree, 0, -1):
+            b1, b2 = c[k].take(index) + t2 * b1 - b2, b1
+        out = c[0].take(index) + t * b1 - b2
+
+        exact = self.exact[index] & inside
+        if exact.any():
+            out[exact] = self._exact(x[exact])
+        out[~inside] = math.nan
+
+        if self.mask is not None:
+            out = out + self.mask.eval(**dict(self.kwargs, **{self.var: x}))[0]
+        return out
+
+    def __call__(self, x):
+        return self.eval(x)
+
+
+class ApproximationCache:
+
+    def __init__(self, max_entries=32, degree=16, tol=1e-10, max_pieces=64):
+        self.max_entries = max_entries
+        self.degree = degree
+        self.tol = tol
+        self.max_pieces = max_pieces
+        self.entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, node: MathNode, exclusion: list, var: str, lim: tuple, **kwargs):
+        key = repr(node), repr(exclusion), var, tuple(lim), tuple(sorted(kwargs.items()))
+        approximation = self.entries.get(key)
+        if approximation is None:
+            approximation = ChebyshevApproximation(node, exclusion, var, lim, self.degree, self.tol,
+                                                   self.max_pieces, **kwargs)
+            self.entries[key] = approximation
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return approximation
+
+
+if __name__ == '__main__':
+    pass
@@ -1,4 +1,11 @@
 from mathlib.utils.node_util import *
+from mathlib.utils.visitor import *
+from mathlib.core.budget import *
+from mathlib.core.polynomial import *
+from mathlib.core.functions import functions
+from mathlib.core.analysis import Exclusions
+from mathlib.core.folding import ConstantFolder
+import copy
 
 
 def is_identity(equation) -> bool:
@@ -28,14 +35,30 @@ def is_identity(equation) -> bool:
     # return False
 
 
-class NodeSimplifier:
+class NodeSimplifier(NodeVisitor):
 
-    def __init__(self):
+    dispatch = ('_preprocess_', '_remove_zeros_', '_is_zero_', '_sort_')
+
+    def __init__(self, budget: Budget=None, max_expand_terms=1000):
         self.exclusion = []
+        self.budget = budget or unlimited
+        self.max_expand_terms = max_expand_terms
+        self.meter = BudgetMeter()
 
     def canonicalize(self, node: MathNode):
+        return self._context()._canonicalize(node)
+
+    def _context(self):
+        # the passes keep their state on a shallow copy made for each call,
+        # so one instance can be shared by threads or reentered from a pass
+        context = copy.copy(self)
+        context.exclusion = []
+        context.meter = self.budget.start()
+        return context
+
+    def _canonicalize(self, node: MathNode):
         _node = node
-        self.exclusion = []
+        self.meter.count_nodes(count_nodes(node))
         _node = self.unpack(_node)
         _node = self._preprocess(self.pack(_node))
         _node = self._expand(_node)
@@ -46,6 +69,9 @@ class NodeSimplifier:
         _node = self.unpack(_node)
         self._neaten_exclusion(_node)
         self._sort(_node)
+        _node, folded = ConstantFolder(self.meter).fold(_node)
+        if folded > 0:
+            self._sort(_node)
         node = _node
         return node, self.exclusion
 
@@ -57,6 +83,7 @@ class NodeSimplifier:
         return node
 
     def unpack(self, node):
+        self.meter.step()
         if isinstance(node, TermNode):
             factors = []
             for x in node.factors:
@@ -76,7 +103,7 @@ class NodeSimplifier:
             if len(nu) == 1 and deno == [] and node.coef == (1, 1):
                 return nu[0]
             if nu == [] and deno == [] and node.coef != (1, 1):
-                return NumNode(node.coef[0] / node.coef[1])
+                return constant_node(node.coef)
 
             nu_factors, deno_factors = [], []
             for x in nu:
@@ -100,7 +127,7 @@ class NodeSimplifier:
                 n *= x.factors[0].inverse() if isinstance(x, TermNode) else x.inverse()
 
             if n.numerator == [] and n.denominator == []:
-                return NumNode(n.coef[0] / n.coef[1])
+                return constant_node(n.coef)
             return n
 
         if isinstance(node, PolyNode):
@@ -116,81 +143,91 @@ class NodeSimplifier:
         return node
 
     def _preprocess(self, node: MathNode):
-        if isinstance(node, TermNode):
-            node.factors = [self._preprocess(x if isinstance(x, FactorNode)
-                                             else FactorNode([x])) for x in node.factors]
-            if len(node.factors) == 1:
-                k = node.factors[0]
-                if k.denominator == []:
-                    if k.numerator == [] and k.coef != (1, 1):
-                        return NumNode(k.coef[0] / k.coef[1])
-                    if len(k.numerator) == 1 and k.coef == (1, 1):
-                        return k.numerator[0]
-            return node
+        self.meter.step()
+        return self._preprocess_table[node.__class__](self, node)
 
-        if isinstance(node, FactorNode):
-            node = self._relocate_fraction(node)
-            node = self._abbreviate(node)
-            return node
+    def _preprocess_default(self, node):
+        return node
 
-        if node.__class__ in [PolyNode, ExpoNode]:
-            base, dim = None, None
-            if isinstance(node, PolyNode):
-                base = self._preprocess(node.body)
-                dim = self._preprocess(node.dim)
-                if dim % 1 != 0:
-                    self.exclusion.append([[base, '<', 0]])
-            if isinstance(node, ExpoNode):
-                base = self._preprocess(node.base)
-                dim = self._preprocess(node.body)
-                if isinstance(dim, LogNode):
-                    dim_base = self._preprocess(dim.base)
-                    dim_body = self._preprocess(dim.body)
-                    self.exclusion.append([[dim_base, '<=', 0]])
-                    self.exclusion.append([[dim_base, '==', 1]])
-                    self.exclusion.append([[dim_body, '<=', 0]])
-                    if base.similar_add(dim_base):
-                        self.exclusion.append([[base, '<', 0], [dim, 'not', int]])
-                        return dim_body
-
-            if isinstance(dim, NumNode):
-                if isinstance(base, NumNode):
-                    return NumNode(base.value ** dim.value)
-                return PolyNode(base, dim.value)
-            else:
-                if isinstance(base, PolyNode):
-                    return PolyNode(base.body, base.dim * dim)
-            return node
+    def _preprocess_TermNode(self, node: TermNode):
+        node.factors = [self._preprocess(x if isinstance(x, FactorNode)
+                                         else FactorNode([x])) for x in node.factors]
+        if len(node.factors) == 1:
+            k = node.factors[0]
+            if k.denominator == []:
+                if k.numerator == [] and k.coef != (1, 1):
+                    return constant_node(k.coef)
+                if len(k.numerator) == 1 and k.coef == (1, 1):
+                    return k.numerator[0]
+        return node
 
-        if isinstance(node, LogNode):
-            base = self._preprocess(node.base)
-            body = self._preprocess(node.body)
-            self.exclusion.append([[base, '<=', 0]])
-            self.exclusion.append([[base, '==', 1]])
-            self.exclusion.append([[body, '<=', 0]])
-            if body == base:
-                return NumNode(1)
-            if isinstance(body, ExpoNode):
-                if base.similar_add(body.base):
-                    return body.body
-                coef = body.body
-                body = body.base
-                return FactorNode([coef, LogNode(base, body)], [])
-            if isinstance(body, PolyNode):
-                if base.similar_add(body.body):
-                    return NumNode(body.dim)
-                coef = body.dim
-                body = body.body
-                return FactorNode([LogNode(base, body)], [], (coef, 1))
-            return node
+    def _preprocess_FactorNode(self, node: FactorNode):
+        node = self._relocate_fraction(node)
+        node = self._abbreviate(node)
+        return node
 
-        if isinstance(node, TriNode):
-            body = self._preprocess(node.body)
-            if node.func == 'tan':
-                self.exclusion.append([[body, '%', math.pi, '==', 0.5 * math.pi]])
-            return TriNode(node.func, body)
+    def _preprocess_PolyNode(self, node: PolyNode):
+        base = self._preprocess(node.body)
+        dim = self._preprocess(node.dim)
+        if dim % 1 != 0:
+            self.exclusion.append([[base, '<', 0]])
+        return self._power(node, base, dim)
+
+    def _preprocess_ExpoNode(self, node: ExpoNode):
+        base = self._preprocess(node.base)
+        dim = self._preprocess(node.body)
+        if isinstance(dim, LogNode):
+            dim_base = self._preprocess(dim.base)
+            dim_body = self._preprocess(dim.body)
+            self.exclusion.append([[dim_base, '<=', 0]])
+            self.exclusion.append([[dim_base, '==', 1]])
+            self.exclusion.append([[dim_body, '<=', 0]])
+            if base.similar_add(dim_base):
+                self.exclusion.append([[base, '<', 0], [dim, 'not', int]])
+                return dim_body
+        return self._power(node, base, dim)
+
+    def _power(self, node: MathNode, base: MathNode, dim):
+        if isinstance(dim, FactorNode) and dim.numerator == dim.denominator == [] and dim.coef[1] != 0:
+            # an exact fraction as exponent is a power like any other number
+            dim = NumNode(dim.coef.value)
+        if isinstance(dim, NumNode):
+            if isinstance(base, NumNode):
+                self.meter.check_power(base.value, dim.value)
+                return NumNode(base.value ** dim.value)
+            return PolyNode(base, dim.value)
+        else:
+            if isinstance(base, PolyNode):
+                return PolyNode(base.body, base.dim * dim)
+        return node
+
+    def _preprocess_LogNode(self, node: LogNode):
+        base = self._preprocess(node.base)
+        body = self._preprocess(node.body)
+        self.exclusion.append([[base, '<=', 0]])
+        self.exclusion.append([[base, '==', 1]])
+        self.exclusion.append([[body, '<=', 0]])
+        if body == base:
+            return NumNode(1)
+        if isinstance(body, ExpoNode):
+            if base.similar_add(body.base):
+                return body.body
+            coef = body.body
+            body = body.base
+            return FactorNode([coef, LogNode(base, body)], [])
+        if isinstance(body, PolyNode):
+            if base.similar_add(body.body):
+                return NumNode(body.dim)
+            coef = body.dim
+            body = body.body
+            return FactorNode([LogNode(base, body)], [], (coef, 1))
         return node
 
+    def _preprocess_TriNode(self, node: TriNode):
+        body = self._preprocess(node.body)
+        self.exclusion.extend(functions[node.func].exclusion(body))
+        return TriNode(node.func, body)
+
     def _relocate_fraction(self, node: FactorNode):
         node.update_coef()
         nu = [self._preprocess(x) for x in node.numerator]
@@ -205,7 +242,7 @@ class NodeSimplifier:
                     return t.value < 0
                 if isinstance(t, TermNode):
                     return len(t.factors) == 1 \
-                           and t.factors[0].coef[0] / t.factors[0].coef[1] < 0
+                           and t.factors[0].coef.sign() < 0
             return False
 
         def fractional(_node):
@@ -238,13 +275,10 @@ class NodeSimplifier:
         nu.extend(new_nu)
         deno.extend(new_deno)
 
-        a, b = node.coef
         for x in deno_factor:
-            a *= x.coef[0]
-            b *= x.coef[1]
+            node.coef = node.coef * x.coef
             nu.extend(x.denominator)
             deno.extend(x.numerator)
-        node.coef = a, b
 
         return FactorNode(nu, deno, node.coef)
 
@@ -291,7 +325,10 @@ class NodeSimplifier:
         return FactorNode(nu, deno, node.coef)
 
     def _expand(self, node):
-        return node
+        try:
+            return PolynomialExpander(self.max_expand_terms, self.meter).expand(node)
+        except ExpansionLimit:
+            return node
 
     def _merge_similar(self, node: MathNode):
         self._sort(node)
@@ -323,6 +360,7 @@ class NodeSimplifier:
         sim_list = []
         for x in node_list:
             for s in sim_list:
+                self.meter.step()
                 if s.similar_add(x):
                     s += x
                     break
@@ -336,6 +374,7 @@ class NodeSimplifier:
         for x in node_list:
             q = []
             for s in sim_list:
+                self.meter.step()
                 if s.similar_mul(x):
                     q.append(s * x)
                     break
@@ -347,56 +386,75 @@ class NodeSimplifier:
         return sim_list
 
     def _remove_zeros(self, node: MathNode):
-        if isinstance(node, TermNode):
-            node.factors = [self._remove_zeros(x) for x in node.factors if not self._is_zero(x)]
-        if isinstance(node, FactorNode):
-            node.numerator = [self._remove_zeros(x) for x in node.numerator if not self._is_zero(x)]
-            node.denominator = [self._remove_zeros(x) for x in node.denominator if not self._is_zero(x)]
-        if node.__class__ in [PolyNode, TriNode]:
-            if self._is_zero(node.body):
-                node.body = self._remove_zeros(node.body)
-        if node.__class__ in [ExpoNode, LogNode]:
-            if self._is_zero(node.base):
-                node.base = self._remove_zeros(node.base)
-            if self._is_zero(node.body):
-                node.body = self._remove_zeros(node.body)
+        return self._remove_zeros_table[node.__class__](self, node)
+
+    def _remove_zeros_default(self, node):
+        return node
+
+    def _remove_zeros_TermNode(self, node: TermNode):
+        node.factors = [self._remove_zeros(x) for x in node.factors if not self._is_zero(x)]
+        return node
+
+    def _remove_zeros_FactorNode(self, node: FactorNode):
+        node.numerator = [self._remove_zeros(x) for x in node.numerator if not self._is_zero(x)]
+        node.denominator = [self._remove_zeros(x) for x in node.denominator if not self._is_zero(x)]
+        return node
+
+    def _remove_zeros_PolyNode(self, node: MathNode):
+        if self._is_zero(node.body):
+            node.body = self._remove_zeros(node.body)
+        return node
+
+    _remove_zeros_TriNode = _remove_zeros_PolyNode
+
+    def _remove_zeros_ExpoNode(self, node: MathNode):
+        if self._is_zero(node.base):
+            node.base = self._remove_zeros(node.base)
+        if self._is_zero(node.body):
+            node.body = self._remove_zeros(node.body)
         return node
 
+    _remove_zeros_LogNode = _remove_zeros_ExpoNode
+
     def _is_zero(self, node: MathNode):
-        if isinstance(node, TermNode):
-            return len(node.factors) == 0
-        if isinstance(node, FactorNode):
-            if node.coef[0] == 0:
+        return self._is_zero_table[node.__class__](self, node)
+
+    def _is_zero_default(self, node):
+        return False
+        # LogNode: self._is_one(node.body)
+        # TriNode: node.func in ['sin', 'tan'] and self._is_zero(node.body)
+        #     or node.func == 'cos' and self._is_one(node.body)
+
+    def _is_zero_TermNode(self, node: TermNode):
+        return len(node.factors) == 0
+
+    def _is_zero_FactorNode(self, node: FactorNode):
+        if node.coef[0] == 0:
+            return True
+        for x in node.numerator:
+            if self._is_zero(x):
                 return True
-            for x in node.numerator:
-                if self._is_zero(x):
-                    return True
-            return False
-        if isinstance(node, NumNode):
-            return node.value == 0
-        if isinstance(node, PolyNode):
-            return self._is_zero(node.body)
-        if isinstance(node, ExpoNode):
-            return self._is_zero(node.base)
         return False
-        # if isinstance(node, LogNode):
-        #     return self._is_one(node.body)
-        # if isinstance(node, TriNode):
-        #     return node.func in ['sin', 'tan'] and self._is_zero(node.body) \
-        #         or node.func == 'cos' and self._is_one(node.body)
+
+    def _is_zero_NumNode(self, node: NumNode):
+        return node.value == 0
+
+    def _is_zero_PolyNode(self, node: PolyNode):
+        return self._is_zero(node.body)
+
+    def _is_zero_ExpoNode(self, node: ExpoNode):
+        return self._is_zero(node.base)
 
     def _neaten_exclusion(self, node: MathNode):
-        self._exclude(node)
+        self.exclusion.extend(Exclusions().run(node))
 
         exclusion = []
         for e in self.exclusion:
-            if e in exclusion:
-                continue
             equations = []
             for _e in e:
                 if not is_identity(_e):
-                    equations.append(_e)
-            if len(equations) == len(e):
+                    equations.append(self._expand_equation(_e))
+            if len(equations) == len(e) and equations not in exclusion:
                 exclusion.append(equations)
 
         for e in exclusion:
@@ -406,43 +464,39 @@ class NodeSimplifier:
 
         self.exclusion = exclusion
 
-    def _exclude(self, node: MathNode):
-        if isinstance(node, TermNode):
-            for x in node.factors:
-                self._exclude(x)
-        if isinstance(node, FactorNode):
-            for x in node.numerator + node.denominator:
-                self._exclude(x)
-        if isinstance(node, PolyNode):
-            if node.dim % 1 != 0:
-                self.exclusion.append([[node.body, '<', 0]])
-        if isinstance(node, ExpoNode):
-            self.exclusion.append([[node.base, '<', 0], [node.body, 'not', int]])
-        if isinstance(node, LogNode):
-            self.exclusion.append([[node.base, '<=', 0]])
-            self.exclusion.append([[node.base, '==', 1]])
-            self.exclusion.append([[node.body, '<=', 0]])
-        if isinstance(node, TriNode):
-            if node.func == 'tan':
-                self.exclusion.append([[node.body, '%', math.pi, '==', 0.5*math.pi]])
+    def _expand_equation(self, equation: list):
+        # equations from preprocessing hold unexpanded copies of the subtrees
+        if not isinstance(equation[0], MathNode):
+            return equation
+        return [self.unpack(self._expand(equation[0]))] + equation[1:]
 
     def _sort(self, node: MathNode):
-        if isinstance(node, TermNode):
-            for x in node.factors:
-                self._sort(x)
-            node.factors.sort()
-        if isinstance(node, FactorNode):
-            for x in node.numerator + node.denominator:
-                self._sort(x)
-            node.numerator.sort()
-            node.denominator.sort()
-        if isinstance(node, PolyNode):
-            self._sort(node.body)
-        if isinstance(node, ExpoNode) or isinstance(node, LogNode):
-            self._sort(node.base)
-            self._sort(node.body)
-        if isinstance(node, TriNode):
-            self._sort(node.body)
+        self._sort_table[node.__class__](self, node)
+
+    def _sort_default(self, node):
+        pass
+
+    def _sort_TermNode(self, node: TermNode):
+        for x in node.factors:
+            self._sort(x)
+        node.factors.sort()
+
+    def _sort_FactorNode(self, node: FactorNode):
+        for x in node.numerator + node.denominator:
+            self._sort(x)
+        node.numerator.sort()
+        node.denominator.sort()
+
+    def _sort_PolyNode(self, node: MathNode):
+        self._sort(node.body)
+
+    _sort_TriNode = _sort_PolyNode
+
+    def _sort_ExpoNode(self, node: MathNode):
+        self._sort(node.base)
+        self._sort(node.body)
+
+    _sort_LogNode = _sort_ExpoNode
 
 
 if __name__ == '__main__':
@@ -0,0 +1,201 @@
+from mathlib.core.node import *
+from mathlib.utils.node_util import *
+from mathlib.core.calculator import Calculator
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.interval import *
+
+import numpy as np
+
+
+class Solver:
+
+    def __init__(self, calculator: Calculator=None, samples=1000, tol=1e-10, max_iter=100, chunks=32):
+        self.calculator = calculator
+        if calculator is None:
+            self.calculator = Calculator()
+        self.samples = samples
+        self.chunks = chunks
+        self.tol = tol
+        self.max_iter = max_iter
+
+    def roots(self, node: MathNode, exclusion: list, var: str, lim: tuple, tol=None, **kwargs):
+        dnode, dex = self.calculator.derivate(node, list(exclusion), var)
+        roots = self._solve(ExpressionSet([node, dnode], [exclusion, dex]), var, lim, tol, kwargs,
+                            IntervalEvaluator([node]))
+        return self._remove_holes(roots, exclusion, var, lim, tol, kwargs)
+
+    def critical_points(self, node: MathNode, exclusion: list, var: str, lim: tuple, tol=None, **kwargs):
+        dnode, dex = self.calculator.derivate(node, list(exclusion), var)
+        ddnode, ddex = self.calculator.derivate(dnode, list(dex), var)
+        points = self._solve(ExpressionSet([dnode, ddnode], [dex, ddex]), var, lim, tol, kwargs,
+                             IntervalEvaluator([dnode]))
+        return self._remove_holes(points, dex, var, lim, tol, kwargs)
+
+    def extrema(self, node: MathNode, exclusion: list, var: str, lim: tuple, tol=None, **kwargs):
+        points = self.critical_points(node, exclusion, var, lim, tol, **kwargs)
+        if len(points) == 0:
+            return []
+
+        # compare with both neighbours instead of the sign of f'',
+        # which is zero for flat extrema like x^4
+        h = max(self.tol if tol is None else tol, 1e-6 * (lim[1] - lim[0])) * 10
+        xs = np.array(points)
+        expr = ExpressionSet([node], [exclusion])
+        y, left, right = [expr.eval(**dict(kwargs, **{var: x}))[0] for x in [xs, xs - h, xs + h]]
+
+        extrema = []
+        for x, v, a, b in zip(points, y.tolist(), left.tolist(), right.tolist()):
+            if not math.isfinite(v):
+                continue
+            if v <= a and v <= b:
+                kind = 'min'
+            elif v >= a and v >= b:
+                kind = 'max'
+            else:
+                kind = 'saddle'
+            extrema.append((x, v, kind))
+        return extrema
+
+    def holes(self, exclusion: list, var: str, lim: tuple, tol=None, **kwargs):
+        # points removed from the domain by `==` exclusions, like the poles of 1/(x-2) or tan(x)
+        points = []
+        for ex in exclusion:
+            if len(ex) != 1 or ex[0][-2] != '==':
+                continue
+            e = ex[0]
+            if not isinstance(e[0], MathNode) or var not in get_unique_vars(e[0]):
+                continue
+            if len(e) == 3:
+                a, cmp, b = e
+                g = TermNode([a, NumNode(-b)])
+            elif e[1] == '%':
+                a, op, m, cmp, b = e
+                m = m.value if isinstance(m, NumNode) else m
+                # a % m == b holds wherever (a - b) / m is an integer
+                g = TriNode('sin', FactorNode([TermNode([a, NumNode(-b)])], [], (math.pi / m, 1)))
+            else:
+                continue
+            points.extend(self._solve(ExpressionSet([g]), var, lim, tol, kwargs, IntervalEvaluator([g])))
+        return self._unique(sorted(points), self.tol if tol is None else tol)
+
+    def _remove_holes(self, points: list, exclusion: list, var: str, lim: tuple, tol, kwargs):
+        if len(points) == 0:
+            return points
+        tol = self.tol if tol is None else tol
+        holes = self.holes(exclusion, var, lim, tol, **kwargs)
+        return [x for x in points
+                if all(abs(x - h) > max(tol, 1e-9) * (1 + abs(x)) * 10 for h in holes)]
+
+    def _solve(self, expr: ExpressionSet, var: str, lim: tuple, tol, kwargs, bound: IntervalEvaluator=None):
+        l, r = lim
+        if l >= r:
+            raise ValueError('invalid range: ({}, {})'.format(l, r))
+        tol = self.tol if tol is None else tol
+
+        def _eval(x):
+            values = expr.eval(**dict(kwargs, **{var: x}))
+            return [np.broadcast_to(v, np.shape(x)) for v in values]
+
+        xs = np.linspace(l, r, self.samples + 1)
+        fs = np.full(len(xs), math.nan)
+        keep = self._candidates(bound, xs, var, kwargs)
+        if keep.any():
+            fs[keep] = _eval(xs[keep])[0]
+        finite = np.isfinite(fs)
+
+        roots = xs[fs == 0].tolist()
+
+        # sign changes between two defined neighbours
+        i = np.nonzero(finite[:-1] & finite[1:] & (fs[:-1] * fs[1:] < 0))[0]
+        if len(i) > 0:
+            x, f = self._bracketed(_eval, xs[i], xs[i + 1], fs[i], len(expr.outputs) > 1, tol)
+            limit = np.minimum(np.abs(fs[i]), np.abs(fs[i + 1]))
+            # a sign change across a pole converges to the pole, where |f| grows
+            roots.extend(x[np.isfinite(f) & (np.abs(f) <= limit)].tolist())
+
+        # roots of even multiplicity touch zero without a sign change
+        if len(expr.outputs) > 1 and len(xs) > 2:
+            a = np.abs(fs)
+            j = np.nonzero(finite[1:-1] & finite[:-2] & finite[2:] & (a[1:-1] < a[:-2])
+                           & (a[1:-1] <= a[2:]) & (fs[:-2] * fs[2:] > 0) & (fs[1:-1] != 0))[0] + 1
+            if len(j) > 0:
+                scale = max(1.0, float(np.max(a[finite])))
+                x, f = self._newton(_eval, xs[j], xs[j - 1], xs[j + 1], tol)
+                roots.extend(x[np.isfinite(f) & (np.abs(f) <= 1e-8 * scale)].tolist())
+
+        return self._unique(sorted(roots), tol)
+
+    def _candidates(self, bound: IntervalEvaluator, xs, var: str, kwargs):
+        # chunks of the grid whose interval bound excludes zero have no roots and are not sampled
+        n = len(xs) - 1
+        if bound is None or self.chunks is None:
+            return np.ones(n + 1, dtype=bool)
+        m = max(1, n // self.chunks)
+        starts = np.arange(0, n, m)
+        ends = np.minimum(starts + m, n)
+        value = bound.eval(**dict(kwargs, **{var: Interval(xs[starts], xs[ends])}))[0]
+        possible = np.broadcast_to(value.contains(0), starts.shape)
+
+        keep = np.zeros(n + 1, dtype=bool)
+        # one more point on each side for the neighbours of touching roots
+        for a, b in zip(starts[possible], ends[possible]):
+            keep[max(a - 1, 0): b + 2] = True
+        return keep
+
+    def _bracketed(self, _eval, a, b, fa, newton, tol):
+        # newton steps safeguarded by the bracket, bisection whenever newton leaves it
+        a, b = a.copy(), b.copy()
+        sa = np.sign(fa)
+        x = (a + b) / 2
+        done = np.zeros(len(x), dtype=bool)
+        for _ in range(self.max_iter):
+            values = _eval(x)
+            f = values[0]
+            done |= f == 0
+
+            left = np.sign(f) == sa
+            a = np.where(left & ~done, x, a)
+            b = np.where(~left & ~done, x, b)
+
+            x_new = (a + b) / 2
+            if newton:
+                with np.errstate(all='ignore'):
+                    step = x - f / values[1]
+                inside = np.isfinite(step) & (step > a) & (step < b)
+                x_new = np.where(inside, step, x_new)
+
+            converged = (np.abs(x_new - x) <= tol * (1 + np.abs(x))) | (b - a <= tol)
+            x = np.where(done, x, x_new)
+            done |= converged
+            if done.all():
+                break
+        return x, _eval(x)[0]
+
+    def _newton(self, _eval, x, lo, hi, tol):
+        done = np.zeros(len(x), dtype=bool)
+        for _ in range(self.max_iter):
+            f, df = _eval(x)[:2]
+            with np.errstate(all='ignore'):
+                x_new = x - f / df
+            # leaving the window around the starting point means no root was there
+            lost = ~np.isfinite(x_new) | (x_new < lo) | (x_new > hi)
+            x_new = np.where(lost, x, x_new)
+            converged = lost | (np.abs(x_new - x) <= tol * (1 + np.abs(x))) | (f == 0)
+            x = np.where(done, x, x_new)
+            done |= converged
+            if done.all():
+                break
+        return x, _eval(x)[0]
+
+    @staticmethod
+    def _unique(points: list, tol):
+        unique = []
+        for x in points:
+            if len(unique) > 0 and abs(x - unique[-1]) <= max(tol, 1e-9) * (1 + abs(x)) * 10:
+                continue
+            unique.append(x)
+        return unique
+
+
+if __name__ == '__main__':
+    pass
@@ -1,5 +1,11 @@
 from .lexer import *
 from .parser import *
+from .render import *
 from .latex import *
+from .text import *
+from .binary import *
+from .cache import *
+from .corpus import *
 
-__all__ = ['Lexer', 'TokenStream', 'Parser', 'LaTeXGenerator']
+__all__ = ['Lexer', 'TokenStream', 'Parser', 'NodeRenderer', 'LaTeXGenerator', 'TextGenerator', 'FormCache',
+           'CorpusLexer', 'TokenCorpus', 'dumps', 'loads']
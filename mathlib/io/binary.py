@@ -0,0 +1,329 @@
+from mathlib.core.node import *
+from mathlib.core.coef import Coef
+from mathlib.utils.node_codes import *
+from mathlib.utils.node_util import IdTable
+
+import struct
+
+# layout: magic, format version, string pool, constant pool, node table, value.
+# the node table is one opcode byte per node followed by all their operands as varints,
+# children and operands refer to earlier entries, so decoding is a single forward pass
+MAGIC = b'MNB'
+FORMAT_VERSION = 1
+
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_NODE, TAG_CONST, TAG_STR, \
+    TAG_LIST, TAG_TUPLE, TAG_SET, TAG_DICT, TAG_INT_TYPE, TAG_FLOAT_TYPE = range(12)
+
+CONST_INT, CONST_FLOAT = range(2)
+
+
+def _write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_varints(out: bytearray, values: list):
+    if max(values, default=0) < 0x80:
+        # single bytes all the way, the common case below 128 nodes and constants
+        out += bytes(values)
+        return
+    for n in values:
+        _write_varint(out, n)
+
+
+def _read_varints(data, i: int, end: int):
+    section = data[i:end]
+    if max(section, default=0) < 0x80:
+        return list(section)
+    values = []
+    n, shift = 0, 0
+    for b in section:
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            values.append(n)
+            n, shift = 0, 0
+        else:
+            shift += 7
+    return values
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.strings = {}
+        self.constants = {}
+        self.keys = IdTable()
+        self.opcodes = bytearray()
+        self.operands = []
+
+    def string(self, s: str):
+        return self.strings.setdefault(s, len(self.strings))
+
+    def constant(self, c):
+        return self.constants.setdefault(constant_key(c), len(self.constants))
+
+    def node(self, node):
+        # shared objects stay shared and distinct objects stay distinct, like pickle,
+        # since nodes are mutated in place after decoding
+        idx = self.keys.get(node)
+        if idx is not None:
+            return idx
+
+        cls = node.__class__
+        if cls is FactorNode:
+            nu = [self.node(x) for x in node.numerator]
+            deno = [self.node(x) for x in node.denominator]
+            operands = [self.constant(node.coef[0]), self.constant(node.coef[1]), len(nu)] + nu + [len(deno)] + deno
+            op = OP_FACTOR
+        elif cls is VarNode:
+            operands = [self.string(node.name)]
+            op = OP_VAR
+        elif cls is PolyNode:
+            operands = [self.constant(node.dim), self.node(node.body)]
+            op = OP_POLY
+        elif cls is TermNode:
+            factors = [self.node(x) for x in node.factors]
+            operands = [len(factors)] + factors
+            op = OP_TERM
+        elif cls is NumNode:
+            operands = [self.constant(node.value)]
+            op = OP_NUM
+        elif cls is TriNode:
+            operands = [self.string(node.func), self.node(node.body)]
+            op = OP_TRI
+        elif cls is ExpoNode or cls is LogNode:
+            operands = [self.node(node.base), self.node(node.body)]
+            op = OP_EXPO if cls is ExpoNode else OP_LOG
+        elif cls is int or cls is float:
+            operands = [self.constant(node)]
+            op = OP_RAW
+        else:
+            raise TypeError('cannot serialize {}'.format(cls.__name__))
+
+        # one opcode per node, so the index of a node is the number of opcodes before it
+        self.operands.extend(operands)
+        self.opcodes.append(op)
+        return self.keys.put(node, len(self.opcodes) - 1)
+
+    def value(self, out: bytearray, value):
+        if value is None:
+            out.append(TAG_NONE)
+        elif value is True or value is False:
+            out.append(TAG_TRUE if value else TAG_FALSE)
+        elif value is int:
+            out.append(TAG_INT_TYPE)
+        elif value is float:
+            out.append(TAG_FLOAT_TYPE)
+        elif isinstance(value, MathNode):
+            out.append(TAG_NODE)
+            _write_varint(out, self.node(value))
+        elif isinstance(value, (int, float)):
+            out.append(TAG_CONST)
+            _write_varint(out, self.constant(value))
+        elif isinstance(value, str):
+            out.append(TAG_STR)
+            _write_varint(out, self.string(value))
+        elif isinstance(value, dict):
+            out.append(TAG_DICT)
+            _write_varint(out, len(value))
+            for k, v in value.items():
+                self.value(out, k)
+                self.value(out, v)
+        elif value.__class__ in [list, tuple, set, frozenset]:
+            tag = {list: TAG_LIST, tuple: TAG_TUPLE}.get(value.__class__, TAG_SET)
+            out.append(tag)
+            _write_varint(out, len(value))
+            for x in value:
+                self.value(out, x)
+        else:
+            raise TypeError('cannot serialize {}'.format(value.__class__.__name__))
+
+    def dumps(self, value):
+        body = bytearray()
+        self.value(body, value)
+
+        out = bytearray(MAGIC)
+        out.append(FORMAT_VERSION)
+        _write_varint(out, len(self.strings))
+        for s in self.strings:
+            b = s.encode('utf-8')
+            _write_varint(out, len(b))
+            out += b
+        _write_varint(out, len(self.constants))
+        for cls, c in self.constants:
+            if cls is int:
+                out.append(CONST_INT)
+                # zigzag, small negative numbers stay short
+                _write_varint(out, c * 2 if c >= 0 else -c * 2 - 1)
+            else:
+                out.append(CONST_FLOAT)
+                out += c
+
+        operands = bytearray()
+        _write_varints(operands, self.operands)
+        _write_varint(out, len(self.opcodes))
+        _write_varint(out, len(operands))
+        out += self.opcodes
+        out += operands
+        out += body
+        return bytes(out)
+
+
+class _Decoder:
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.i = 0
+
+    def byte(self):
+        b = self.data[self.i]
+        self.i += 1
+        return b
+
+    def varint(self):
+        data, i = self.data, self.i
+        n, shift = 0, 0
+        while True:
+            b = data[i]
+            i += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        self.i = i
+        return n
+
+    def loads(self):
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not a serialized MathNode stream')
+        self.i = len(MAGIC)
+        version = self.byte()
+        if version != FORMAT_VERSION:
+            raise ValueError('unsupported format version: {}'.format(version))
+
+        strings = []
+        for _ in range(self.varint()):
+            n = self.varint()
+            strings.append(self.data[self.i:self.i + n].decode('utf-8'))
+            self.i += n
+        constants = []
+        for _ in range(self.varint()):
+            kind = self.byte()
+            if kind == CONST_INT:
+                z = self.varint()
+                constants.append(z >> 1 if z & 1 == 0 else -(z >> 1) - 1)
+            elif kind == CONST_FLOAT:
+                constants.append(double.unpack_from(self.data, self.i)[0])
+                self.i += 8
+            else:
+                raise ValueError('invalid constant kind: {}'.format(kind))
+
+        count, size = self.varint(), self.varint()
+        opcodes = self.data[self.i:self.i + count]
+        operands = _read_varints(self.data, self.i + count, self.i + count + size)
+        if len(opcodes) != count:
+            raise ValueError('truncated node table')
+        self.i += count + size
+        nodes = self.nodes(opcodes, operands, strings, constants)
+
+        value = self.value(strings, constants, nodes)
+        if self.i != len(self.data):
+            raise ValueError('{} trailing bytes'.format(len(self.data) - self.i))
+        return value
+
+    @staticmethod
+    def nodes(opcodes, operands, strings, constants):
+        # nodes are rebuilt as they were, without sorting or folding in the constructors
+        nodes = []
+        append = nodes.append
+        j = 0
+        for op in opcodes:
+            if op == OP_FACTOR:
+                node = FactorNode.__new__(FactorNode)
+                nu, deno, n = constants[operands[j]], constants[operands[j + 1]], operands[j + 2]
+                j += 3
+                node.numerator = [nodes[x] for x in operands[j:j + n]]
+                j += n
+                n = operands[j]
+                node.denominator = [nodes[x] for x in operands[j + 1:j + 1 + n]]
+                j += n + 1
+                node.coef = tuple.__new__(Coef, (nu, deno))
+            elif op == OP_VAR:
+                node = VarNode.__new__(VarNode)
+                node.name = strings[operands[j]]
+                j += 1
+            elif op == OP_POLY:
+                node = PolyNode.__new__(PolyNode)
+                node.dim = constants[operands[j]]
+                node.body = nodes[operands[j + 1]]
+                j += 2
+            elif op == OP_TERM:
+                node = TermNode.__new__(TermNode)
+                n = operands[j]
+                node.factors = [nodes[x] for x in operands[j + 1:j + 1 + n]]
+                j += n + 1
+            elif op == OP_NUM:
+                node = NumNode.__new__(NumNode)
+                node.value = constants[operands[j]]
+                j += 1
+            elif op == OP_TRI:
+                node = TriNode.__new__(TriNode)
+                node.func = strings[operands[j]]
+                node.body = nodes[operands[j + 1]]
+                j += 2
+            elif op == OP_EXPO or op == OP_LOG:
+                node = ExpoNode.__new__(ExpoNode) if op == OP_EXPO else LogNode.__new__(LogNode)
+                node.base = nodes[operands[j]]
+                node.body = nodes[operands[j + 1]]
+                j += 2
+            elif op == OP_RAW:
+                node = constants[operands[j]]
+                j += 1
+            else:
+                raise ValueError('invalid opcode: {}'.format(op))
+            append(node)
+        if j != len(operands):
+            raise ValueError('node table does not match its operands')
+        return nodes
+
+    def value(self, strings, constants, nodes):
+        tag = self.byte()
+        if tag == TAG_NODE:
+            return nodes[self.varint()]
+        if tag == TAG_CONST:
+            return constants[self.varint()]
+        if tag == TAG_STR:
+            return strings[self.varint()]
+        if tag in [TAG_LIST, TAG_TUPLE, TAG_SET]:
+            items = [self.value(strings, constants, nodes) for _ in range(self.varint())]
+            return {TAG_LIST: list, TAG_TUPLE: tuple, TAG_SET: set}[tag](items)
+        if tag == TAG_DICT:
+            ans = {}
+            for _ in range(self.varint()):
+                k = self.value(strings, constants, nodes)
+                ans[k] = self.value(strings, constants, nodes)
+            return ans
+        fixed = {TAG_NONE: None, TAG_FALSE: False, TAG_TRUE: True, TAG_INT_TYPE: int, TAG_FLOAT_TYPE: float}
+        if tag in fixed:
+            return fixed[tag]
+        raise ValueError('invalid tag: {}'.format(tag))
+
+
+def dumps(value) -> bytes:
+    # MathNode trees, optionally inside lists, tuples, sets and dicts with
+    # strings, numbers, None and the `int`/`float` domains of exclusions
+    return _Encoder().dumps(value)
+
+
+def loads(data: bytes):
+    try:
+        return _Decoder(data).loads()
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError):
+        # TypeError from a corrupted key of a set or dict which is not hashable
+        raise ValueError('truncated or corrupted MathNode stream')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,145 @@
+from mathlib.version import __version__, __form_revision__
+from mathlib.io.binary import dumps, loads
+
+import os
+import time
+import sqlite3
+import threading
+
+
+# canonical forms and derivatives on disk in the binary node format, shared by every process opening the same file.
+# entries of another library version or form revision are never read and leave by eviction.
+# triggers keep the number and size of the entries in `stats`, so writes do not scan the table
+class FormCache:
+
+    def __init__(self, path: str, max_entries=100000, max_bytes=256 * 1024 * 1024,
+                 version=__version__, revision=__form_revision__, timeout=30.0, touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = version
+        self.revision = revision
+        self.timeout = timeout
+        self.touch_interval = touch_interval
+        self.local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('CREATE TABLE IF NOT EXISTS forms ('
+                         'key TEXT PRIMARY KEY, version TEXT, value BLOB, used REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS forms_used ON forms (used)')
+            conn.execute('CREATE TABLE IF NOT EXISTS stats ('
+                         'id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER, bytes INTEGER)')
+            if conn.execute('SELECT 1 FROM stats').fetchone() is None:
+                # a file written before the stats were kept is counted once
+                conn.execute('INSERT INTO stats SELECT 0, count(*), coalesce(sum(length(value)), 0) FROM forms')
+            conn.execute('CREATE TRIGGER IF NOT EXISTS forms_insert AFTER INSERT ON forms BEGIN '
+                         'UPDATE stats SET entries = entries + 1, bytes = bytes + length(NEW.value); END')
+            conn.execute('CREATE TRIGGER IF NOT EXISTS forms_delete AFTER DELETE ON forms BEGIN '
+                         'UPDATE stats SET entries = entries - 1, bytes = bytes - length(OLD.value); END')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def __getstate__(self):
+        # connections belong to one process, each process opens its own
+        state = self.__dict__.copy()
+        del state['local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            # the rows INSERT OR REPLACE replaces go through the delete trigger
+            conn.execute('PRAGMA recursive_triggers=ON')
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def _key(self, kind: str, notation: str, var: str):
+        return '\0'.join([self.version, str(self.revision), kind, notation, var])
+
+    def __len__(self):
+        return self._connect().execute('SELECT count(*) FROM forms').fetchone()[0]
+
+    def _get(self, kind: str, notation: str, var=''):
+        key = self._key(kind, notation, var)
+        conn = self._connect()
+        row = conn.execute('SELECT value, used FROM forms WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, used = row
+        now = time.time()
+        # reads stay reads, the recency of an entry is written rarely
+        if now - used > self.touch_interval:
+            try:
+                conn.execute('UPDATE forms SET used = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                pass
+        try:
+            return loads(value)
+        except ValueError:
+            return None
+
+    def _put(self, kind: str, notation: str, var: str, value):
+        key = self._key(kind, notation, var)
+        blob = dumps(value)
+        conn = self._connect()
+        try:
+            conn.execute('INSERT OR REPLACE INTO forms VALUES (?, ?, ?, ?)', (key, self.version, blob, time.time()))
+            self._evict(conn)
+        except sqlite3.OperationalError:
+            # another process holds the lock for too long, the entry is only a cache
+            pass
+
+    def _evict(self, conn):
+        count, size = conn.execute('SELECT entries, bytes FROM stats').fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        # least recently used first, down to 90% of both limits
+        drop = max(count - self.max_entries * 9 // 10, 0)
+        if size > self.max_bytes * 0.9:
+            excess, n = size - self.max_bytes * 0.9, 0
+            for (length,) in conn.execute('SELECT length(value) FROM forms ORDER BY used'):
+                if excess <= 0:
+                    break
+                excess -= length
+                n += 1
+            drop = max(drop, n)
+        conn.execute('DELETE FROM forms WHERE key IN (SELECT key FROM forms ORDER BY used LIMIT ?)', (drop,))
+
+    def get(self, notation: str):
+        # (canonical tree, exclusion, variables of the notation) or None
+        return self._get('form', notation)
+
+    def put(self, notation: str, node, exclusion: list, variables: set):
+        self._put('form', notation, '', (node, exclusion, variables))
+
+    def get_derivative(self, notation: str, var: str):
+        return self._get('derivative', notation, var)
+
+    def put_derivative(self, notation: str, var: str, node, exclusion: list):
+        self._put('derivative', notation, var, (node, exclusion))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM forms')
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,147 @@
+import types
+
+
+# emits a recursive-descent parser for the LL(1) table of a `Parser`, with one method per
+# nonterminal and the terminals coded as integers in the order of the lexer tokens
+class ParserGenerator:
+
+    start = 'expr'
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.terminals = list(parser.lexer.get_tokens())
+        self.codes = dict((t, i) for i, t in enumerate(self.terminals))
+        self.end = len(self.terminals)
+        self.sets = []
+
+    def generate(self):
+        self.sets = []
+        methods = []
+        for key in self.parser.grammar.keys():
+            methods.extend(self._method(key))
+
+        lines = ['# generated by mathlib.io.codegen from the parser grammar, do not edit',
+                 'from mathlib.core.builder import ParseNode',
+                 '',
+                 'TERMINALS = {!r}'.format(tuple(self.terminals)),
+                 'CODES = dict((t, i) for i, t in enumerate(TERMINALS))',
+                 'END = {}'.format(self.end),
+                 '']
+        for i, s in enumerate(self.sets):
+            lines.append('_S{} = frozenset({!r})'.format(i, tuple(sorted(s))))
+        lines.extend(['', '',
+                      'class RecursiveDescentParser:',
+                      '',
+                      '    __slots__ = (\'tokens\', \'codes\', \'i\')',
+                      '',
+                      '    def parse(self, tokens, terminals, i=0):',
+                      '        self.tokens = tokens',
+                      '        self.codes = [CODES.get(t) for t in terminals]',
+                      '        self.codes.append(END)',
+                      '        self.i = i',
+                      '        if self.codes[i] == END:',
+                      '            raise ValueError(\'Parse Error: empty expression\')',
+                      '        root = ParseNode(None, {!r}, None)'.format(self.start),
+                      '        self.{}(root)'.format(self._name(self.start)),
+                      '        if self.codes[self.i] != END:',
+                      '            raise ValueError(\'Parse Error: un-consumed token: {}\'.format(self.tokens[self.i]))',
+                      '        return root',
+                      '',
+                      '    def error(self, expected):',
+                      '        found = \'end of input\' if self.codes[self.i] == END else self.tokens[self.i]',
+                      '        raise ValueError(\'Parse Error: expected `{}` in next token, found `{}`.\'.format(',
+                      '            \', \'.join(expected), found))',
+                      ''])
+        lines.extend(methods)
+        lines.append('')
+        return '\n'.join(lines)
+
+    def compile(self):
+        module = types.ModuleType('mathlib.io._generated_parser')
+        exec(compile(self.generate(), '<generated parser>', 'exec'), module.__dict__)
+        return module
+
+    def write(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.generate())
+
+    @staticmethod
+    def _name(key):
+        return '_p_' + key
+
+    def _method(self, key):
+        # read the lookaheads back from the table, later rules overwrite earlier ones there
+        productions = [(gram, set()) for gram in self.parser.grammar[key]]
+        for (k, t), gram in self.parser.table.items():
+            if k != key or t == '$':
+                continue
+            for g, lookahead in productions:
+                if g is gram:
+                    lookahead.add(self.codes[t])
+
+        expected = set()
+        for _, lookahead in productions:
+            expected.update(self.terminals[c] for c in lookahead)
+
+        lines = ['    def {}(self, n):'.format(self._name(key)),
+                 '        c = self.codes[self.i]']
+        if self.parser.is_nullable(key):
+            # the table interpreter accepts an empty nullable node at the end of input
+            lines.extend(['        if c == END:',
+                          '            return'])
+
+        keyword = 'if'
+        for gram, lookahead in productions:
+            if len(lookahead) == 0:
+                continue
+            if len(lookahead) == 1:
+                lines.append('        {} c == {}:'.format(keyword, next(iter(lookahead))))
+            else:
+                lines.append('        {} c in _S{}:'.format(keyword, len(self.sets)))
+                self.sets.append(lookahead)
+            lines.extend(self._body(gram, lookahead))
+            keyword = 'elif'
+        if keyword == 'if':
+            lines.append('        self.error({!r})'.format(tuple(sorted(expected))))
+        else:
+            lines.extend(['        else:',
+                          '            self.error({!r})'.format(tuple(sorted(expected)))])
+        lines.append('')
+        return lines
+
+    def _body(self, gram, lookahead):
+        if gram == ['@']:
+            return ['            pass']
+
+        lines = []
+        for j, symbol in enumerate(gram):
+            if self.parser.is_terminal(symbol):
+                code = self.codes[symbol]
+                # the lookahead already matched the first terminal of the production
+                if j > 0 or lookahead != {code}:
+                    lines.extend(['            if self.codes[self.i] != {}:'.format(code),
+                                  '                self.error({!r})'.format((symbol,))])
+                lines.extend(['            n.childs.append(ParseNode(self.tokens[self.i], {!r}, n))'.format(symbol),
+                              '            self.i += 1'])
+            else:
+                lines.extend(['            m = ParseNode(None, {!r}, n)'.format(symbol),
+                              '            n.childs.append(m)',
+                              '            self.{}(m)'.format(self._name(symbol))])
+        return lines
+
+
+_compiled = {}
+
+
+def compile_parser(parser):
+    # parsers of the same grammar share one generated module
+    generator = ParserGenerator(parser)
+    source = generator.generate()
+    module = _compiled.get(source)
+    if module is None:
+        module = _compiled[source] = generator.compile()
+    return module
+
+
+if __name__ == '__main__':
+    pass
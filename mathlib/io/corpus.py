@@ -0,0 +1,182 @@
+from mathlib.io.lexer import Lexer, TokenStream, token_alternatives, terminal_pattern
+
+import re
+import mmap
+import array
+import numpy as np
+
+
+# terminal code of a token that no terminal matches, `None` in `Lexer.tokenize`
+UNKNOWN = 255
+
+
+# token strings of a corpus, read from the mapped buffer only when indexed
+class TokenView:
+
+    __slots__ = ('buffer', 'base', 'starts', 'ends')
+
+    def __init__(self, buffer, base: int, starts: np.ndarray, ends: np.ndarray):
+        self.buffer = buffer
+        self.base = base
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return TokenView(self.buffer, self.base, self.starts[i], self.ends[i])
+        return self.buffer[self.base + int(self.starts[i]):self.base + int(self.ends[i])].decode()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# terminal names of a corpus, looked up from the codes when indexed
+class TerminalView:
+
+    __slots__ = ('codes', 'names')
+
+    def __init__(self, codes: np.ndarray, names: tuple):
+        self.codes = codes
+        self.names = names
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return TerminalView(self.codes[i], self.names)
+        c = int(self.codes[i])
+        return None if c == UNKNOWN else self.names[c]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# the tokens of a newline-delimited corpus as arrays: terminal codes in the order of the lexer tokens,
+# token offsets relative to the start of their line, and per line the byte offset and first token.
+# line `i` has the tokens `lines[i]:lines[i + 1]`
+class TokenCorpus:
+
+    def __init__(self, buffer, names: tuple, codes, starts, ends, line_offsets, lines, mapped=None):
+        self.buffer = buffer
+        self.names = names
+        self.codes = codes
+        self.starts = starts
+        self.ends = ends
+        self.line_offsets = line_offsets
+        self.lines = lines
+        self.mapped = mapped
+
+    def __len__(self):
+        return len(self.line_offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+
+    def line(self, i: int):
+        start = int(self.line_offsets[i])
+        end = int(self.line_offsets[i + 1]) - 1 if i + 1 < len(self) else len(self.buffer)
+        return self.buffer[start:end].decode().rstrip('\r\n')
+
+    def tokens(self, i: int):
+        a, b = self.lines[i], self.lines[i + 1]
+        return TokenView(self.buffer, int(self.line_offsets[i]), self.starts[a:b], self.ends[a:b])
+
+    def terminals(self, i: int):
+        a, b = self.lines[i], self.lines[i + 1]
+        return TerminalView(self.codes[a:b], self.names)
+
+    def stream(self, i: int):
+        return TokenStream(self.tokens(i), self.terminals(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.stream(i)
+
+
+# lexes a whole corpus with one pass of the token pattern over the buffer, the terminal of a token is found
+# the same way as in `Lexer.tokenize` but from its offsets, without making a string of it
+class CorpusLexer:
+
+    def __init__(self, lexer: Lexer):
+        self.names = lexer.get_tokens()
+        if len(self.names) >= UNKNOWN:
+            raise ValueError('too many terminals for uint8 codes: {}'.format(len(self.names)))
+
+        self.regexs = [re.compile(terminal_pattern(v).encode()) for v in lexer.tokens.values()]
+        # a literal terminal can only match tokens starting with its first character
+        self.candidates = [[(code, r) for code, (r, v) in enumerate(zip(self.regexs, lexer.tokens.values()))
+                            if re.escape(v) != v or v.encode()[0] == c] for c in range(256)]
+
+        alternatives = token_alternatives(lexer.tokens.values())
+        self.kinds = {}
+        pattern, group = [], 1
+        for i, alt in enumerate(alternatives):
+            if i == len(alternatives) - 1:
+                kind = 'char'
+            elif re.escape(alt) == alt:
+                kind = self._find(alt.encode(), 0, len(alt))
+            else:
+                kind = None
+            self.kinds[group] = kind
+            pattern.append('({})'.format(alt))
+            group += 1 + re.compile(alt).groups
+        self.pattern = re.compile('|'.join(pattern).encode())
+        self.chars = [self._find(bytes([c]), 0, 1) for c in range(256)]
+
+    def _find(self, buffer, start: int, end: int):
+        for code, r in self.candidates[buffer[start]]:
+            if r.match(buffer, start, end) is not None:
+                return code
+        return UNKNOWN
+
+    def lex(self, buffer, mapped=None):
+        codes, starts, ends = array.array('B'), array.array('i'), array.array('i')
+        line_offsets, lines = array.array('q'), array.array('q')
+
+        size = len(buffer)
+        pos = 0
+        while pos < size:
+            end = buffer.find(b'\n', pos)
+            if end < 0:
+                end = size
+            line_offsets.append(pos)
+            lines.append(len(codes))
+            for m in self.pattern.finditer(buffer, pos, end):
+                kind = self.kinds[m.lastindex]
+                a, b = m.span()
+                if kind == 'char':
+                    codes.append(self.chars[buffer[a]])
+                elif kind is None:
+                    codes.append(self._find(buffer, a, b))
+                else:
+                    codes.append(kind)
+                starts.append(a - pos)
+                ends.append(b - pos)
+            pos = end + 1
+        lines.append(len(codes))
+
+        return TokenCorpus(buffer, self.names,
+                           np.frombuffer(codes, dtype=np.uint8), np.frombuffer(starts, dtype=np.int32),
+                           np.frombuffer(ends, dtype=np.int32), np.frombuffer(line_offsets, dtype=np.int64),
+                           np.frombuffer(lines, dtype=np.int64), mapped)
+
+    def lex_file(self, filename: str):
+        with open(filename, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                return self.lex(b'')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.lex(mapped, mapped)
@@ -1,112 +1,102 @@
 from mathlib.core.node import *
 from mathlib.utils.node_util import *
+from mathlib.core.functions import functions
+from mathlib.io.render import *
 
 
-class LaTeXGenerator:
+class LaTeXGenerator(NodeRenderer):
 
-    def generate(self, node: MathNode):
-        s = self._generate(node)
+    def _finish(self, s: str):
         if s == '':
             return '0'
         return s
 
-    def _generate(self, node: MathNode):
-        if node.__class__ in [int, float]:
-            return str(node)
-
-        if isinstance(node, TermNode):
-            if len(node.factors) == 0:
-                return ''
-            s = self._generate(node.factors[0])
-            for x in node.factors[1:]:
-                if is_negative(x):
-                    s += ' - {}'.format(self._generate(-x))
-                else:
-                    s += ' + {}'.format(self._generate(x))
-            return '{}'.format(s)
-
-        if isinstance(node, FactorNode):
-            s = ''
-            if node.coef[0] / node.coef[1] < 0:
-                s += '-'
-            c_nu = '{}'.format(abs(node.coef[0]))
-            c_deno = '{}'.format(abs(node.coef[1]))
-
-            def _pack_term(node):
-                if isinstance(node, TermNode):
-                    return '({})'.format(self.generate(node))
-                return self._generate(node)
-
-            nu = '{}'.format(''.join(map(_pack_term, node.numerator)))
-            deno = '{}'.format(''.join(map(_pack_term, node.denominator)))
-
-            if deno == '':
-                if c_deno != '1':
-                    s += '{{{{{}}} \\over {{{}}}}}'.format(c_nu, c_deno)
-                else:
-                    if c_nu != '1' or nu == '':
-                        s += '{{{}}}'.format(c_nu)
-
-                if nu != '':
-                    s += '{{{}}}'.format(nu)
+    def _generate_TermNode(self, node: TermNode, parts: list, memo: RenderMemo):
+        if len(node.factors) == 0:
+            return
+        parts.append(self._render(node.factors[0], memo))
+        for x in node.factors[1:]:
+            if is_negative(x):
+                parts.append(' - ')
+                parts.append(self._render(-x, memo))
+            else:
+                parts.append(' + ')
+                parts.append(self._render(x, memo))
+
+    def _generate_FactorNode(self, node: FactorNode, parts: list, memo: RenderMemo):
+        if node.coef.sign() < 0:
+            parts.append('-')
+        c_nu = str(abs(node.coef[0]))
+        c_deno = str(abs(node.coef[1]))
+
+        def _pack_term(n):
+            if isinstance(n, TermNode):
+                return '({})'.format(self._finish(self._render(n, memo)))
+            return self._render(n, memo)
+
+        nu = ''.join(map(_pack_term, node.numerator))
+        deno = ''.join(map(_pack_term, node.denominator))
+
+        if deno == '':
+            if c_deno != '1':
+                parts.extend(['{{', c_nu, '} \\over {', c_deno, '}}'])
             else:
                 if c_nu != '1' or nu == '':
-                    nu = '{{{}}}{}'.format(c_nu, nu)
-                if c_deno != '1':
-                    deno = '{{{}}}{}'.format(c_deno, deno)
-                s += '{{{} \\over {}}}'.format(nu, deno)
-            return s
-
-        if isinstance(node, PolyNode):
-            body = '{{{}}}'.format(self._generate(node.body))
-            if node.body.__class__ not in [VarNode, NumNode]:
-                body = '({})'.format(body)
-            return '{{{}}}^{{{}}}'.format(body, node.dim)
-
-        if isinstance(node, ExpoNode):
-            base = '{{{}}}'.format(self._generate(node.base))
-            body = '{{{}}}'.format(self._generate(node.body))
-            if node.base.__class__ not in [VarNode, NumNode]:
-                base = '({})'.format(base)
-            if node.body.__class__ not in [VarNode, NumNode]:
-                body = '({})'.format(body)
-            return '{{{}}}^{{{}}}'.format(base, body)
-
-        if isinstance(node, LogNode):
-            s = '\\'
-            if isinstance(node.base, NumNode):
-                if node.base.value == math.e:
-                    s += 'ln'
-                elif node.base.value == 10:
-                    s += 'log'
-                else:
-                    s += 'log_{{{}}}'.format(node.base.value)
+                    parts.extend(['{', c_nu, '}'])
+
+            if nu != '':
+                parts.extend(['{', nu, '}'])
+        else:
+            if c_nu != '1' or nu == '':
+                nu = ''.join(['{', c_nu, '}', nu])
+            if c_deno != '1':
+                deno = ''.join(['{', c_deno, '}', deno])
+            parts.extend(['{', nu, ' \\over ', deno, '}'])
+
+    def _generate_PolyNode(self, node: PolyNode, parts: list, memo: RenderMemo):
+        parts.append('{')
+        self._wrap(node.body, parts, memo)
+        parts.extend(['}^{', str(node.dim), '}'])
+
+    def _generate_ExpoNode(self, node: ExpoNode, parts: list, memo: RenderMemo):
+        parts.append('{')
+        self._wrap(node.base, parts, memo)
+        parts.append('}^{')
+        self._wrap(node.body, parts, memo)
+        parts.append('}')
+
+    def _generate_LogNode(self, node: LogNode, parts: list, memo: RenderMemo):
+        parts.append('\\')
+        if isinstance(node.base, NumNode):
+            if node.base.value == math.e:
+                parts.append('ln')
+            elif node.base.value == 10:
+                parts.append('log')
             else:
-                s += 'log_{{{}}}'.format(self._generate(node.base))
-            body = ' {{{}}}'.format(self._generate(node.body))
-            if node.body.__class__ not in [VarNode, NumNode]:
-                body = '({})'.format(body)
-            s += body
-            return s
-
-        if isinstance(node, TriNode):
-            body = '{{{}}}'.format(self._generate(node.body))
-            if node.body.__class__ not in [VarNode, NumNode]:
-                body = '({})'.format(body)
-            return '\\{} {}'.format(node.func, body)
-
-        if isinstance(node, NumNode):
-            return '{{{}}}'.format(node.value)
-
-        if isinstance(node, VarNode):
-            return node.name
-
-    def _generate_fraction(self, nodes: list, coef):
-        s = ''
-        if len(nodes) == 0:
-            s += '{}'.format(coef)
-        elif coef == -1:
-            s += '-'
-        elif coef != 1:
-            s += '{}'.format(coef)
-        s += '{}'.format(''.join(map(self._generate, nodes)))
+                parts.extend(['log_{', str(node.base.value), '}'])
+        else:
+            parts.extend(['log_{', self._render(node.base, memo), '}'])
+        if node.body.__class__ not in [VarNode, NumNode]:
+            parts.extend(['( {', self._render(node.body, memo), '})'])
+        else:
+            parts.extend([' {', self._render(node.body, memo), '}'])
+
+    def _generate_TriNode(self, node: TriNode, parts: list, memo: RenderMemo):
+        function = functions[node.func]
+        if function.grouped:
+            parts.extend([function.latex, '{', self._render(node.body, memo), '}'])
+        else:
+            parts.extend([function.latex, ' '])
+            self._wrap(node.body, parts, memo)
+
+    def _generate_NumNode(self, node: NumNode, parts: list, memo: RenderMemo):
+        parts.extend(['{', str(node.value), '}'])
+
+    def _generate_VarNode(self, node: VarNode, parts: list, memo: RenderMemo):
+        parts.append(node.name)
+
+    def _wrap(self, node: MathNode, parts: list, memo: RenderMemo):
+        if node.__class__ not in [VarNode, NumNode]:
+            parts.extend(['({', self._render(node, memo), '})'])
+        else:
+            parts.extend(['{', self._render(node, memo), '}'])
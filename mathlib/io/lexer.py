@@ -4,6 +4,21 @@ from typing import Union
 import re
 
 
+# alternatives of the token pattern in the order they are tried, the single
+# characters are collected into one class after every longer token
+def token_alternatives(tokens):
+    chars = [x for x in tokens if len(x) == 1]
+    patterns = [x for x in tokens if x not in chars]
+
+    patterns.append('[{}]'.format(''.join(chars)).replace('-', '\\-'))
+    return patterns
+
+
+# the pattern matched against a token to find its terminal
+def terminal_pattern(v: str):
+    return v if len(v) > 1 or str.isalpha(v) else '\\' + v
+
+
 class TokenStream:
 
     def __init__(self, tokens, terminals):
@@ -65,18 +80,10 @@ class Lexer:
 
     def tokenize(self, string: str):
 
-        def get_pattern(tokens):
-            chars = [x for x in tokens if len(x) == 1]
-            patterns = [x for x in tokens if x not in chars]
-
-            patterns.append('[{}]'.format(''.join(chars)).replace('-', '\\-'))
-
-            return '({})'.format('|'.join(map(lambda x: '({})'.format(x), patterns)))
-
         def find_terminal(token):
             regexs = {}
             for k, v in self.tokens.items():
-                regexs[k] = re.compile(v) if len(v) > 1 or str.isalpha(v) else re.compile('\\' + v)
+                regexs[k] = re.compile(terminal_pattern(v))
 
             for k in self.tokens.keys():
                 r, v = regexs[k], self.tokens[k]
@@ -85,7 +92,7 @@ class Lexer:
                     return k
             return None
 
-        pattern = get_pattern(self.tokens.values())
+        pattern = '({})'.format('|'.join(map(lambda x: '({})'.format(x), token_alternatives(self.tokens.values()))))
         regex = re.compile(pattern)
         tokens = [x[0] for x in regex.findall(string)]
         terminals = [find_terminal(x) for x in tokens]
@@ -2,6 +2,7 @@ import itertools
 from collections import OrderedDict
 
 from mathlib.io.lexer import Lexer, TokenStream
+from mathlib.io.codegen import compile_parser
 from mathlib.core.builder import *
 from mathlib.core.simplifier import *
 
@@ -14,6 +15,7 @@ class Parser:
         self.first = OrderedDict()
         self.follow = OrderedDict()
         self.table = OrderedDict()
+        self.generated = None
 
         if lexer is not None:
             self.lexer = lexer
@@ -96,6 +98,8 @@ class Parser:
                 for t in ll:
                     self.table[(key, t)] = gram
 
+        self.generated = compile_parser(self)
+
     def get_first(self, key):
         if isinstance(key, list):
             if len(key) == 1:
@@ -181,6 +185,19 @@ class Parser:
         return a
 
     def parse(self, stream: TokenStream):
+        if self.generated is None:
+            return self.interpret(stream)
+        start = stream.i
+        try:
+            root = self.generated.RecursiveDescentParser().parse(stream.tokens, stream.terminals, start)
+        except RecursionError:
+            # too deeply nested for the generated parser, the table interpreter has no depth limit
+            stream.i = start
+            return self.interpret(stream)
+        stream.i = len(stream)
+        return root
+
+    def interpret(self, stream: TokenStream):
         stack = [('$', None), ('expr', None)]
         root = None
         cur = None
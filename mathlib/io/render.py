@@ -0,0 +1,49 @@
+import abc
+
+from mathlib.core.node import *
+from mathlib.utils.node_util import *
+from mathlib.utils.visitor import *
+
+
+class RenderMemo:
+
+    def __init__(self):
+        self.interner = NodeInterner()
+        self.fragments = {}
+
+
+class NodeRenderer(NodeVisitor, metaclass=abc.ABCMeta):
+
+    dispatch = ('_generate_',)
+
+    def generate(self, node: MathNode):
+        return self.generate_all([node])[0]
+
+    def generate_all(self, nodes: list):
+        memo = RenderMemo()
+        return [self._finish(self._render(x, memo)) for x in nodes]
+
+    def _finish(self, s: str):
+        return s
+
+    def _render(self, node: MathNode, memo: RenderMemo):
+        if node.__class__ in [int, float]:
+            return str(node)
+
+        k = memo.interner.intern(node)
+        s = memo.fragments.get(k)
+        if s is None:
+            parts = []
+            self._generate(node, parts, memo)
+            s = memo.fragments[k] = ''.join(parts)
+        return s
+
+    def _generate(self, node: MathNode, parts: list, memo: RenderMemo):
+        self._generate_table[node.__class__](self, node, parts, memo)
+
+    def _generate_default(self, node, parts: list, memo: RenderMemo):
+        pass
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,86 @@
+from mathlib.core.node import *
+from mathlib.utils.node_util import *
+from mathlib.io.render import *
+
+
+class TextGenerator(NodeRenderer):
+
+    def _generate_TermNode(self, node: TermNode, parts: list, memo: RenderMemo):
+        if len(node.factors) == 0:
+            parts.append('0')
+            return
+        parts.append(self._render(node.factors[0], memo))
+        for x in node.factors[1:]:
+            if is_negative(x):
+                parts.append(' - ')
+                parts.append(self._render(-x, memo))
+            else:
+                parts.append(' + ')
+                parts.append(self._render(x, memo))
+
+    def _generate_FactorNode(self, node: FactorNode, parts: list, memo: RenderMemo):
+        if node.coef.sign() < 0:
+            parts.append('-')
+        c_nu = str(abs(node.coef[0]))
+        c_deno = str(abs(node.coef[1]))
+
+        def _pack_term(n):
+            if isinstance(n, TermNode):
+                return '({})'.format(self._render(n, memo))
+            return self._render(n, memo)
+
+        nu = '*'.join(map(_pack_term, node.numerator))
+        deno = '*'.join(map(_pack_term, node.denominator))
+
+        if deno == '':
+            if c_deno != '1':
+                parts.extend([c_nu, ' / ', c_deno])
+            else:
+                if c_nu != '1' or nu == '':
+                    parts.append(c_nu)
+
+            if nu != '':
+                if c_nu != '1' or c_deno != '1':
+                    parts.append('*')
+                parts.append(nu)
+        else:
+            if c_nu != '1' or nu == '':
+                nu = c_nu + '*' + nu if nu != '' else c_nu
+            if c_deno != '1':
+                deno = c_deno + '*' + deno
+            if len(node.denominator) > 1 \
+                    or c_deno != '1' and len(node.denominator) > 0:
+                deno = '(' + deno + ')'
+            parts.extend([nu, '/', deno])
+
+    def _generate_PolyNode(self, node: PolyNode, parts: list, memo: RenderMemo):
+        self._wrap(node.body, parts, memo)
+        parts.extend(['^', str(node.dim)])
+
+    def _generate_ExpoNode(self, node: ExpoNode, parts: list, memo: RenderMemo):
+        self._wrap(node.base, parts, memo)
+        parts.append('^')
+        self._wrap(node.body, parts, memo)
+
+    def _generate_LogNode(self, node: LogNode, parts: list, memo: RenderMemo):
+        parts.append('log')
+        self._wrap(node.base, parts, memo)
+        parts.extend(['_(', self._render(node.body, memo), ')'])
+
+    def _generate_TriNode(self, node: TriNode, parts: list, memo: RenderMemo):
+        parts.extend([node.func, '(', self._render(node.body, memo), ')'])
+
+    def _generate_NumNode(self, node: NumNode, parts: list, memo: RenderMemo):
+        if node.value >= 0:
+            parts.append(str(node.value))
+        else:
+            parts.extend(['(', str(node.value), ')'])
+
+    def _generate_VarNode(self, node: VarNode, parts: list, memo: RenderMemo):
+        parts.append(node.name)
+
+    def _wrap(self, node: MathNode, parts: list, memo: RenderMemo):
+        if node.__class__ not in [VarNode, NumNode]:
+            parts.extend(['(', self._render(node, memo), ')'])
+        else:
+            parts.append(self._render(node, memo))
@@ -1,4 +1,5 @@
 from .plot import *
 from .docs import *
+from .samples import *
 
-__all__ = ['Plotter', 'manual']
\ No newline at end of file
+__all__ = ['Plotter', 'SampleCache', 'TileCache', 'manual']
\ No newline at end of file
@@ -1,17 +1,32 @@
 from mathlib.core.calculator import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.interval import IntervalEvaluator
+from mathlib.core.series import ApproximationCache
+from mathlib.core.grid import *
+from mathlib.ui.samples import SampleCache, TileCache, lttb
 from mathlib.io.latex import *
 
 import matplotlib.pyplot as plt
 import numpy as np
 
 
+def _json_values(values):
+    return [float(v) if math.isfinite(v) else None for v in values]
+
+
 class Plotter:
 
-    def __init__(self, calculator: Calculator=None):
+    def __init__(self, calculator: Calculator=None, approximations: ApproximationCache=None,
+                 samples: SampleCache=None, tiles: TileCache=None):
         self.scale = 3
         self.threshold = 1e3
         self.max_std = 1e6
         self.calculator = calculator
+        self.approximations = approximations
+        self.samples = samples
+        self.tiles = tiles
+        self.grid_shape = (200, 200)
+        self.width = 800
 
         # plt.ion()
         # self.fig, self.ax = plt.subplots()
@@ -25,31 +40,89 @@ class Plotter:
         if l.__class__ not in [int, float] or r.__class__ not in [int, float] \
                 or l >= r:
             raise ValueError('invalid range: ({}, {})'.format(l, r))
-        step = (r - l) / (10 ** self.scale)
-        targets = [round(x, self.scale) for x in np.arange(l, r + step, step)]
+        if self.tiles is not None:
+            return self._get_tiled_points(node, exclusion, var, lim, kwargs)
+        if self.samples is None:
+            return self._sample(node, exclusion, var, lim, kwargs)
+
+        key = self.samples.key(node, exclusion, var, kwargs,
+                               (self.scale, self.threshold, self.approximations is not None))
+        points = self.samples.get(key, (l, r), 10 ** self.scale)
+        if points is None:
+            points = self._sample_array(node, exclusion, var, lim, kwargs)
+            self.samples.put(key, (l, r), *points)
+        return points[0].tolist(), points[1].tolist()
+
+    def _get_tiled_points(self, node: MathNode, exclusion: list, var: str, lim: tuple, kwargs):
+        # the view is cut from the tiles over it, each tile is sampled once for every view showing it
+        l, r = lim
+        key = self.tiles.key(node, exclusion, var, kwargs,
+                             (self.scale, self.threshold, self.approximations is not None, self.tiles.tile_points))
+        xs, ys = [], []
+        for tile, tile_lim in self.tiles.tiles(lim):
+            points = self.tiles.get(key + tile, tile_lim, self.tiles.tile_points)
+            if points is None:
+                points = self._sample_array(node, exclusion, var, tile_lim, kwargs, self.tiles.tile_points)
+                self.tiles.put(key + tile, tile_lim, *points)
+            # neighbouring tiles share their edge
+            start = 1 if len(xs) > 0 and points[0][0] == xs[-1][-1] else 0
+            xs.append(points[0][start:])
+            ys.append(points[1][start:])
+
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        inside = (xs >= l) & (xs <= r)
+        return xs[inside].tolist(), ys[inside].tolist()
+
+    def _sample_array(self, node: MathNode, exclusion: list, var: str, lim: tuple, kwargs, points=None):
+        xs, ys = self._sample(node, exclusion, var, lim, kwargs, points)
+        return np.array(xs, dtype=float), np.array(ys, dtype=float)
+
+    def _sample(self, node: MathNode, exclusion: list, var: str, lim: tuple, kwargs, points=None):
+        l, r = lim
+        points = points or 10 ** self.scale
+        step = (r - l) / points
+        # enough digits to keep the steps of a narrow range apart
+        digits = max(self.scale, 1 - math.floor(math.log10(step)))
+        targets = [round(x, digits) for x in np.linspace(l, r, points + 1)]
+
+        bound = IntervalEvaluator([node])
+        if self.approximations is not None:
+            evaluate = self.approximations.get(node, exclusion, var, lim, **kwargs).eval
+        else:
+            expr = ExpressionSet([node], [exclusion])
+
+            def evaluate(points):
+                return expr.eval(**dict(kwargs, **{var: points}))[0]
+
+        def _eval(points):
+            return np.broadcast_to(evaluate(np.array(points)), len(points)).tolist()
+
         xs, ys = [], []
-        for t in targets:
-            kwargs[var] = t
-            y = self.calculator.eval(node, exclusion, **kwargs)
-            if len(ys) > 0 and abs(y - ys[-1]) > self.threshold:
+        for t, y in zip(targets, _eval(targets)):
+            # a finite bound between the samples means a steep slope, not a pole
+            if len(ys) > 0 and abs(y - ys[-1]) > self.threshold \
+                    and not self._bounded(bound, var, (xs[-1], t), kwargs):
                 _scale = 1
-                _step = step / (10 ** _scale)
-                additions = [round(x, self.scale + _scale) for x in np.arange(xs[-1], t + _step, _step)]
-                for a in additions:
-                    kwargs[var] = a
-                    _y = self.calculator.eval(node, exclusion, **kwargs)
+                # from the last sample on, up to and with t
+                additions = [round(x, digits + _scale) for x in np.linspace(xs[-1], t, 10 ** _scale + 1)[1:]]
+                for a, _y in zip(additions, _eval(additions)):
                     if abs(_y - ys[-1]) > self.threshold:
                         xs.append((a + xs[-1]) / 2)
                         ys.append(math.nan)
                     xs.append(a)
                     ys.append(_y)
+                continue
             xs.append(t)
             ys.append(y)
 
         return xs, ys
 
+    def _bounded(self, bound: IntervalEvaluator, var: str, lim: tuple, kwargs):
+        value = bound.eval(**dict(kwargs, **{var: lim}))[0]
+        return bool(np.all(value.is_finite()))
+
     def _get_ylim(self, values):
-        values = sorted([x for x in values if x != math.inf and x is not math.nan])
+        values = sorted([x for x in values if math.isfinite(x)])
         if len(values) == 0:
             return None
         std = np.clip(np.std(values), 0, self.max_std)
@@ -86,7 +159,12 @@ class Plotter:
 
         ax.plot(xs, ys, label=label, linewidth=2.0, zorder=3)
         ax.set_xlim(*lim)
+        ax.set_ylim(*self._plot_ylim(ys, lim, values))
+        ax.legend()
+
+        return fig, ax, ys
 
+    def _plot_ylim(self, ys, lim: tuple, values=None):
         ylim = self._get_ylim(ys)
         if ylim is None or ylim[0] == ylim[1]:
             ylim = lim
@@ -94,10 +172,105 @@ class Plotter:
         if values is not None:
             _ylim = self._get_ylim(values)
             ylim = max(ylim[0], _ylim[0]), min(ylim[1], _ylim[1])
+        return ylim
 
-        ax.set_ylim(*ylim)
-        ax.legend()
+    def get_curve(self, node: MathNode, exclusion: list, var: str, lim: tuple,
+                  label: str, values=None, width=None, **kwargs):
+        # the curve of draw_plot as json data for the browser to draw, about one point per pixel of its width.
+        # breaks are null, and ylim is the range draw_plot would show
+        xs, ys = self._get_points(node, exclusion, var, lim, **kwargs)
+        ylim = self._plot_ylim(ys, lim, values)
+        _xs, _ys = lttb(xs, ys, width or self.width)
+        curve = {'label': label, 'x': _json_values(_xs), 'y': _json_values(_ys),
+                 'ylim': [float(ylim[0]), float(ylim[1])]}
+        return curve, ys
 
-        return fig, ax, ys
+    def stream_curve(self, node: MathNode, exclusion: list, var: str, lim: tuple,
+                     label: str, segments=8, width=None, **kwargs):
+        # get_curve in batches to draw as they come: a coarse pass over lim with its ylim first, then the
+        # segments of lim at full resolution, where the coarse pass breaks or jumps before the rest.
+        # a batch replaces the points of its range
+        l, r = lim
+        if l.__class__ not in [int, float] or r.__class__ not in [int, float] \
+                or l >= r:
+            raise ValueError('invalid range: ({}, {})'.format(l, r))
+        points = max(2, 10 ** self.scale // segments)
+        width = max(2, (width or self.width) // segments)
+
+        xs, ys = self._sample_array(node, exclusion, var, lim, kwargs, points)
+        ylim = self._plot_ylim(ys, lim)
+        yield {'label': label, 'range': [float(l), float(r)], 'x': _json_values(xs), 'y': _json_values(ys),
+               'ylim': [float(ylim[0]), float(ylim[1])]}
+
+        # a segment is rough where the coarse pass broke or the bound of the node is not finite
+        edges = np.linspace(l, r, segments + 1)
+        bound = IntervalEvaluator([node])
+        broken = ~np.isfinite(ys)
+        rough = [bool(np.any(broken[(xs >= a) & (xs <= b)])) or not self._bounded(bound, var, (a, b), kwargs)
+                 for a, b in zip(edges, edges[1:])]
+        order = sorted(range(segments), key=lambda i: not rough[i])
+        for i in order:
+            a, b = float(edges[i]), float(edges[i + 1])
+            _xs, _ys = lttb(*self._sample_array(node, exclusion, var, (a, b), kwargs, points), width)
+            yield {'label': label, 'range': [a, b], 'x': _json_values(_xs), 'y': _json_values(_ys)}
+
+    def get_grid(self, node: MathNode, exclusion: list, variables: tuple, xlim: tuple, ylim: tuple,
+                 shape=None, max_shape=None, **kwargs):
+        xvar, yvar = variables
+        xs, ys, zs = GridEvaluator(node, exclusion, shape or self.grid_shape).eval(xvar, yvar, xlim, ylim, **kwargs)
+        if max_shape is not None:
+            xs, ys, zs = downsample(xs, ys, zs, max_shape)
+        return xs, ys, zs
+
+    def get_heatmap(self, node: MathNode, exclusion: list, variables: tuple, xlim: tuple, ylim: tuple,
+                    label: str, max_shape=(100, 100), **kwargs):
+        # the grid of draw_heatmap as json data for the browser to draw, block means of at most max_shape.
+        # z is a list of rows from ylim[0] up, undefined points are null, zlim is null when none is defined
+        xs, ys, zs = self.get_grid(node, exclusion, variables, xlim, ylim, max_shape=max_shape, **kwargs)
+        zlim = self._get_zlim(zs)
+        return {'label': label, 'variables': list(variables),
+                'xlim': [float(xlim[0]), float(xlim[1])], 'ylim': [float(ylim[0]), float(ylim[1])],
+                'zlim': None if zlim is None else [float(zlim[0]), float(zlim[1])],
+                'x': _json_values(xs), 'y': _json_values(ys), 'z': [_json_values(row) for row in zs]}
+
+    def _get_zlim(self, zs):
+        zlim = self._get_ylim(zs[np.isfinite(zs)].tolist())
+        if zlim is None:
+            return None
+        # never wider than the values themselves
+        finite = zs[np.isfinite(zs)]
+        return max(zlim[0], float(finite.min())), min(zlim[1], float(finite.max()))
+
+    def _grid_axes(self, variables: tuple, fig=None, ax=None):
+        if fig is None and ax is None:
+            fig, ax = plt.subplots()
+            ax.set_xlabel(variables[0])
+            ax.set_ylabel(variables[1])
+        assert isinstance(fig, plt.Figure)
+        assert isinstance(ax, plt.Axes)
+        return fig, ax
+
+    def draw_heatmap(self, node: MathNode, exclusion: list, variables: tuple, xlim: tuple, ylim: tuple,
+                     label: str, fig=None, ax=None, **kwargs):
+        xs, ys, zs = self.get_grid(node, exclusion, variables, xlim, ylim, **kwargs)
+        fig, ax = self._grid_axes(variables, fig, ax)
+
+        zlim = self._get_zlim(zs) or (None, None)
+        image = ax.imshow(np.ma.masked_invalid(zs), origin='lower', aspect='auto',
+                          extent=(xlim[0], xlim[1], ylim[0], ylim[1]), vmin=zlim[0], vmax=zlim[1])
+        fig.colorbar(image, ax=ax, label=label)
+        return fig, ax, zs
+
+    def draw_contour(self, node: MathNode, exclusion: list, variables: tuple, xlim: tuple, ylim: tuple,
+                     label: str, fig=None, ax=None, levels=15, **kwargs):
+        xs, ys, zs = self.get_grid(node, exclusion, variables, xlim, ylim, **kwargs)
+        fig, ax = self._grid_axes(variables, fig, ax)
 
+        zlim = self._get_zlim(zs)
+        if zlim is not None and zlim[0] < zlim[1]:
+            levels = np.linspace(zlim[0], zlim[1], levels)
+            lines = ax.contour(xs, ys, np.ma.masked_invalid(zs), levels=levels, colors='k', linewidths=0.6)
+            ax.clabel(lines, fontsize=6)
+        ax.set_title(label)
+        return fig, ax, zs
 
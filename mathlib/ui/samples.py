@@ -0,0 +1,148 @@
+from mathlib.core.node import MathNode
+
+import math
+import collections
+import threading
+import numpy as np
+
+
+# sampled curves of `Plotter._get_points`, least recently used first out once the arrays take more than max_bytes.
+# a range inside a cached one is cut from it while the cut keeps at least min_density of the points it would sample
+class SampleCache:
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, min_density=0.5):
+        self.max_bytes = max_bytes
+        self.min_density = min_density
+        self.nbytes = 0
+        self.entries = collections.OrderedDict()
+        self.ranges = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # each process starts with an empty cache of its own
+        state = self.__dict__.copy()
+        del state['lock']
+        state['entries'], state['ranges'], state['nbytes'] = collections.OrderedDict(), {}, 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(node: MathNode, exclusion: list, var: str, conditions: dict, params: tuple):
+        return repr(node), repr(exclusion), var, tuple(sorted(conditions.items())), params
+
+    def get(self, key: tuple, lim: tuple, points: int):
+        with self.lock:
+            entry = self.entries.get((key, lim))
+            if entry is not None:
+                self.entries.move_to_end((key, lim))
+                return entry
+
+            l, r = lim
+            for _l, _r in self.ranges.get(key, []):
+                if not _l <= l < r <= _r:
+                    continue
+                xs, ys = self.entries[(key, (_l, _r))]
+                inside = (xs >= l) & (xs <= r)
+                if np.count_nonzero(inside) >= self.min_density * points:
+                    self.entries.move_to_end((key, (_l, _r)))
+                    return xs[inside], ys[inside]
+        return None
+
+    def put(self, key: tuple, lim: tuple, xs: np.ndarray, ys: np.ndarray):
+        size = xs.nbytes + ys.nbytes
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if (key, lim) in self.entries:
+                return
+            self.entries[(key, lim)] = xs, ys
+            self.ranges.setdefault(key, []).append(lim)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                (_key, _lim), (_xs, _ys) = self.entries.popitem(last=False)
+                self.nbytes -= _xs.nbytes + _ys.nbytes
+                self.ranges[_key].remove(_lim)
+                if len(self.ranges[_key]) == 0:
+                    del self.ranges[_key]
+
+
+# samples of fixed x-ranges, map-tile style: tiles of zoom level z are 2^z wide and start at multiples of
+# their width. a view is shown with the level that puts tiles_per_view to twice as many tiles over it,
+# so panning samples only the tiles it brings in, and zooming within a level only those at the edges
+class TileCache(SampleCache):
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, tile_points=250, tiles_per_view=4):
+        super().__init__(max_bytes, min_density=1.0)
+        self.tile_points = tile_points
+        self.tiles_per_view = tiles_per_view
+
+    def level(self, lim: tuple):
+        l, r = lim
+        return math.floor(math.log2((r - l) / self.tiles_per_view))
+
+    def tiles(self, lim: tuple):
+        # [((level, index), (left, right))] of the tiles over the range
+        l, r = lim
+        level = self.level(lim)
+        width = 2.0 ** level
+        first, last = math.floor(l / width), math.ceil(r / width)
+        return [((level, k), (k * width, (k + 1) * width)) for k in range(first, max(last, first + 1))]
+
+
+def lttb(xs, ys, n: int):
+    # largest-triangle-three-buckets down to about n points. each finite run between nan breaks is
+    # downsampled alone with its share of n, and one nan is kept between runs so that poles stay open
+    xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+    if len(xs) <= n:
+        return xs, ys
+
+    finite = np.isfinite(ys)
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], finite, [False]]).astype(np.int8)))
+    runs = list(zip(edges[::2], edges[1::2]))
+    if len(runs) == 0:
+        return xs[:1], ys[:1]
+
+    # the breaks and runs too short to downsample are kept whole, the longer runs share the rest of n
+    sizes = [b - a for a, b in runs]
+    fixed = len(runs) - 1 + sum(x for x in sizes if x <= 2)
+    total = sum(x for x in sizes if x > 2)
+    budget = max(n - fixed, 0)
+    out_x, out_y = [], []
+    for i, (a, b) in enumerate(runs):
+        if i > 0:
+            # a nan between the runs, at the last break before this one
+            out_x.append(xs[a - 1:a])
+            out_y.append(np.array([math.nan]))
+        k = b - a if b - a <= 2 else max(2, budget * (b - a) // total)
+        x, y = _lttb(xs[a:b], ys[a:b], k)
+        out_x.append(x)
+        out_y.append(y)
+    return np.concatenate(out_x), np.concatenate(out_y)
+
+
+def _lttb(xs, ys, n: int):
+    if len(xs) <= n or n < 3:
+        return (xs, ys) if len(xs) <= n else (xs[[0, -1]], ys[[0, -1]])
+
+    # the first and last points are kept, the rest falls into n - 2 buckets
+    bounds = np.linspace(1, len(xs) - 1, n - 1).astype(int)
+    index = np.empty(n, dtype=int)
+    index[0], index[-1] = 0, len(xs) - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        # the next bucket is represented by its mean, the last one by the last point
+        if i + 2 < n - 1:
+            nx, ny = xs[hi:bounds[i + 2]].mean(), ys[hi:bounds[i + 2]].mean()
+        else:
+            nx, ny = xs[-1], ys[-1]
+        area = np.abs((xs[a] - nx) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (ny - ys[a]))
+        a = lo + int(np.argmax(area))
+        index[i + 1] = a
+    return xs[index], ys[index]
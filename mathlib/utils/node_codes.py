@@ -0,0 +1,16 @@
+import struct
+
+
+# operation codes of the flat node formats, the rows of `ArrayTree` and the node table of `mathlib.io.binary`
+OP_RAW, OP_NUM, OP_VAR, OP_TERM, OP_FACTOR, OP_POLY, OP_EXPO, OP_LOG, OP_TRI = range(9)
+
+double = struct.Struct('<d')
+
+
+def constant_key(c):
+    # 1 and 1.0 are different constants, so are 0.0 and -0.0
+    return (int, c) if c.__class__ is int else (float, double.pack(c))
+
+
+if __name__ == '__main__':
+    pass
@@ -3,11 +3,12 @@ import math
 import functools
 
 from mathlib.core.node import *
+from mathlib.utils.visitor import *
 
 
 def is_negative(node: MathNode):
     if isinstance(node, FactorNode):
-        return node.coef[0] / node.coef[1] < 0
+        return node.coef.sign() < 0
     if isinstance(node, NumNode):
         return node.value < 0
     return False
@@ -32,24 +33,172 @@ def compare_dim(a: MathNode, b: MathNode):
     return da - db, da - db
 
 
-def get_unique_vars(node: MathNode):
-    if isinstance(node, TermNode):
+class _VarCollector(NodeVisitor):
+
+    def visit_TermNode(self, node: TermNode):
         ans = set()
         for x in node.factors:
-            ans.update(get_unique_vars(x))
+            ans.update(self.visit(x))
         return ans
-    if isinstance(node, FactorNode):
+
+    def visit_FactorNode(self, node: FactorNode):
         ans = set()
         for x in node.numerator + node.denominator:
-            ans.update(get_unique_vars(x))
+            ans.update(self.visit(x))
         return ans
-    if node.__class__ in [PolyNode, TriNode]:
-        return get_unique_vars(node.body)
-    if node.__class__ in [ExpoNode, LogNode]:
-        return get_unique_vars(node.base).union(get_unique_vars(node.body))
-    if isinstance(node, VarNode):
+
+    def visit_PolyNode(self, node: PolyNode):
+        return self.visit(node.body)
+
+    visit_TriNode = visit_PolyNode
+
+    def visit_ExpoNode(self, node: ExpoNode):
+        return self.visit(node.base).union(self.visit(node.body))
+
+    visit_LogNode = visit_ExpoNode
+
+    def visit_VarNode(self, node: VarNode):
         return {node.name}
-    return set()
+
+    def visit_default(self, node):
+        return set()
+
+
+_var_collector = _VarCollector()
+
+
+def get_unique_vars(node: MathNode):
+    return _var_collector.visit(node)
+
+
+def constant_node(coef: Coef):
+    # exact fractions stay as a bare coefficient, NumNode would turn them into floats
+    if coef.is_fraction():
+        return FactorNode([], [], coef)
+    return NumNode(coef.value)
+
+
+class _NodeCounter(NodeVisitor):
+
+    def visit_default(self, node):
+        return 1 + sum(self.visit(x) for x in node_children(node))
+
+
+class _OpCounter(NodeVisitor):
+    # operations to evaluate the node once, a sign is part of the addition it is in
+
+    def visit_TermNode(self, node: TermNode):
+        return max(len(node.factors) - 1, 0) + sum(self.visit(x) for x in node.factors)
+
+    def visit_FactorNode(self, node: FactorNode):
+        factors = node.numerator + node.denominator
+        scaled = len(factors) > 0 and node.coef not in [(1, 1), (-1, 1)]
+        return max(len(factors) - 1, 0) + scaled + sum(self.visit(x) for x in factors)
+
+    def visit_PolyNode(self, node: PolyNode):
+        return (node.dim != 1) + self.visit(node.body)
+
+    def visit_TriNode(self, node: TriNode):
+        return 1 + self.visit(node.body)
+
+    def visit_ExpoNode(self, node: ExpoNode):
+        return 1 + self.visit(node.base) + self.visit(node.body)
+
+    visit_LogNode = visit_ExpoNode
+
+    def visit_default(self, node):
+        return 0
+
+
+_node_counter = _NodeCounter()
+_op_counter = _OpCounter()
+
+
+def count_nodes(node: MathNode):
+    return _node_counter.visit(node)
+
+
+def count_ops(node: MathNode):
+    return _op_counter.visit(node)
+
+
+class IdTable:
+    # indices of node objects by identity. it keeps a reference to every node, so that its id is not reused
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, node):
+        entry = self.entries.get(id(node))
+        return None if entry is None else entry[1]
+
+    def put(self, node, idx: int):
+        self.entries[id(node)] = node, idx
+        return idx
+
+
+class NodeInterner(NodeVisitor):
+
+    dispatch = ('_signature_',)
+
+    def __init__(self):
+        self.table = {}
+        self.keys = IdTable()
+        self.nodes = []
+        self.signatures = []
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def intern(self, node) -> int:
+        idx = self.keys.get(node)
+        if idx is not None:
+            return idx
+
+        sig = self.signature(node)
+        idx = self.table.get(sig)
+        if idx is None:
+            # children are interned while building the signature,
+            # so every node is listed after all of its children
+            idx = self.table[sig] = len(self.nodes)
+            self.nodes.append(node)
+            self.signatures.append(sig)
+        return self.keys.put(node, idx)
+
+    def signature(self, node):
+        return self._signature_table[node.__class__](self, node)
+
+    def _signature_number(self, node):
+        return node.__class__, node
+
+    def _signature_TermNode(self, node: TermNode):
+        return TermNode, tuple(self.intern(x) for x in node.factors)
+
+    def _signature_FactorNode(self, node: FactorNode):
+        return FactorNode, tuple(node.coef), \
+               tuple(self.intern(x) for x in node.numerator), \
+               tuple(self.intern(x) for x in node.denominator)
+
+    def _signature_PolyNode(self, node: PolyNode):
+        return PolyNode, node.dim, self.intern(node.body)
+
+    def _signature_ExpoNode(self, node: ExpoNode):
+        return ExpoNode, self.intern(node.base), self.intern(node.body)
+
+    def _signature_LogNode(self, node: LogNode):
+        return LogNode, self.intern(node.base), self.intern(node.body)
+
+    def _signature_TriNode(self, node: TriNode):
+        return TriNode, node.func, self.intern(node.body)
+
+    def _signature_VarNode(self, node: VarNode):
+        return VarNode, node.name
+
+    def _signature_NumNode(self, node: NumNode):
+        return NumNode, node.value.__class__, node.value
+
+    def _signature_default(self, node):
+        raise TypeError('cannot intern {}'.format(node.__class__.__name__))
 
 
 if __name__ == '__main__':
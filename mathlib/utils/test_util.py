@@ -6,13 +6,27 @@ from mathlib.core.calculator import *
 from mathlib.ui.plot import *
 
 
-def notation_test(string):
-    l = Lexer('../mathlib/io/lexer_grammar')
-    p = Parser('../mathlib/io/parser_grammar', l)
+# the grammars as seen from the unittest directory, where the tests run
+lexer_grammar = '../mathlib/io/lexer_grammar'
+parser_grammar = '../mathlib/io/parser_grammar'
+
+
+def parse(string):
+    l = Lexer(lexer_grammar)
+    p = Parser(parser_grammar, l)
+    return p.parse(l.stream(string))
+
+
+def build(string, budget: Budget=None):
+    return NodeBuilder(budget).build(parse(string))
+
+
+def canonical(string, budget: Budget=None):
+    return NodeSimplifier(budget).canonicalize(build(string, budget))
 
-    tree = p.parse(l.stream(string))
 
-    n = NodeBuilder().build(tree)
+def notation_test(string):
+    n = build(string)
     print('Received:\n\t{}\n\t{}'.format(repr(n), n))
     s, e = NodeSimplifier().canonicalize(n)
     print('\nCanonicalize:\n\t{}\n\t{}'.format(repr(s), s))
@@ -23,12 +37,7 @@ def notation_test(string):
 
 
 def calculation_test(string, **kwargs):
-    l = Lexer('../mathlib/io/lexer_grammar')
-    p = Parser('../mathlib/io/parser_grammar', l)
-
-    tree = p.parse(l.stream(string))
-
-    n = NodeBuilder().build(tree)
+    n = build(string)
     s, e = NodeSimplifier().canonicalize(n)
     c = Calculator()
     print('Result of {}: {}'.format(', '.join([
@@ -38,12 +47,7 @@ def calculation_test(string, **kwargs):
 
 
 def derivation_test(string, var):
-    l = Lexer('../mathlib/io/lexer_grammar')
-    p = Parser('../mathlib/io/parser_grammar', l)
-
-    tree = p.parse(l.stream(string))
-
-    n = NodeBuilder().build(tree)
+    n = build(string)
     s, e = NodeSimplifier().canonicalize(n)
     c = Calculator()
 
@@ -56,12 +60,7 @@ def derivation_test(string, var):
 
 
 def plot_test(string, var, lim, **kwargs):
-    l = Lexer('../mathlib/io/lexer_grammar')
-    p = Parser('../mathlib/io/parser_grammar', l)
-
-    tree = p.parse(l.stream(string))
-
-    n = NodeBuilder().build(tree)
+    n = build(string)
     s, e = NodeSimplifier().canonicalize(n)
     p = Plotter()
     p.plot(s, e, var, lim, **kwargs)
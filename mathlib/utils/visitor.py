@@ -0,0 +1,98 @@
+from mathlib.core.node import *
+
+
+node_classes = [TermNode, FactorNode, PolyNode, ExpoNode, LogNode, TriNode, VarNode, NumNode]
+
+_children = {
+    TermNode: lambda n: n.factors,
+    FactorNode: lambda n: n.numerator + n.denominator,
+    PolyNode: lambda n: [n.body],
+    ExpoNode: lambda n: [n.base, n.body],
+    LogNode: lambda n: [n.base, n.body],
+    TriNode: lambda n: [n.body],
+}
+
+
+def node_children(node):
+    f = _children.get(node.__class__)
+    return f(node) if f is not None else []
+
+
+# maps a node class to the handler `prefix + ClassName` of a visitor class, bare int and
+# float values go to `prefix + 'number'` and any other class to `prefix + 'default'`
+class DispatchTable(dict):
+
+    def __init__(self, cls, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+        for c in node_classes:
+            f = getattr(cls, prefix + c.__name__, None)
+            if f is not None:
+                self[c] = f
+        f = getattr(cls, prefix + 'number', None)
+        if f is not None:
+            self[int] = self[float] = f
+        self.default = getattr(cls, prefix + 'default', None)
+
+    def __missing__(self, cls):
+        for base in cls.__mro__[1:]:
+            if base in self:
+                f = self[cls] = self[base]
+                return f
+        if self.default is None:
+            raise TypeError('no {} handler for {}'.format(self.prefix.strip('_'), cls.__name__))
+        f = self[cls] = self.default
+        return f
+
+
+# every prefix in `dispatch` gets a table `prefix + 'table'` built once per subclass,
+# so a visit costs one dict lookup instead of a chain of isinstance checks
+class NodeVisitor:
+
+    dispatch = ('visit_',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for prefix in cls.dispatch:
+            setattr(cls, prefix + 'table', DispatchTable(cls, prefix))
+
+    def visit(self, node, *args, **kwargs):
+        return self.visit_table[node.__class__](self, node, *args, **kwargs)
+
+
+# a bottom-up analysis, `combine_` handlers get a node with the results of its children
+# in the order of `node_children`
+class NodeAnalysis(NodeVisitor):
+
+    dispatch = ('combine_',)
+
+    def run(self, node):
+        return FusedAnalysis(self).run(node)[0]
+
+
+# runs several analyses in one traversal, shared subtrees are visited once
+class FusedAnalysis:
+
+    def __init__(self, *analyses: NodeAnalysis):
+        self.analyses = analyses
+        self.handlers = [(x, x.combine_table) for x in analyses]
+
+    def run(self, node):
+        return self._run(node, {})
+
+    def _run(self, node, memo: dict):
+        k = id(node)
+        if k in memo:
+            return memo[k][1]
+
+        children = [self._run(x, memo) for x in node_children(node)]
+        cls = node.__class__
+        results = tuple(table[cls](analysis, node, [c[i] for c in children])
+                        for i, (analysis, table) in enumerate(self.handlers))
+        # keep a reference to the node so that its id is not reused
+        memo[k] = node, results
+        return results
+
+
+if __name__ == '__main__':
+    pass
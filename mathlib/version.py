@@ -0,0 +1,5 @@
+__version__ = '0.1.0'
+
+# bumped whenever canonical forms or the binary node format change,
+# so caches of forms written by an older revision are not read
+__form_revision__ = 1
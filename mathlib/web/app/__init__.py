@@ -1,3 +1,3 @@
 from .routes import *
 
-__all__ = ['math_app', 'home']
+__all__ = ['math_app', 'home', 'PipelineExecutor']
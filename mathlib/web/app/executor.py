@@ -0,0 +1,227 @@
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class ServerBusy(RuntimeError):
+    pass
+
+
+class PipelineTimeout(TimeoutError):
+    pass
+
+
+def _serve(conn, initializer, initargs):
+    # the loop of a worker process: (fn, args) in, (True, result) or (False, error) out, None to stop
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        fn, args = job
+        try:
+            result = True, fn(*args)
+        except Exception as e:
+            result = False, e
+        try:
+            conn.send(result)
+        except Exception as e:
+            # the result or the error does not pickle
+            conn.send((False, RuntimeError('cannot send the result: {!r}'.format(e))))
+
+
+def _produce(items: queue.Queue, deadline: float, fn, args):
+    # runs in a worker: the items of fn(*args) as (True, item), then (False, None).
+    # the generator is left between two items when the time of the stream is up
+    try:
+        for item in fn(*args):
+            items.put((True, item))
+            if time.time() > deadline:
+                break
+    finally:
+        items.put((False, None))
+
+
+# a process forked while another one starts would keep the child end of its pipe open,
+# and the stop of that worker would never reach its connection
+_start_lock = threading.Lock()
+
+
+class _Worker:
+
+    def __init__(self, initializer, initargs):
+        with _start_lock:
+            self.conn, child = multiprocessing.Pipe()
+            self.process = multiprocessing.Process(target=_serve, args=(child, initializer, initargs), daemon=True)
+            self.process.start()
+            child.close()
+
+    def stop(self):
+        self.process.terminate()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+
+class _Job:
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.lock = threading.Lock()
+        self.worker = None
+        self.stopped = False
+
+
+# a job runs in one of `workers` long-lived processes. a job which runs over its time is stopped
+# with its own process, a new process takes its place, and the jobs of the other workers go on
+class PipelineExecutor:
+
+    def __init__(self, workers=2, max_pending=8, timeout=10.0, initializer=None, initargs=()):
+        if workers < 1 or max_pending < workers:
+            raise ValueError('invalid pool size: {} workers, {} pending'.format(workers, max_pending))
+
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        self.lock = threading.Lock()
+        # one thread per worker hands it the jobs, the processes start with their first job
+        self.dispatcher = ThreadPoolExecutor(max_workers=workers)
+        self.idle = queue.LifoQueue()
+        for _ in range(workers):
+            self.idle.put(None)
+        self.running = set()
+        # the queues of streams, started with the first one
+        self.manager = None
+        # a slot is held from submission until the worker is done with the job,
+        # so jobs which outlive their request still count against the queue
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args):
+        return self._submit(fn, *args)[1]
+
+    def _submit(self, fn, *args):
+        # (job, its future)
+        if not self.slots.acquire(blocking=False):
+            raise ServerBusy('{} jobs are already pending'.format(self.max_pending))
+        job = _Job(fn, args)
+        try:
+            future = self.dispatcher.submit(self._execute, job)
+        except BaseException:
+            self.slots.release()
+            raise
+        # a job which runs gives back its slot itself, before its future is done
+        future.add_done_callback(lambda f: f.cancelled() and self.slots.release())
+        return job, future
+
+    def _execute(self, job: _Job):
+        worker = self.idle.get()
+        try:
+            with job.lock:
+                if job.stopped:
+                    raise PipelineTimeout('stopped before it started')
+                if worker is None:
+                    worker = _Worker(self.initializer, self.initargs)
+                job.worker = worker
+            with self.lock:
+                self.running.add(job)
+            worker.conn.send((job.fn, job.args))
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            # the process was stopped, or it died with the job
+            if worker is not None:
+                worker.process.join()
+                worker.conn.close()
+                worker = None
+            raise PipelineTimeout('the worker was stopped')
+        finally:
+            # the worker may take another job from here on, stopping this one must not reach it
+            with job.lock:
+                job.worker = None
+            with self.lock:
+                self.running.discard(job)
+            self.idle.put(worker)
+            self.slots.release()
+        if not ok:
+            raise value
+        return value
+
+    def _stop(self, job: _Job, future):
+        # a job which waits is cancelled, a running one is stopped with its process
+        if future.cancel():
+            return
+        with job.lock:
+            job.stopped = True
+            if job.worker is not None:
+                job.worker.stop()
+        # the slot and the worker are free again before the request is answered
+        future.exception()
+
+    def run(self, fn, *args, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        job, future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            self._stop(job, future)
+            raise PipelineTimeout('no result in {} seconds'.format(timeout))
+
+    def stream(self, fn, *args, timeout=None):
+        # the items of the generator fn(*args) as the worker produces them. the job is submitted here,
+        # so ServerBusy comes before the first item, and the whole stream has the time of one job
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            if self.manager is None:
+                with _start_lock:
+                    self.manager = multiprocessing.Manager()
+            items = self.manager.Queue()
+        deadline = time.time() + timeout
+        job, future = self._submit(_produce, items, deadline, fn, args)
+        return self._receive(items, deadline, job, future, timeout)
+
+    def _receive(self, items, deadline, job, future, timeout):
+        try:
+            while True:
+                try:
+                    more, item = items.get(timeout=max(deadline - time.time(), 0))
+                except queue.Empty:
+                    raise PipelineTimeout('no result in {} seconds'.format(timeout))
+                if not more:
+                    # the error of the job, if it failed
+                    future.result()
+                    return
+                yield item
+        finally:
+            # nobody reads the rest when the stream ends early
+            if not future.done():
+                self._stop(job, future)
+
+    def shutdown(self, wait=True):
+        if not wait:
+            with self.lock:
+                running = list(self.running)
+            for job in running:
+                with job.lock:
+                    job.stopped = True
+                    if job.worker is not None:
+                        job.worker.stop()
+        self.dispatcher.shutdown(wait=wait, cancel_futures=True)
+        while not self.idle.empty():
+            worker = self.idle.get()
+            if worker is not None:
+                worker.close()
+                if wait:
+                    worker.process.join()
+        with self.lock:
+            if self.manager is not None:
+                self.manager.shutdown()
+                self.manager = None
@@ -0,0 +1,261 @@
+from mathlib.core.node import *
+from mathlib.utils.node_util import *
+from mathlib.core.budget import BudgetExceeded
+
+import json
+import itertools
+
+
+def get_condition_dict(components: dict, conditions: str):
+    calculator = components['calculator']
+
+    strip = lambda x: x.strip()
+    conds = list(map(strip, conditions.split(',')))
+    cond_dict = {}
+    for c in conds:
+        if '=' not in c:
+            continue
+        a, b = map(strip, c.split('='))
+
+        f, e, _ = canonical_form(components, b)
+        b = calculator.eval(f, e)
+
+        cond_dict[a] = float(b)
+    return cond_dict
+
+
+def cache_key(tokens):
+    # the token sequence is the notation up to spacing that the lexer ignores
+    return ' '.join(tokens[0])
+
+
+def canonical_form(components: dict, notation: str):
+    # (canonical tree, exclusion, variables), from the cache when one is configured
+    lexer = components['lexer']
+    parser = components['parser']
+    builder = components['builder']
+    simplifier = components['simplifier']
+    cache = components.get('cache')
+
+    tokens = lexer.tokenize(notation)
+    key = cache_key(tokens)
+    if cache is not None:
+        form = cache.get(key)
+        if form is not None:
+            return form
+
+    tree = parser.parse(lexer.stream(tokens))
+    tree = builder.build(tree)
+    fx, ex = simplifier.canonicalize(tree)
+    ex = dedup_exclusion(ex)
+    variables = get_unique_vars(tree)
+
+    if cache is not None:
+        cache.put(key, fx, ex, variables)
+    return fx, ex, variables
+
+
+def derivative(components: dict, notation: str, fx: MathNode, ex: list, var: str):
+    calculator = components['calculator']
+    cache = components.get('cache')
+    if cache is None:
+        return calculator.derivate(fx, list(ex), var)
+
+    key = cache_key(components['lexer'].tokenize(notation))
+    form = cache.get_derivative(key, var)
+    if form is None:
+        form = calculator.derivate(fx, list(ex), var)
+        cache.put_derivative(key, var, *form)
+    return form
+
+
+def dedup_exclusion(exclusion):
+    _exclusion = []
+    for ex in exclusion:
+        if ex in _exclusion:
+            continue
+        _exclusion.append(ex)
+    return _exclusion
+
+
+def exclusion_nodes(exclusion):
+    nodes = []
+    for ex in exclusion:
+        for e in ex:
+            nodes.append(e[0])
+            if len(e) == 5:
+                nodes.append(e[2])
+    return nodes
+
+
+def print_exclusion(exclusion, rendered):
+    cmp_dict = {
+        '==': '=', '!=': '\\ne', '<=': '\\leq', '>=': '\\geq',
+        'not': '\\notin', 'is': '\\in'
+    }
+    domain_dict = {int: '\\mathbb{Z}', float: '\\mathbb{R}'}
+
+    ex_latex = []
+    for ex in exclusion:
+        tmp = []
+        for e in ex:
+            a, op, m, cmp, b = [None] * 5
+            if len(e) == 3:
+                a, cmp, b = e
+                a = rendered(a)
+            if len(e) == 5:
+                a, op, m, cmp, b = e
+                a = rendered(a)
+                if op == '%':
+                    a = '{{{}}} \\mod {{{}}}'.format(a, rendered(m))
+            if cmp in cmp_dict:
+                cmp = cmp_dict[cmp]
+            if b in domain_dict:
+                b = domain_dict[b]
+
+            tmp.append('{{{}}} {} {}'.format(a, cmp, b))
+
+        ex_latex.append('$$ {} $$'.format(', \\;'.join(tmp)))
+
+    return ex_latex
+
+
+def render_all(latex, nodes):
+    # render every tree of the request at once so that shared subtrees
+    # are generated only once
+    outputs = latex.generate_all(nodes)
+    table = {id(n): s for n, s in zip(nodes, outputs)}
+    return lambda n: table[id(n)]
+
+
+def analyze(components: dict, notation: str, conditions: str, lim: tuple, stream=False):
+    calculator = components['calculator']
+    plotter = components['plotter']
+    latex = components['latex']
+    text = components['text']
+
+    conditions = get_condition_dict(components, conditions)
+
+    fx, ex, var_not = canonical_form(components, notation)
+    var_cond = {k for k in conditions.keys()}
+    var_left = var_not.difference(var_cond)
+
+    if len(var_left) > 2:
+        return {}, 'Not enough variables are given'
+
+    if len(var_left) == 2:
+        variables = tuple(sorted(var_left))
+        partials = [derivative(components, notation, fx, ex, v) for v in variables]
+
+        nodes = [fx] + [d for d, _ in partials] + exclusion_nodes(ex)
+        rendered = render_all(latex, nodes)
+
+        # drawn by the page from the block means of the grid, no figure is rendered here
+        graph = plotter.get_heatmap(fx, ex, variables, lim, lim, 'f({})'.format(', '.join(variables)), **conditions)
+
+        result = {'notation': '$$ {} $$'.format(rendered(fx)),
+                  'string': text.generate(fx)}
+        for v, (d, _) in zip(variables, partials):
+            result['derivative ({})'.format(v)] = '$$ {} $$'.format(rendered(d))
+        result['Graph'] = graph
+        result['exclusion'] = print_exclusion(ex, rendered)
+        return result, None
+
+    if len(var_left) == 1:
+        var = list(var_left)[0]
+        dfx, dex = derivative(components, notation, fx, ex, var)
+
+        rendered = render_all(latex, [fx, dfx] + exclusion_nodes(ex) + exclusion_nodes(dex))
+        fx_text, dfx_text = text.generate_all([fx, dfx])
+
+        if stream:
+            # the page gets the points from `stream_plot` instead
+            graph = {'stream': var}
+        else:
+            # drawn by the page from the sampled points, no figure is rendered here
+            curve, values = plotter.get_curve(fx, ex, var, lim, 'f({})'.format(var), **conditions)
+            dcurve, _ = plotter.get_curve(dfx, dex, var, lim, 'f\'({})'.format(var), values=values, **conditions)
+            graph = {'xlim': [float(lim[0]), float(lim[1])], 'ylim': dcurve['ylim'], 'curves': [curve, dcurve]}
+
+        result = {'notation': '$$ {} $$'.format(rendered(fx)),
+                  'string': fx_text,
+                  'derivative': '$$ {} $$'.format(rendered(dfx)),
+                  'string (derivative)': dfx_text,
+                  'Graph': graph,
+                  'exclusion': print_exclusion(ex, rendered),
+                  'exclusion (derivative)': print_exclusion(dex, rendered)}
+        return result, None
+
+    # go to eval mode
+    answer = calculator.eval(fx, ex, **conditions)
+    rendered = render_all(latex, [fx] + exclusion_nodes(ex))
+
+    result = {'notation': '$$ {} $$'.format(rendered(fx)),
+              'string': text.generate(fx),
+              'evaluation': answer,
+              'exclusion': print_exclusion(ex, rendered)}
+    return result, None
+
+
+def event(name: str, data):
+    return 'event: {}\ndata: {}\n\n'.format(name, json.dumps(data, allow_nan=False))
+
+
+def stream_plot(components: dict, notation: str, conditions: str, lim: tuple):
+    # server-sent events with the curves of f and f': `start` with the ranges, then `batch`es of
+    # Plotter.stream_curve, the coarse passes of both curves first, and `done`
+    plotter = components['plotter']
+    try:
+        conditions = get_condition_dict(components, conditions)
+        fx, ex, var_not = canonical_form(components, notation)
+        var_left = var_not.difference(conditions.keys())
+        if len(var_left) != 1:
+            yield event('error', {'message': 'A curve needs exactly one free variable'})
+            return
+
+        var = list(var_left)[0]
+        dfx, dex = derivative(components, notation, fx, ex, var)
+        curves = [plotter.stream_curve(fx, ex, var, lim, 'f({})'.format(var), **conditions),
+                  plotter.stream_curve(dfx, dex, var, lim, 'f\'({})'.format(var), **conditions)]
+
+        coarse = [next(c) for c in curves]
+        # the range of f' inside the range of f, as draw_plot does
+        (a, b), (c, d) = coarse[0]['ylim'], coarse[1]['ylim']
+        ylim = [max(a, c), min(b, d)] if max(a, c) < min(b, d) else [a, b]
+        yield event('start', {'xlim': [float(lim[0]), float(lim[1])], 'ylim': ylim,
+                              'labels': [x['label'] for x in coarse]})
+
+        for i, batch in enumerate(coarse):
+            yield event('batch', dict(batch, curve=i))
+        for batches in itertools.zip_longest(*curves):
+            for i, batch in enumerate(batches):
+                if batch is not None:
+                    yield event('batch', dict(batch, curve=i))
+        yield event('done', {})
+    except BudgetExceeded as e:
+        yield event('error', {'message': 'Calculation is too expensive: {}'.format(e)})
+    except Exception:
+        # the response has started, the error handlers of the app cannot answer anymore
+        yield event('error', {'message': 'Calculation failed!'})
+
+
+# components of a pool worker, set once by `init_worker` in each process
+_worker_components = None
+
+
+def init_worker(components: dict):
+    global _worker_components
+    _worker_components = components
+
+
+def analyze_in_worker(notation: str, conditions: str, lim: tuple, stream=False):
+    if _worker_components is None:
+        raise RuntimeError('worker is not initialized')
+    return analyze(_worker_components, notation, conditions, lim, stream)
+
+
+def stream_in_worker(notation: str, conditions: str, lim: tuple):
+    # the events of `stream_plot` with the components, cache and canonical forms of the worker
+    if _worker_components is None:
+        raise RuntimeError('worker is not initialized')
+    yield from stream_plot(_worker_components, notation, conditions, lim)
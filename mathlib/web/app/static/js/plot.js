@@ -0,0 +1,153 @@
+// draws the curves of a graph from Plotter.get_curve, null y values break a curve
+function drawPlot(canvas, graph) {
+    const ctx = canvas.getContext("2d");
+    const w = canvas.width, h = canvas.height, pad = 20;
+    const [x0, x1] = graph.xlim, [y0, y1] = graph.ylim;
+    const colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728"];
+
+    const px = x => pad + (x - x0) / (x1 - x0) * (w - 2 * pad);
+    const py = y => h - pad - (y - y0) / (y1 - y0) * (h - 2 * pad);
+    const clamp = v => Math.max(-h, Math.min(2 * h, v));
+
+    ctx.clearRect(0, 0, w, h);
+
+    // axes through zero, at the border when zero is out of view
+    ctx.strokeStyle = "#444";
+    ctx.lineWidth = 1;
+    ctx.beginPath();
+    const ax = px(Math.min(Math.max(0, x0), x1)), ay = py(Math.min(Math.max(0, y0), y1));
+    ctx.moveTo(pad, ay);
+    ctx.lineTo(w - pad, ay);
+    ctx.moveTo(ax, pad);
+    ctx.lineTo(ax, h - pad);
+    ctx.stroke();
+
+    ctx.save();
+    ctx.beginPath();
+    ctx.rect(pad, pad, w - 2 * pad, h - 2 * pad);
+    ctx.clip();
+    graph.curves.forEach((curve, i) => {
+        ctx.strokeStyle = colors[i % colors.length];
+        ctx.lineWidth = 2;
+        ctx.beginPath();
+        let open = false;
+        for (let k = 0; k < curve.x.length; k++) {
+            const y = curve.y[k];
+            if (y === null) {
+                open = false;
+                continue;
+            }
+            const X = px(curve.x[k]), Y = clamp(py(y));
+            if (open) {
+                ctx.lineTo(X, Y);
+            } else {
+                ctx.moveTo(X, Y);
+                open = true;
+            }
+        }
+        ctx.stroke();
+    });
+    ctx.restore();
+
+    ctx.font = "12px sans-serif";
+    ctx.textBaseline = "top";
+    graph.curves.forEach((curve, i) => {
+        ctx.fillStyle = colors[i % colors.length];
+        ctx.fillRect(w - pad - 70, pad + 4 + 16 * i, 14, 3);
+        ctx.fillStyle = "#444";
+        ctx.fillText(curve.label, w - pad - 50, pad + 16 * i);
+    });
+}
+
+
+// draws the grid of Plotter.get_heatmap, a cell of each value from dark to light over zlim, null cells stay blank
+function drawHeatmap(canvas, graph) {
+    const ctx = canvas.getContext("2d");
+    const w = canvas.width, h = canvas.height, pad = 40, bar = 20;
+    const [x0, x1] = graph.xlim, [y0, y1] = graph.ylim;
+    const nx = graph.x.length, ny = graph.y.length;
+    const right = w - pad - 3 * bar;
+
+    const px = x => pad + (x - x0) / (x1 - x0) * (right - pad);
+    const py = y => h - pad - (y - y0) / (y1 - y0) * (h - 2 * pad);
+    // viridis-like: dark blue, teal, yellow
+    const stops = [[68, 1, 84], [33, 145, 140], [253, 231, 37]];
+    const color = t => {
+        t = Math.max(0, Math.min(1, t)) * (stops.length - 1);
+        const i = Math.min(Math.floor(t), stops.length - 2), f = t - i;
+        const c = stops[i].map((v, k) => Math.round(v + (stops[i + 1][k] - v) * f));
+        return "rgb(" + c.join(",") + ")";
+    };
+
+    ctx.clearRect(0, 0, w, h);
+    if (graph.zlim !== null) {
+        const [z0, z1] = graph.zlim;
+        const dx = (right - pad) / nx, dy = (h - 2 * pad) / ny;
+        for (let i = 0; i < ny; i++) {
+            for (let j = 0; j < nx; j++) {
+                const z = graph.z[i][j];
+                if (z === null) continue;
+                ctx.fillStyle = color(z1 > z0 ? (z - z0) / (z1 - z0) : 0.5);
+                ctx.fillRect(pad + j * dx, h - pad - (i + 1) * dy, Math.ceil(dx), Math.ceil(dy));
+            }
+        }
+
+        // the colorbar with its range
+        for (let k = 0; k < h - 2 * pad; k++) {
+            ctx.fillStyle = color(k / (h - 2 * pad));
+            ctx.fillRect(right + bar, h - pad - k - 1, bar, 1);
+        }
+        ctx.fillStyle = "#444";
+        ctx.font = "12px sans-serif";
+        ctx.textAlign = "left";
+        ctx.fillText(z1.toPrecision(3), right + 2 * bar + 4, pad + 10);
+        ctx.fillText(z0.toPrecision(3), right + 2 * bar + 4, h - pad);
+    }
+
+    ctx.strokeStyle = "#444";
+    ctx.lineWidth = 1;
+    ctx.strokeRect(pad, pad, right - pad, h - 2 * pad);
+    ctx.fillStyle = "#444";
+    ctx.font = "12px sans-serif";
+    ctx.textAlign = "center";
+    ctx.fillText(graph.label, (pad + right) / 2, pad - 10);
+    ctx.fillText(graph.variables[0], (pad + right) / 2, h - pad + 28);
+    ctx.fillText(x0, px(x0), h - pad + 14);
+    ctx.fillText(x1, px(x1), h - pad + 14);
+    ctx.textAlign = "right";
+    ctx.fillText(graph.variables[1], pad - 20, h / 2);
+    ctx.fillText(y0, pad - 4, py(y0));
+    ctx.fillText(y1, pad - 4, py(y1) + 10);
+}
+
+// draws the curves of /stream as their batches come, a batch replaces the points of its range
+function streamPlot(canvas, url) {
+    const source = new EventSource(url);
+    let graph = null;
+
+    source.addEventListener("start", e => {
+        const data = JSON.parse(e.data);
+        graph = {xlim: data.xlim, ylim: data.ylim, curves: data.labels.map(label => ({label: label, x: [], y: []}))};
+    });
+    source.addEventListener("batch", e => {
+        const batch = JSON.parse(e.data);
+        const curve = graph.curves[batch.curve];
+        const [a, b] = batch.range;
+        let lo = 0;
+        while (lo < curve.x.length && curve.x[lo] < a) lo++;
+        let hi = lo;
+        while (hi < curve.x.length && curve.x[hi] <= b) hi++;
+        curve.x.splice(lo, hi - lo, ...batch.x);
+        curve.y.splice(lo, hi - lo, ...batch.y);
+        drawPlot(canvas, graph);
+    });
+    source.addEventListener("done", () => source.close());
+    source.addEventListener("error", e => {
+        source.close();
+        if (e.data) {
+            const ctx = canvas.getContext("2d");
+            ctx.fillStyle = "#444";
+            ctx.fillText(JSON.parse(e.data).message, 30, 30);
+        }
+    });
+}
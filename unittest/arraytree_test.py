@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.arraytree import *
+
+
+class ArrayTreeTest(unittest.TestCase):
+    def test_1(self):
+        for string in ['(x^2+1)^5/(x-1)', 'x*y+siny', 'tan(x)^x', 'logx_(x^2+1)', '3.5*x-2/3*x^2', '2^x*log2_x']:
+            s, e = canonical(string)
+            t = ArrayTree([s])
+            self.assertEqual(repr(s), repr(t.to_nodes()[0]))
+
+            xs = np.linspace(-3, 3, 61)
+            expected = ExpressionSet([s], planner=None).eval(x=xs, y=1.5)[0]
+            np.testing.assert_allclose(expected, t.eval(x=xs, y=1.5)[0], rtol=1e-12)
+
+    def test_2(self):
+        # equal subtrees are one row, converted back they are separate objects again
+        s, e = canonical('sin(x^2)+cos(x^2)*x^2')
+        t = ArrayTree([s, s])
+        self.assertEqual(1, len([i for i in range(len(t)) if t.ops[i] == OP_POLY]))
+        self.assertEqual(t.roots[0], t.roots[1])
+        a, b = t.to_nodes()
+        self.assertIsNot(a, b)
+        self.assertEqual({'x'}, t.variables())
+        self.assertEqual(count_nodes(s), t.tree_sizes()[t.roots[0]])
+        self.assertEqual([False, True], [t.depends_on('y').any(), t.depends_on('x')[t.roots[0]]])
+
+    def test_3(self):
+        xs = np.linspace(0.15, 2.95, 29)
+        for string in ['(x^2+1)^5/(x-1)', 'x*y+siny', 'tan(x)^x', 'e^(x*y)/y', 'logx_(x^2+1)',
+                       'sin(cos(x/pi))*e^(sinx)', 'x^x', 'cosx/(x^2-4)', '2^x*log2_x']:
+            s, e = canonical(string)
+            d, de = Calculator().derivate(s, list(e), 'x')
+            expected = ExpressionSet([d], planner=None).eval(x=xs, y=0.7)[0]
+            t = ArrayTree([s]).derivate('x')
+            np.testing.assert_allclose(expected, t.eval(x=xs, y=0.7)[0], rtol=1e-9)
+
+            # back to nodes, the simplifier gives the usual form
+            n, _ = NodeSimplifier().canonicalize(t.to_nodes()[0])
+            np.testing.assert_allclose(expected, ExpressionSet([n], planner=None).eval(x=xs, y=0.7)[0], rtol=1e-9)
+
+    def test_4(self):
+        s, e = canonical('y^2+3')
+        t = ArrayTree([s]).derivate('x')
+        self.assertEqual('Num(0)', repr(t.to_nodes()[0]))
+        self.assertRaises(ArithmeticError, ArrayTree([s]).eval, x=1)
+
+        # thousands of terms are a few flat arrays
+        big = TermNode([FactorNode([PolyNode(VarNode('x'), i % 37 + 1)], [], (i, 3)) for i in range(1, 5001)])
+        t = ArrayTree([big])
+        self.assertEqual(5000 + 37 + 2, len(t))
+        self.assertAlmostEqual(Calculator().eval(big, [], x=0.5), t.eval(x=0.5)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
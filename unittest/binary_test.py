@@ -0,0 +1,67 @@
+import unittest
+
+import pickle
+from mathlib.utils.test_util import *
+from mathlib.io.binary import *
+
+
+class BinaryTest(unittest.TestCase):
+    def test_1(self):
+        for string in ['(x^2+1)^5/(x-1)', 'x*y+siny', 'tan(x)^x', 'logx_(x^2+1)', '3.5*x-2/3*x^2', 'e^(x*y)/y']:
+            s, e = canonical(string)
+            d, de = Calculator().derivate(s, list(e), 'x')
+            value = [s, e, d, de]
+            data = dumps(value)
+            self.assertEqual(repr(value), repr(loads(data)))
+            self.assertEqual(data, dumps(loads(data)))
+            self.assertLess(len(data), len(pickle.dumps(value)))
+
+    def test_2(self):
+        # exact types and values of the operands are kept
+        s, e = canonical('1/3*x^2.5+2*x-0.5')
+        t = loads(dumps(s))
+        self.assertIs(Coef, t.factors[0].coef.__class__)
+        self.assertEqual([x.__class__ for x in s.factors], [x.__class__ for x in t.factors])
+        self.assertEqual(repr(s), repr(t))
+
+        value = {'a': (None, True, int, float, 1, 1.0, -0.0, -2 ** 70, 'x'), 'b': {'y'}}
+        ans = loads(dumps(value))
+        self.assertEqual(value, ans)
+        self.assertEqual([x.__class__ for x in value['a']], [x.__class__ for x in ans['a']])
+        self.assertEqual('-0.0', str(ans['a'][6]))
+
+    def test_3(self):
+        # shared subtrees stay shared, equal but distinct ones stay distinct
+        x = VarNode('x')
+        p = PolyNode(x, 2)
+        a, b = loads(dumps([ExpoNode(p, x), PolyNode(VarNode('x'), 2)]))
+        self.assertIs(a.base.body, a.body)
+        self.assertIsNot(a.base, b)
+        self.assertIsNot(a.body, b.body)
+
+    def test_4(self):
+        # more than 128 entries need multi-byte operands
+        s = TermNode([FactorNode([PolyNode(VarNode('x{}'.format(i)), i)], [], (i, 7)) for i in range(1, 500)])
+        t = loads(dumps(s))
+        self.assertEqual(repr(s), repr(t))
+        self.assertEqual(Calculator().eval(s, [], **{'x{}'.format(i): 1.01 for i in range(1, 500)}),
+                         Calculator().eval(t, [], **{'x{}'.format(i): 1.01 for i in range(1, 500)}))
+
+    def test_5(self):
+        data = dumps(canonical('sinx+x^2')[0])
+        self.assertRaises(ValueError, loads, data[:-3])
+        self.assertRaises(ValueError, loads, data + b'\0')
+        self.assertRaises(ValueError, loads, b'XYZ' + data[3:])
+        self.assertRaises(ValueError, loads, data[:3] + bytes([FORMAT_VERSION + 1]) + data[4:])
+        self.assertRaises(TypeError, dumps, object())
+
+        # a corrupted key of a set or dict which is not hashable
+        data = dumps({(1,)})
+        self.assertEqual(bytes([TAG_SET, 1, TAG_TUPLE, 1]), data[-6:-2])
+        self.assertRaises(ValueError, loads, data[:-4] + bytes([TAG_LIST]) + data[-3:])
+        data = dumps({(1,): 2})
+        self.assertRaises(ValueError, loads, data[:-6] + bytes([TAG_LIST]) + data[-5:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.budget import *
+
+
+class BudgetTest(unittest.TestCase):
+    def test_1(self):
+        budget = Budget(max_exponent=1000)
+        with self.assertRaises(BudgetExceeded):
+            canonical('7^3^200', budget)
+        s, e = canonical('7^3^5', budget)
+        self.assertEqual(7 ** 15, Calculator(budget=budget).eval(s, e))
+
+    def test_2(self):
+        budget = Budget(max_exponent=10000)
+        s, e = canonical('x^x^x^x^x', budget)
+        with self.assertRaises(BudgetExceeded):
+            Calculator(budget=budget).eval(s, e, x=10)
+        self.assertEqual(2 ** 16, Calculator(budget=budget).eval(s, e, x=2))
+
+    def test_3(self):
+        s = ' + '.join(['x'] * 100)
+        with self.assertRaises(BudgetExceeded):
+            canonical(s, Budget(max_nodes=50))
+        canonical(s, Budget(max_nodes=500))
+
+    def test_4(self):
+        s, e = canonical('sin(cos(x/pi))*logx_(x^2)')
+        with self.assertRaises(BudgetExceeded):
+            Calculator(budget=Budget(max_steps=5)).eval(s, e, x=3)
+        with self.assertRaises(BudgetExceeded):
+            Calculator(budget=Budget(max_steps=5)).derivate(s, e, 'x')
+
+    def test_5(self):
+        meter = Budget(max_time=0).start()
+        with self.assertRaises(BudgetExceeded):
+            meter.check_time()
+
+
+if __name__ == '__main__':
+    unittest.main()
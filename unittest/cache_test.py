@@ -0,0 +1,100 @@
+import unittest
+
+import os
+import pickle
+import tempfile
+from mathlib.utils.test_util import *
+from mathlib.io.cache import FormCache
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'forms.db')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_1(self):
+        cache = FormCache(self.path)
+        s, e = canonical('logx_(x^2+1)')
+        self.assertIsNone(cache.get('log x _ ( x ^ 2 + 1 )'))
+
+        cache.put('log x _ ( x ^ 2 + 1 )', s, e, {'x'})
+        form = repr(s), repr(e)
+        d, de = Calculator().derivate(s, list(e), 'x')
+        cache.put_derivative('log x _ ( x ^ 2 + 1 )', 'x', d, de)
+
+        # another cache on the same file sees the entries
+        other = FormCache(self.path)
+        _s, _e, variables = other.get('log x _ ( x ^ 2 + 1 )')
+        self.assertEqual(form, (repr(_s), repr(_e)))
+        self.assertEqual({'x'}, variables)
+        _d, _de = other.get_derivative('log x _ ( x ^ 2 + 1 )', 'x')
+        self.assertEqual(repr(d), repr(_d))
+        self.assertAlmostEqual(Calculator().eval(d, de, x=2), Calculator().eval(_d, _de, x=2))
+        self.assertIsNone(other.get_derivative('log x _ ( x ^ 2 + 1 )', 'y'))
+
+    def test_2(self):
+        s, e = canonical('x+1')
+        FormCache(self.path, version='0.0.1').put('x + 1', s, e, {'x'})
+        self.assertIsNone(FormCache(self.path, version='0.0.2').get('x + 1'))
+        self.assertIsNotNone(FormCache(self.path, version='0.0.1').get('x + 1'))
+
+        # forms of an older revision of the canonical form are not read either
+        FormCache(self.path, revision=1).put('x + 2', s, e, {'x'})
+        self.assertIsNone(FormCache(self.path, revision=2).get('x + 2'))
+        self.assertIsNotNone(FormCache(self.path, revision=1).get('x + 2'))
+
+    def test_3(self):
+        cache = FormCache(self.path, max_entries=10, touch_interval=0)
+        s, e = canonical('x')
+        for i in range(10):
+            cache.put(str(i), s, e, {'x'})
+        # the first entry is used again, the next ones are evicted
+        cache.get('0')
+        cache.put('10', s, e, {'x'})
+        self.assertLessEqual(len(cache), 10)
+        self.assertIsNotNone(cache.get('0'))
+        self.assertIsNotNone(cache.get('10'))
+        self.assertIsNone(cache.get('1'))
+
+        cache = FormCache(self.path, max_bytes=1)
+        cache.put('x', s, e, {'x'})
+        self.assertEqual(0, len(cache))
+
+    def test_5(self):
+        # the running totals follow inserts, replacements, eviction and clear
+        def totals(cache):
+            conn = cache._connect()
+            self.assertEqual(conn.execute('SELECT count(*), total(length(value)) FROM forms').fetchone(),
+                             conn.execute('SELECT entries, bytes FROM stats').fetchone())
+            return len(cache)
+
+        cache = FormCache(self.path, max_entries=5)
+        s, e = canonical('x')
+        t, te = canonical('x^2+sinx')
+        for i in range(4):
+            cache.put(str(i), s, e, {'x'})
+        cache.put('0', t, te, {'x'})
+        self.assertEqual(4, totals(cache))
+        for i in range(4, 8):
+            cache.put(str(i), s, e, {'x'})
+        self.assertLessEqual(totals(cache), 5)
+
+        # a second cache on the file keeps the totals it finds
+        self.assertLessEqual(totals(FormCache(self.path)), 5)
+        cache.clear()
+        self.assertEqual(0, totals(cache))
+
+    def test_4(self):
+        # a cache is sent to worker processes without its connections
+        cache = FormCache(self.path)
+        s, e = canonical('sinx')
+        cache.put('sin x', s, e, {'x'})
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(repr(s), repr(copy.get('sin x')[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import importlib.util
+
+from mathlib.utils.test_util import *
+from mathlib.io.codegen import *
+
+
+def tree_of(node):
+    out, stack = [], [node]
+    while stack:
+        n = stack.pop()
+        out.append((n.type, n.value, len(n.childs)))
+        stack.extend(n.childs)
+    return out
+
+
+class CodegenTest(unittest.TestCase):
+    def setUp(self):
+        self.l = Lexer(lexer_grammar)
+        self.p = Parser(parser_grammar, self.l)
+
+    def test_1(self):
+        for s in ['x^3*sin(x) + log(2)_(x^2+1) - 3*x/(x+2)', '-1 * 3 - -5', 'x^x^2',
+                  'sqrt(x)*atan(-y) % 3', 'pi^x + e', '(' * 300 + 'x' + ')' * 300]:
+            stream = self.l.stream(s)
+            tree = self.p.parse(stream)
+            self.assertTrue(stream.is_end())
+            self.assertEqual(tree_of(tree), tree_of(self.p.interpret(self.l.stream(s))))
+
+        n, _ = NodeSimplifier().canonicalize(NodeBuilder().build(self.p.parse(self.l.stream('2*x + x'))))
+        self.assertEqual(str(n), str(canonical('3*x')[0]))
+
+    def test_2(self):
+        for s in ['', '(x', 'x)', 'log(2) x', '*x']:
+            self.assertRaises(ValueError, self.p.parse, self.l.stream(s))
+
+    def test_3(self):
+        # parsers of one grammar share the generated module
+        self.assertIs(Parser(parser_grammar, self.l).generated, self.p.generated)
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'generated.py')
+            ParserGenerator(self.p).write(path)
+            spec = importlib.util.spec_from_file_location('generated', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+
+            tokens, terminals = self.l.tokenize('sin(x)^2 - 1')
+            tree = module.RecursiveDescentParser().parse(tokens, terminals)
+            self.assertEqual(tree_of(tree), tree_of(self.p.interpret(self.l.stream('sin(x)^2 - 1'))))
+
+        # a grammar change regenerates the parser
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'parser_grammar')
+            with open(parser_grammar) as f:
+                grammar = f.read()
+            with open(path, 'w') as f:
+                f.write(grammar.replace('mul_op -> MUL | DIV | MOD', 'mul_op -> MUL | DIV'))
+            p = Parser(path, self.l)
+            self.assertIsNot(p.generated, self.p.generated)
+            self.assertRaises(ValueError, p.parse, self.l.stream('x % 2'))
+            self.p.parse(self.l.stream('x % 2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
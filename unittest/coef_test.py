@@ -0,0 +1,48 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.coef import Coef
+
+
+class CoefTest(unittest.TestCase):
+    def test_1(self):
+        self.assertEqual((1, 2), Coef(2, 4))
+        self.assertEqual((-3, 2), Coef(3, -2))
+        self.assertEqual((2, 1), Coef(4.0, 2))
+        self.assertEqual((1.75, 1), Coef(3.5, 2))
+        self.assertEqual((1, 0), Coef(1, 0))
+        self.assertTrue(math.isnan(Coef(1, 0).value))
+
+    def test_2(self):
+        self.assertEqual((5, 6), Coef(1, 2) + Coef(1, 3))
+        self.assertEqual((1, 6), Coef(1, 2) * Coef(1, 3))
+        self.assertEqual((3, 2), Coef(1, 2) / Coef(1, 3))
+        self.assertEqual((0, 1), Coef(1, 3) + Coef(-1, 3))
+        self.assertEqual(0.75, (Coef(1, 4) + 0.5).value)
+
+    def test_3(self):
+        a = FactorNode([VarNode('x')], [], (1, 2))
+        b = FactorNode([VarNode('x')], [], (1, 3))
+        self.assertEqual((5, 6), (a + b).coef)
+        self.assertEqual(FactorNode([VarNode('x')], [], (2, 4)), FactorNode([VarNode('x')], [NumNode(2)]))
+
+    def test_4(self):
+        s, e = canonical('x/2 + x/3 - 5/6*x')
+        self.assertEqual('0', str(s))
+
+        s, e = canonical('7^3^10')
+        self.assertEqual(7 ** 30, Calculator().eval(s, e))
+
+    def test_5(self):
+        # exact fractions as exponents are powers
+        s, e = canonical('x^(1/2)')
+        self.assertEqual('Poly(Var(x), 0.5)', repr(s))
+        s, e = canonical('x^(1/2)*x^(1/2)')
+        self.assertEqual('x', str(s))
+        self.assertEqual(3, Calculator().eval(s, e, x=3))
+        d, de = Calculator().derivate(s, e, 'x')
+        self.assertEqual('1', str(d))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from mathlib.utils.test_util import *
+from mathlib.io.corpus import *
+
+
+notations = ['x^3*sin(x) + log(2)_(x^2+1) - 3*x/(x+2)', '-1 * 3 - -5', '', 'sinhx + expx',
+             'sqrt(x)*atan(-y) % 3', '  pi^x + e  ', '3.14 * 0.5x$', 'cosx\r']
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.l = Lexer(lexer_grammar)
+        self.p = Parser(parser_grammar, self.l)
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'corpus.txt')
+        with open(self.path, 'w', newline='') as f:
+            f.write('\n'.join(notations) + '\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_1(self):
+        with CorpusLexer(self.l).lex_file(self.path) as corpus:
+            self.assertEqual(len(notations), len(corpus))
+            self.assertEqual(np.uint8, corpus.codes.dtype)
+            self.assertEqual(np.int32, corpus.starts.dtype)
+            self.assertEqual(len(corpus.codes), corpus.lines[-1])
+            for i, s in enumerate(notations):
+                tokens, terminals = self.l.tokenize(s)
+                self.assertEqual(tokens, list(corpus.tokens(i)))
+                self.assertEqual(terminals, list(corpus.terminals(i)))
+                self.assertEqual(s.rstrip('\r'), corpus.line(i))
+
+    def test_2(self):
+        # streams of a line view the corpus arrays
+        with CorpusLexer(self.l).lex_file(self.path) as corpus:
+            stream = corpus.stream(0)
+            self.assertTrue(np.shares_memory(stream.terminals.codes, corpus.codes))
+            self.assertTrue(np.shares_memory(stream.tokens[4:7].starts, corpus.starts))
+            self.assertEqual(['sin', '(', 'x'], list(stream.tokens[4:7]))
+
+            for i in [0, 1, 4, 5]:
+                tree = self.p.parse(corpus.stream(i))
+                expected = self.p.parse(self.l.stream(notations[i]))
+                self.assertEqual(str(NodeBuilder().build(expected)), str(NodeBuilder().build(tree)))
+
+    def test_3(self):
+        with open(self.path, 'w') as f:
+            pass
+        corpus = CorpusLexer(self.l).lex_file(self.path)
+        self.assertEqual(0, len(corpus))
+        self.assertEqual(0, len(corpus.codes))
+
+        corpus = CorpusLexer(self.l).lex(b'x+1')
+        self.assertEqual(1, len(corpus))
+        self.assertEqual(['VAR', 'ADD', 'NUM'], list(corpus.terminals(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
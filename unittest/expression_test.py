@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+
+
+class ExpressionSetTest(unittest.TestCase):
+    def assertSameValues(self, expected, values):
+        for a, b in zip(expected, values):
+            if math.isnan(a):
+                self.assertTrue(math.isnan(b))
+            else:
+                self.assertAlmostEqual(a, b)
+
+    def test_1(self):
+        s, e = canonical('x/(x-1)*x/(x-2)')
+        c = Calculator()
+        d, de = c.derivate(s, list(e), 'x')
+        xs = [-1, 0, 0.5, 1, 2, 3.5]
+
+        es = ExpressionSet([s, d], [e, de])
+        f, df = es.eval(x=xs)
+        self.assertSameValues([c.eval(s, e, x=x) for x in xs], f)
+        self.assertSameValues([c.eval(d, de, x=x) for x in xs], df)
+
+    def test_2(self):
+        s, e = canonical('(x-y)^2 + sinx*sinx - logy_x')
+        c = Calculator()
+        xs, ys = np.meshgrid([-1, 0.5, 2, 8], [-1, 0, 1, 3, math.pi/4])
+
+        f, = ExpressionSet([s], [e]).eval(x=xs, y=ys)
+        self.assertEqual(xs.shape, f.shape)
+        self.assertSameValues([c.eval(s, e, x=x, y=y) for x, y in zip(xs.flat, ys.flat)], f.flat)
+
+    def test_3(self):
+        s1, e1 = canonical('sin(x^2) + x^2')
+        s2, e2 = canonical('sin(x^2) * 3')
+        es = ExpressionSet([s1, s2, s1], [e1, e2, e1])
+        # x, x^2 and sin(x^2) are shared, only the root of s2 is added
+        self.assertEqual(len(ExpressionSet([s1], [e1])) + 1, len(es))
+        a, b, c = es.eval(x=2)
+        self.assertAlmostEqual(math.sin(4) + 4, float(a))
+        self.assertEqual(float(a), float(c))
+
+    def test_4(self):
+        s, e = canonical('x + y')
+        with self.assertRaises(ArithmeticError):
+            ExpressionSet([s], [e]).eval(x=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
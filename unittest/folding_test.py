@@ -0,0 +1,67 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.folding import ConstantFolder
+
+
+def fold(string):
+    return NodeBuilder().build_folded(parse(string))
+
+
+class FoldingTest(unittest.TestCase):
+    def test_1(self):
+        n, folded = fold('2*pi/4')
+        self.assertEqual('Num({})'.format(math.pi / 2), repr(n))
+
+        n, folded = fold('log(2)_8')
+        self.assertEqual('Num(3)', repr(n))
+        self.assertEqual(5, folded)
+
+        n, folded = fold('sin(0) + cos(0)')
+        self.assertEqual('Num(1)', repr(n))
+
+        # exact fractions are kept
+        n, folded = fold('1/3 + 1/6')
+        self.assertEqual('Factor(1 / 2)', repr(n))
+        self.assertEqual(Coef(1, 2), n.coef)
+        n, folded = fold('log(2)_(1/8)')
+        self.assertEqual('Num(-3)', repr(n))
+
+    def test_2(self):
+        # the constants next to variables are merged
+        n, folded = fold('x + 2 + 3')
+        self.assertEqual('Term(Var(x), Num(5))', repr(n))
+        self.assertEqual(1, folded)
+        n, folded = fold('e^(1+1) * x')
+        self.assertEqual('Term(Factor({} * Var(x)))'.format(math.e ** 2), repr(n))
+        n, folded = fold('sin(x)')
+        self.assertEqual(0, folded)
+
+    def test_3(self):
+        # undefined subtrees stay for the exclusion
+        for s in ['1/0', 'tan(pi/2)', 'sqrt(0-4)', '0^(0-1)', 'log(1)_2', 'log(2)_0']:
+            n, folded = fold(s)
+            self.assertNotIsInstance(n, NumNode, s)
+
+        n, folded = fold('x*sqrt(0-4)')
+        s, e = NodeSimplifier().canonicalize(n)
+        self.assertEqual(1, len(e))
+        self.assertTrue(math.isnan(Calculator().eval(s, e, x=1)))
+
+    def test_4(self):
+        # folded after simplification, the tree itself is not changed
+        n = TermNode([VarNode('x'), TriNode('sin', NumNode(0)), PolyNode(NumNode(3), 2)])
+        folded, eliminated = ConstantFolder().fold(n)
+        self.assertEqual('Term(Var(x), Num(9))', repr(folded))
+        self.assertEqual(3, eliminated)
+        self.assertEqual(6, count_nodes(n))
+
+        s, e = NodeSimplifier().canonicalize(fold('x*(log(3)_9 + y) - x*y')[0])
+        self.assertEqual('2*x', str(s))
+
+        with self.assertRaises(BudgetExceeded):
+            ConstantFolder(Budget(max_exponent=100).start()).fold(PolyNode(NumNode(7), 200))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.interval import IntervalEvaluator
+from mathlib.core.functions import *
+from mathlib.io.latex import LaTeXGenerator
+
+
+class FunctionTest(unittest.TestCase):
+    def test_1(self):
+        xs = np.linspace(-0.9, 0.9, 19)
+        for name, func in [('sinh', np.sinh), ('cosh', np.cosh), ('tanh', np.tanh), ('asin', np.arcsin),
+                           ('acos', np.arccos), ('atan', np.arctan), ('sqrt', np.sqrt)]:
+            s, e = canonical('{}(x)'.format(name))
+            self.assertEqual(TriNode(name, VarNode('x')), s)
+            values = ExpressionSet([s], [e]).eval(x=xs)[0]
+            np.testing.assert_allclose([Calculator().eval(s, e, x=x) for x in xs], values, rtol=1e-14)
+            with np.errstate(all='ignore'):
+                np.testing.assert_allclose(func(xs), values)
+
+            # derivatives against central differences
+            d, de = Calculator().derivate(s, list(e), 'x')
+            h = 1e-6
+            with np.errstate(all='ignore'):
+                expected = (func(xs + h) - func(xs - h)) / (2 * h)
+            ok = np.isfinite(expected)
+            np.testing.assert_allclose(expected[ok], ExpressionSet([d], [de]).eval(x=xs)[0][ok], rtol=1e-5)
+
+    def test_2(self):
+        s, e = canonical('asin(x)+sqrt(x)')
+        self.assertTrue(math.isnan(Calculator().eval(s, e, x=-0.5)))
+        self.assertTrue(math.isnan(Calculator().eval(s, e, x=1.5)))
+        self.assertAlmostEqual(math.asin(0.25) + 0.5, Calculator().eval(s, e, x=0.25))
+        self.assertEqual(3, len(e))
+
+        bound = IntervalEvaluator([s]).eval(x=(0, 1))[0]
+        self.assertAlmostEqual(0, float(bound.lo))
+        self.assertAlmostEqual(math.pi / 2 + 1, float(bound.hi))
+
+        self.assertEqual('\\arcsin {x} + \\sqrt{x}', LaTeXGenerator().generate(s))
+        self.assertEqual(math.inf, Calculator().eval(*canonical('cosh(1000)')))
+
+    def test_3(self):
+        # a new function works everywhere once it is registered
+        cube = Function('cube', lambda x: x ** 3, lambda x: np.power(x, 3),
+                        lambda u: FactorNode([PolyNode(u, 2)], [], (3, 1)),
+                        exclusion=lambda u: [[[u, '==', 0]]], latex='\\operatorname{cube}')
+        register_function(cube)
+        try:
+            s = TriNode('cube', TermNode([VarNode('x'), NumNode(1)]))
+            s, e = NodeSimplifier().canonicalize(s)
+            self.assertEqual(1, len(e))
+            self.assertEqual(27, Calculator().eval(s, e, x=2))
+            self.assertTrue(math.isnan(ExpressionSet([s], [e]).eval(x=-1)[0]))
+            d, de = Calculator().derivate(s, list(e), 'x')
+            self.assertEqual(27, Calculator().eval(d, de, x=2))
+            self.assertEqual('\\operatorname{cube} ({x + {1}})', LaTeXGenerator().generate(s))
+            self.assertRaises(ValueError, register_function, cube)
+        finally:
+            del functions['cube'], func_order['cube']
+
+        self.assertRaises(ValueError, get_function, 'cube')
+        self.assertIs(functions['sin'], get_function('sin'))
+
+
+if __name__ == '__main__':
+    unittest.main()
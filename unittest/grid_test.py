@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.grid import *
+
+
+class GridTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('x^2*y+sin(y)')
+        xs, ys, zs = GridEvaluator(s, e).eval('x', 'y', (-2, 2), (-1, 3), shape=(7, 5))
+        self.assertEqual((5,), xs.shape)
+        self.assertEqual((7,), ys.shape)
+        self.assertEqual((7, 5), zs.shape)
+
+        calc = Calculator()
+        for i in [0, 3, 6]:
+            for j in [0, 2, 4]:
+                self.assertAlmostEqual(calc.eval(s, e, x=xs[j], y=ys[i]), zs[i, j])
+
+    def test_2(self):
+        s, e = canonical('logx_y')
+        xs, ys, zs = GridEvaluator(s, e, shape=(20, 20)).eval('x', 'y', (-2, 2), (0.5, 2))
+        self.assertTrue(np.all(np.isnan(zs[:, xs <= 0])))
+        self.assertTrue(np.all(np.isfinite(zs[:, (xs > 0) & (abs(xs - 1) > 1e-9)])))
+
+        # a constant along one axis still fills the whole grid
+        s, e = canonical('x+1')
+        xs, ys, zs = GridEvaluator(s, e).eval('x', 'y', (0, 1), (0, 1), shape=(3, 4))
+        self.assertEqual((3, 4), zs.shape)
+        self.assertTrue(np.all(zs[0] == zs[2]))
+
+    def test_3(self):
+        xs, ys = np.arange(5.0), np.arange(4.0)
+        zs = np.arange(20.0).reshape(4, 5)
+        zs[0:2, 0:2] = math.nan
+        zs[2, 4] = math.nan
+        dx, dy, dz = downsample(xs, ys, zs, (2, 3))
+        self.assertEqual((2, 3), dz.shape)
+        self.assertTrue(math.isnan(dz[0, 0]))
+        self.assertEqual(np.mean([12, 13, 17, 18]), dz[1, 1])
+        self.assertEqual(19, dz[1, 2])
+        self.assertEqual([0.5, 2.5, 4], list(dx))
+        self.assertEqual([0.5, 2.5], list(dy))
+
+    def test_4(self):
+        s, e = canonical('x*y')
+        g = GridEvaluator(s, e)
+        self.assertRaises(ValueError, g.eval, 'x', 'y', (1, 1), (0, 1))
+        self.assertRaises(ValueError, g.eval, 'x', 'y', (0, 1), (0, math.inf))
+        self.assertRaises(ValueError, g.eval, 'x', 'x', (0, 1), (0, 1))
+        self.assertRaises(ArithmeticError, g.eval, 'x', 'z', (0, 1), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
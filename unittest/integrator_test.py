@@ -0,0 +1,45 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.integrator import Integrator
+
+
+class IntegratorTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('x^2')
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (0, 3))
+        self.assertAlmostEqual(9, value)
+        self.assertLess(error, 1e-10)
+        self.assertEqual(15, evaluations)
+
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (3, 0))
+        self.assertAlmostEqual(-9, value)
+
+    def test_2(self):
+        s, e = canonical('sinx')
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (0, math.pi))
+        self.assertAlmostEqual(2, value)
+
+        s, e = canonical('1/(x^2+1)')
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (-100, 100))
+        self.assertAlmostEqual(2 * math.atan(100), value)
+        self.assertGreater(evaluations, 15)
+
+    def test_3(self):
+        # the interval is split at the hole, so the rule never evaluates x=0
+        s, e = canonical('x/x')
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (-1, 1))
+        self.assertAlmostEqual(2, value)
+        self.assertEqual(30, evaluations)
+
+        s, e = canonical('log2_x')
+        self.assertRaises(ArithmeticError, Integrator().integrate, s, e, 'x', (-1, 1))
+
+    def test_4(self):
+        s, e = canonical('x*y')
+        value, error, evaluations = Integrator().integrate(s, e, 'x', (0, 1), y=2)
+        self.assertAlmostEqual(1, value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.interval import *
+
+
+class IntervalTest(unittest.TestCase):
+    def test_1(self):
+        x = Interval(-1, 2)
+        self.assertEqual(0, float(x.pow(2).lo))
+        self.assertAlmostEqual(4, float(x.pow(2).hi))
+        self.assertTrue(np.isinf(x.inverse().hi))
+        self.assertTrue(Interval(-2, -1).log().is_empty())
+
+        a = Interval(0.1) + Interval(0.2)
+        # outward rounding keeps the exact sum inside
+        self.assertTrue(a.lo < 0.30000000000000004 and a.hi > 0.3)
+
+    def test_2(self):
+        s = Interval(0, 1).sin()
+        self.assertAlmostEqual(0, float(s.lo))
+        self.assertAlmostEqual(math.sin(1), float(s.hi))
+        s = Interval(1, 2).sin()
+        self.assertEqual(1, float(s.hi))
+        self.assertTrue(np.isinf(Interval(1, 2).tan().hi))
+
+    def test_3(self):
+        # the bound holds every sampled value
+        for string in ['x^3 - 3*x', 'sin(cos(x/pi))', 'e^x*x', '(x-1)/(x-2)', 'log2_x + x^0.5']:
+            s, e = canonical(string)
+            evaluator = IntervalEvaluator([s])
+            for l, r in [(-3, -2), (0.5, 1.5), (1.9, 2.1), (-10, 10)]:
+                value, = evaluator.eval(x=(l, r))
+                ys, = ExpressionSet([s]).eval(x=np.linspace(l, r, 101))
+                ys = ys[np.isfinite(ys)]
+                if len(ys) > 0:
+                    self.assertLessEqual(value.lo, ys.min())
+                    self.assertGreaterEqual(value.hi, ys.max())
+
+    def test_4(self):
+        s, e = canonical('x^2 + y')
+        value, = IntervalEvaluator([s]).eval(x=Interval([0, 1], [1, 2]), y=1)
+        self.assertEqual((2,), value.lo.shape)
+        self.assertTrue(np.all(value.is_finite()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.planner import EvaluationPlanner
+
+
+class EvaluationPlannerTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('3*x^5 - 2*x^3 + x - 7')
+        self.assertEqual('(-7) + x*(1 + x^2*(3*x^2 - 2))', str(EvaluationPlanner().plan(s)))
+
+        # too small to gain anything
+        s, e = canonical('x^2 + x + 1')
+        self.assertEqual(str(s), str(EvaluationPlanner().plan(s)))
+
+    def test_2(self):
+        c = Calculator()
+        for string in ['(x+y+1)^6', '(x^2+1)/(x^4 - x^3 + x + 1)', 'sin(x)^3 + sin(x)^2*y + sinx + 1']:
+            s, e = canonical(string)
+            p = EvaluationPlanner().plan(s)
+            for x, y in [(0.5, 2), (-3, 1.5), (2, -1)]:
+                self.assertAlmostEqual(c.eval(s, e, x=x, y=y), c.eval(p, e, x=x, y=y))
+
+    def test_3(self):
+        s, e = canonical('(x-1)^10')
+        xs = np.linspace(0.99, 1.01, 1001)
+        exact = (xs - 1) ** 10
+        raw, = ExpressionSet([s], [e], planner=None).eval(x=xs)
+        planned, = ExpressionSet([s], [e]).eval(x=xs)
+        self.assertLessEqual(np.max(np.abs(planned - exact)), np.max(np.abs(raw - exact)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.polynomial import *
+from mathlib.io.latex import LaTeXGenerator
+
+
+class PolynomialTest(unittest.TestCase):
+    def test_1(self):
+        x, y = Polynomial.symbol(0), Polynomial.symbol(1)
+        p = (x + y).pow(3)
+        self.assertEqual({(3,): (1, 1), (2, 1): (3, 1), (1, 2): (3, 1), (0, 3): (1, 1)}, p.terms)
+
+        p = (x + Polynomial.constant(-1)) * (x + Polynomial.constant(1))
+        self.assertEqual({(2,): (1, 1), (): (-1, 1)}, p.terms)
+        self.assertEqual(0, len(p + p * Polynomial.constant(-1)))
+
+    def test_2(self):
+        x = Polynomial.symbol(0)
+        self.assertRaises(ExpansionLimit, (x + Polynomial.constant(1)).pow, 100, 50)
+
+    def test_3(self):
+        # expanded where like terms merge into fewer operations
+        s, e = canonical('(x+1)^2 - (x-1)^2')
+        self.assertEqual('4*x', str(s))
+        s, e = canonical('(x-1)*(x+1) + 1')
+        self.assertEqual('x^2', str(s))
+        s, e = canonical('(1/2*x + 1/3)^2 - 1/4*x^2')
+        self.assertEqual([Coef(1, 3), Coef(1, 9)], sorted(x.coef for x in s.factors))
+
+        # products of sums are multiplied out, lone powers stay factored
+        s, e = canonical('(x-1)^2*(x+3)')
+        self.assertEqual('x^3 + x^2 - 5*x + 3', str(s))
+        s, e = canonical('(x+1)*(y-1)')
+        self.assertEqual(4, len(s.factors))
+        s, e = canonical('(x-3)^12')
+        self.assertEqual('(x - 3)^12', str(s))
+        s, e = canonical('2*(x-3)^12')
+        self.assertEqual('2*(x - 3)^12', str(s))
+
+        # only where it saves operations, when asked to
+        s = PolynomialExpander(cheaper_only=True).expand(build('(x-1)^2*(x+3)'))
+        self.assertEqual('(x - 1)^2*(x + 3)', str(s))
+        s = PolynomialExpander(cheaper_only=True).expand(build('(x-1)*(x+1) + 1'))
+        self.assertEqual('x^2', str(s))
+
+    def test_4(self):
+        # denominators and function bodies are expanded on their own
+        s, e = canonical('x/(x-1)*x/(x-2)')
+        self.assertEqual('x^2/((x - 1)*(x - 2))', str(s))
+        s, e = canonical('sin((x+1)^2 - x^2)')
+        self.assertEqual('sin(2*x + 1)', str(s))
+
+        # opaque factors are not distributed over sums
+        s, e = canonical('(x-2)^0.5*(x+1)^2')
+        self.assertEqual(1, str(s).count('^0.5'))
+
+        # too large to expand
+        s, e = canonical('(x+1)^100000 - x^100000')
+        self.assertEqual('(x + 1)^100000 - x^100000', str(s))
+
+    def test_5(self):
+        # near a root the factored form keeps its precision
+        s, e = canonical('(x-3)^12')
+        self.assertAlmostEqual(1e-12, Calculator().eval(s, e, x=3.1), delta=1e-20)
+        s, e = canonical('(x-3)^12 + x - x')
+        self.assertAlmostEqual(1e-12, Calculator().eval(s, e, x=3.1), delta=1e-20)
+
+    def test_6(self):
+        # derivate leaves the tree it is given as it was
+        for string in ['(x-1)^2*(x+3)', '(x-3)^12', 'sin((x+1)^2)*(x-2)^0.5', 'x/(x-1)']:
+            s, e = canonical(string)
+            before, latex = repr(s), LaTeXGenerator().generate(s)
+            Calculator().derivate(s, list(e), 'x')
+            self.assertEqual(before, repr(s))
+            self.assertEqual(latex, LaTeXGenerator().generate(s))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import copy
+from mathlib.utils.test_util import *
+from mathlib.io.render import RenderMemo
+from mathlib.io.latex import LaTeXGenerator
+from mathlib.io.text import TextGenerator
+from mathlib.web.app.pipeline import render_all
+
+
+notations = ['x^2 + 3*x - 1', 'logx_(x^2+1) - sinx/x', '(x+1)^3 / (x-1) - (x+1)^3', 'tan(x)^x - e^(x*y)/y',
+             '1/3*x^2.5 - 2*x - 0.5', 'asin(x) * 2^x - sqrt(x-4)']
+
+
+class RenderTest(unittest.TestCase):
+    def setUp(self):
+        self.trees = []
+        for string in notations:
+            s, e = canonical(string)
+            d, de = Calculator().derivate(copy.deepcopy(s), list(e), 'x')
+            self.trees.extend([s, d])
+
+    def test_1(self):
+        # one pass over all trees renders each of them as a pass of its own
+        for renderer in [LaTeXGenerator(), TextGenerator()]:
+            self.assertEqual([renderer.generate(x) for x in self.trees], renderer.generate_all(self.trees))
+            self.assertEqual([], renderer.generate_all([]))
+        self.assertEqual('x', TextGenerator().generate(VarNode('x')))
+
+    def test_2(self):
+        # a subtree shared by several parents, or by several trees, is the same string everywhere
+        x = VarNode('x')
+        p = TermNode([x, NumNode(1)])
+        shared = [ExpoNode(p, p), FactorNode([p, PolyNode(p, 2)], [p]), p, LogNode(p, TriNode('sin', p))]
+        for renderer in [LaTeXGenerator(), TextGenerator()]:
+            expected = [renderer.generate(copy.deepcopy(n)) for n in shared]
+            self.assertEqual(expected, renderer.generate_all(shared))
+            self.assertEqual(expected + expected, renderer.generate_all(shared + shared))
+
+    def test_3(self):
+        # the memo lives for one call, trees changed between two calls render as they are now
+        renderer = LaTeXGenerator()
+        s, e = canonical('x^2 + 3*x - 1')
+        before = renderer.generate_all([s])[0]
+        s.factors[0] = FactorNode([VarNode('y')], [], (5, 1))
+        after = renderer.generate_all([s])[0]
+        self.assertNotEqual(before, after)
+        self.assertEqual(renderer.generate(copy.deepcopy(s)), after)
+
+        # the ids of nodes freed after a call are reused by new ones
+        for string in notations:
+            t, _ = canonical(string)
+            self.assertEqual(renderer.generate(copy.deepcopy(t)), renderer.generate_all([t])[0])
+
+    def test_4(self):
+        # equal subtrees are rendered once, by their structure
+        renderer = TextGenerator()
+        memo = RenderMemo()
+        a = renderer._render(canonical('sinx + x^2')[0], memo)
+        count = len(memo.fragments)
+        b = renderer._render(canonical('sinx + x^2')[0], memo)
+        self.assertEqual(a, b)
+        self.assertEqual(count, len(memo.fragments))
+        self.assertEqual(len(memo.interner), len(memo.fragments))
+
+    def test_5(self):
+        latex = LaTeXGenerator()
+        rendered = render_all(latex, self.trees)
+        for x in self.trees:
+            self.assertEqual(latex.generate(x), rendered(x))
+        self.assertRaises(KeyError, rendered, VarNode('x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
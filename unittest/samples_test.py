@@ -0,0 +1,193 @@
+import unittest
+import pickle
+
+import numpy as np
+from mathlib.utils.test_util import *
+import json
+from mathlib.ui.samples import SampleCache, TileCache, lttb
+
+
+class Counting(SampleCache):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = 0
+
+    def get(self, key, lim, points):
+        entry = super().get(key, lim, points)
+        self.hits += entry is not None
+        return entry
+
+
+class SamplesTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('tanx + a')
+        cache = Counting()
+        plotter = Plotter(samples=cache)
+        expected = Plotter()._get_points(s, e, 'x', (-4, 4), a=1)
+
+        xs, ys = plotter._get_points(s, e, 'x', (-4, 4), a=1)
+        self.assertEqual((expected[0], str(expected[1])), (xs, str(ys)))
+        self.assertEqual(0, cache.hits)
+        _xs, _ys = plotter._get_points(s, e, 'x', (-4, 4), a=1)
+        self.assertEqual((xs, str(ys)), (_xs, str(_ys)))
+        self.assertEqual(1, cache.hits)
+
+        # other conditions are sampled again
+        plotter._get_points(s, e, 'x', (-4, 4), a=2)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, len(cache))
+
+    def test_2(self):
+        s, e = canonical('x^2')
+        cache = Counting()
+        plotter = Plotter(samples=cache)
+        plotter._get_points(s, e, 'x', (-10, 10))
+
+        # half of the range still has enough of the samples
+        xs, ys = plotter._get_points(s, e, 'x', (0, 10))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, len(cache))
+        self.assertTrue(all(0 <= x <= 10 for x in xs))
+        self.assertEqual([x ** 2 for x in xs], ys)
+
+        # a small part of it does not
+        plotter._get_points(s, e, 'x', (0, 1))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, len(cache))
+
+    def test_3(self):
+        cache = SampleCache(max_bytes=3 * 16 * 100)
+        for i in range(5):
+            cache.put(('f', i), (0, 1), np.zeros(100), np.zeros(100))
+        self.assertEqual(3, len(cache))
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertIsNone(cache.get(('f', 0), (0, 1), 100))
+        self.assertIsNotNone(cache.get(('f', 4), (0, 1), 100))
+
+        # an entry larger than the cache is not kept
+        cache.put(('g',), (0, 1), np.zeros(1000), np.zeros(1000))
+        self.assertIsNone(cache.get(('g',), (0, 1), 1000))
+
+        # goes to pool workers empty
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(0, len(cache))
+        cache.put(('f', 0), (0, 1), np.zeros(100), np.zeros(100))
+        self.assertEqual(1, len(cache))
+
+
+class Tiles(TileCache):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.misses = 0
+
+    def get(self, key, lim, points):
+        entry = super().get(key, lim, points)
+        self.misses += entry is None
+        return entry
+
+
+class TilesTest(unittest.TestCase):
+    def test_1(self):
+        cache = TileCache()
+        self.assertEqual(2, cache.level((-10, 10)))
+        self.assertEqual([((2, -3), (-12.0, -8.0)), ((2, -2), (-8.0, -4.0)), ((2, -1), (-4.0, 0.0)),
+                          ((2, 0), (0.0, 4.0)), ((2, 1), (4.0, 8.0)), ((2, 2), (8.0, 12.0))],
+                         cache.tiles((-10, 10)))
+        self.assertEqual(-6, cache.level((0.1, 0.2)))
+
+    def test_2(self):
+        s, e = canonical('tan(x)^3')
+        tiles = Tiles()
+        plotter = Plotter(tiles=tiles)
+
+        xs, ys = plotter._get_points(s, e, 'x', (-10, 10))
+        self.assertEqual(6, tiles.misses)
+        self.assertTrue(all(-10 <= x <= 10 for x in xs))
+        self.assertTrue(all(a < b for a, b in zip(xs, xs[1:])))
+        # the poles are broken by nan as without tiles
+        breaks = [x for x, y in zip(xs, ys) if math.isnan(y)]
+        for k in range(-3, 3):
+            self.assertTrue(any(abs(x - math.pi * (k + 0.5)) < 0.05 for x in breaks))
+
+        # panning samples only the new tiles
+        plotter._get_points(s, e, 'x', (-6, 14))
+        self.assertEqual(7, tiles.misses)
+        plotter._get_points(s, e, 'x', (-10, 10))
+        self.assertEqual(7, tiles.misses)
+
+    def test_3(self):
+        s, e = canonical('x^2 + 1')
+        plotter = Plotter(tiles=TileCache())
+        xs, ys = plotter._get_points(s, e, 'x', (0.1, 0.2))
+        self.assertGreater(len(xs), 300)
+        self.assertEqual(len(xs), len(set(xs)))
+        self.assertEqual([x ** 2 + 1 for x in xs], ys)
+
+
+class LTTBTest(unittest.TestCase):
+    def test_1(self):
+        xs = np.linspace(0, 10, 5001)
+        ys = np.sin(3 * xs)
+        _xs, _ys = lttb(xs, ys, 300)
+        self.assertEqual(300, len(_xs))
+        self.assertEqual((xs[0], xs[-1]), (_xs[0], _xs[-1]))
+        self.assertTrue(np.all(np.diff(_xs) > 0))
+        # the peaks survive
+        self.assertGreater(_ys.max(), 0.999)
+        self.assertLess(_ys.min(), -0.999)
+
+        self.assertEqual(10, len(lttb(xs[:10], ys[:10], 300)[0]))
+
+    def test_2(self):
+        xs = np.linspace(-5, 5, 4001)
+        ys = np.full(xs.shape, math.nan)
+        pole = np.abs(xs) < 0.01
+        ys[~pole] = 1 / xs[~pole]
+        _xs, _ys = lttb(xs, ys, 200)
+        self.assertLessEqual(len(_xs), 200)
+        breaks = _xs[np.isnan(_ys)]
+        self.assertEqual(1, len(breaks))
+        self.assertLess(abs(breaks[0]), 0.01)
+
+    def test_3(self):
+        s, e = canonical('tan(x)^3')
+        plotter = Plotter()
+        curve, values = plotter.get_curve(s, e, 'x', (-10, 10), 'f(x)', width=400)
+        self.assertEqual(len(curve['x']), len(curve['y']))
+        self.assertLessEqual(len(curve['x']), 400)
+        self.assertIn(None, curve['y'])
+        self.assertEqual(len(plotter._get_points(s, e, 'x', (-10, 10))[1]), len(values))
+        json.loads(json.dumps(curve, allow_nan=False))
+
+        s, e = canonical('logx_y')
+        grid = plotter.get_heatmap(s, e, ('x', 'y'), (-2, 2), (0.5, 2), 'f(x, y)', max_shape=(20, 30))
+        self.assertEqual((20, 29), (len(grid['y']), len(grid['x'])))
+        self.assertEqual(29, len(grid['z'][0]))
+        self.assertIsNone(grid['z'][0][0])
+        self.assertEqual(['x', 'y'], grid['variables'])
+        json.loads(json.dumps(grid, allow_nan=False))
+
+
+class StreamTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('1/(x-1)')
+        batches = list(Plotter().stream_curve(s, e, 'x', (-10, 10), 'f(x)', segments=4))
+        self.assertEqual(5, len(batches))
+        self.assertEqual([-10, 10], batches[0]['range'])
+        self.assertIn('ylim', batches[0])
+        self.assertLessEqual(len(batches[0]['x']), 300)
+
+        # the segment with the pole comes first, then the others in order
+        self.assertEqual([[0, 5], [-10, -5], [-5, 0], [5, 10]], [b['range'] for b in batches[1:]])
+        self.assertIn(None, batches[1]['y'])
+        for b in batches[1:]:
+            self.assertTrue(all(b['range'][0] <= x <= b['range'][1] for x in b['x']))
+            json.loads(json.dumps(b, allow_nan=False))
+
+        self.assertRaises(ValueError, list, Plotter().stream_curve(s, e, 'x', (1, -1), 'f(x)'))
+
+
+if __name__ == '__main__':
+    unittest.main()
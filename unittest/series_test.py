@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+from mathlib.utils.test_util import *
+from mathlib.core.expression import ExpressionSet
+from mathlib.core.series import *
+
+
+class SeriesTest(unittest.TestCase):
+    def test_1(self):
+        s, e = canonical('sinx')
+        self.assertEqual([0, 1, 0, -1/6, 0, 1/120], taylor_coefficients(s, e, 'x', 0, 5))
+
+        s, e = canonical('e^x')
+        t = series(s, 'x', 1, 8, e)
+        self.assertAlmostEqual(math.exp(1.5), Calculator().eval(t, [], x=1.5), places=5)
+
+    def test_2(self):
+        s, e = canonical('loge_x')
+        self.assertRaises(ArithmeticError, taylor_coefficients, s, e, 'x', 0, 2)
+
+        # derivatives are taken once and reused for another point
+        cache = DerivativeCache()
+        taylor_coefficients(s, e, 'x', 1, 4, cache)
+        d, de = cache.derivatives(s, e, 'x', 4)[4]
+        self.assertIs(d, cache.derivatives(s, e, 'x', 4)[4][0])
+        self.assertEqual(1, len(cache))
+
+        # taking further derivatives leaves the cached ones as they were
+        t, te = canonical('sinx/x')
+        first = repr(cache.derivatives(t, te, 'x', 1))
+        cache.derivatives(t, te, 'x', 3)
+        self.assertEqual(first, repr(cache.derivatives(t, te, 'x', 1)))
+
+        cache = DerivativeCache(max_entries=2)
+        for string in ['sinx', 'cosx', 'e^x']:
+            t, te = canonical(string)
+            cache.derivatives(t, te, 'x', 2)
+        self.assertEqual(2, len(cache))
+
+    def test_3(self):
+        for string, lim in [('sin(cos(x/pi))*e^(sinx)', (-10, 10)), ('tanx', (-4, 4)), ('log2_x', (-1, 3))]:
+            s, e = canonical(string)
+            a = ChebyshevApproximation(s, e, 'x', lim)
+            xs = np.linspace(*lim, 1001)
+            exact, = ExpressionSet([s], [e]).eval(x=xs)
+            values = a.eval(xs)
+            self.assertTrue(np.array_equal(np.isnan(exact), np.isnan(values)))
+            finite = np.isfinite(exact)
+            scale = np.maximum(1, np.abs(exact[finite]))
+            self.assertLess(np.max(np.abs(values[finite] - exact[finite]) / scale), 1e-8)
+
+    def test_4(self):
+        s, e = canonical('x*y')
+        cache = ApproximationCache(max_entries=2)
+        a = cache.get(s, e, 'x', (0, 1), y=2)
+        self.assertIs(a, cache.get(s, e, 'x', (0, 1), y=2))
+        cache.get(s, e, 'x', (0, 1), y=3)
+        cache.get(s, e, 'x', (0, 2), y=2)
+        self.assertEqual(2, len(cache))
+        self.assertIsNot(a, cache.get(s, e, 'x', (0, 1), y=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from mathlib.utils.test_util import *
+from mathlib.core.solver import Solver
+
+
+class SolverTest(unittest.TestCase):
+    def assertPoints(self, expected, points):
+        self.assertEqual(len(expected), len(points))
+        for a, b in zip(expected, points):
+            self.assertAlmostEqual(a, b, places=8)
+
+    def test_1(self):
+        s, e = canonical('x^2 - 2')
+        self.assertPoints([-math.sqrt(2), math.sqrt(2)], Solver().roots(s, e, 'x', (-5, 5)))
+
+        # touching root without a sign change
+        s, e = canonical('(x-1)^2')
+        self.assertPoints([1], Solver().roots(s, e, 'x', (-5, 5)))
+
+    def test_2(self):
+        # the sign change at the pole is not a root
+        s, e = canonical('(x-1)/(x-2)')
+        self.assertPoints([1], Solver().roots(s, e, 'x', (-5, 5)))
+        self.assertPoints([2], Solver().holes(e, 'x', (-5, 5)))
+
+        s, e = canonical('tanx')
+        self.assertPoints([-math.pi, 0, math.pi], Solver().roots(s, e, 'x', (-4, 4)))
+        self.assertPoints([-math.pi / 2, math.pi / 2], Solver().holes(e, 'x', (-4, 4)))
+
+    def test_3(self):
+        s, e = canonical('x^3 - 3*x')
+        self.assertEqual([(-1, 2, 'max'), (1, -2, 'min')],
+                         [(round(x, 8), round(y, 8), k) for x, y, k in Solver().extrema(s, e, 'x', (-5, 5))])
+
+        s, e = canonical('x^3')
+        self.assertEqual(['saddle'], [k for x, y, k in Solver().extrema(s, e, 'x', (-5, 5))])
+
+    def test_4(self):
+        s, e = canonical('x*y - 1')
+        self.assertPoints([0.5], Solver().roots(s, e, 'x', (-5, 5), y=2))
+        self.assertRaises(ValueError, Solver().roots, s, e, 'x', (1, -1), y=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import copy
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from mathlib.utils.test_util import *
+
+
+notations = ['x^2 + 3*x - 1', 'log(2)_(x+1) / (x - 2)', 'x^(1/2) + tan(x)',
+             'asin(x) * 2^x', '(x+1)^3 / (x-1)', 'sin(x) / cos(x) + log(x)_3']
+
+
+class ThreadTest(unittest.TestCase):
+    def setUp(self):
+        # switch threads as often as possible to interleave the passes
+        self.interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.interval)
+
+    def test_1(self):
+        trees = [build(s) for s in notations]
+        expected = []
+        for t in trees:
+            s, e = NodeSimplifier().canonicalize(copy.deepcopy(t))
+            expected.append((str(s), str(e)))
+
+        simplifier = NodeSimplifier()
+
+        def run(i):
+            s, e = simplifier.canonicalize(copy.deepcopy(trees[i % len(trees)]))
+            return str(s), str(e)
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(run, range(400)))
+        for i, r in enumerate(results):
+            self.assertEqual(expected[i % len(trees)], r)
+
+    def test_2(self):
+        forms = [NodeSimplifier().canonicalize(build(s)) for s in notations]
+        expected = []
+        for s, e in forms:
+            d, de = Calculator().derivate(copy.deepcopy(s), list(e), 'x')
+            expected.append((Calculator().eval(s, e, x=3), str(d), str(de)))
+
+        calculator = Calculator(budget=Budget(max_steps=1000))
+
+        def run(i):
+            s, e = forms[i % len(forms)]
+            d, de = calculator.derivate(copy.deepcopy(s), list(e), 'x')
+            return calculator.eval(s, e, x=3), str(d), str(de)
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(run, range(400)))
+        for i, r in enumerate(results):
+            self.assertEqual(str(expected[i % len(forms)]), str(r))
+
+    def test_3(self):
+        # one builder shared by the threads, as by the web pipeline
+        trees = [parse(s) for s in notations]
+        expected = [repr(NodeBuilder().build(t)) for t in trees]
+        # just enough steps for the largest tree, a meter shared between calls runs out
+        steps = []
+        for t in trees:
+            context = NodeBuilder()._context()
+            context._build(t)
+            steps.append(context.meter.steps)
+        builder = NodeBuilder(Budget(max_steps=max(steps)))
+
+        def run(i):
+            return repr(builder.build(trees[i % len(trees)]))
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(run, range(2000)))
+        for i, r in enumerate(results):
+            self.assertEqual(expected[i % len(trees)], r)
+
+    def test_4(self):
+        # each call meters its own steps, a shared budget is not used up by other calls
+        calculator = Calculator(budget=Budget(max_steps=50))
+        s, e = NodeSimplifier().canonicalize(build('x^2 + 3*x - 1'))
+        for _ in range(100):
+            self.assertEqual(17, calculator.eval(s, e, x=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+import copy
+from mathlib.utils.test_util import *
+from mathlib.utils.visitor import *
+from mathlib.core.analysis import *
+
+
+class Depth(NodeVisitor):
+
+    def visit_TermNode(self, node):
+        return 1 + max([self.visit(x) for x in node.factors] + [0])
+
+    def visit_FactorNode(self, node):
+        return 1 + max([self.visit(x) for x in node.numerator + node.denominator] + [0])
+
+    def visit_number(self, node):
+        return 0
+
+    def visit_default(self, node):
+        return 1 + max([self.visit(x) for x in node_children(node)] + [0])
+
+
+class Count(NodeAnalysis):
+
+    def __init__(self):
+        self.visits = 0
+
+    def combine_default(self, node, children):
+        self.visits += 1
+        return 1 + sum(children)
+
+
+class VisitorTest(unittest.TestCase):
+    def test_1(self):
+        n = TermNode([FactorNode([VarNode('x'), PolyNode(VarNode('y'), 2)]), NumNode(1)])
+        self.assertEqual(Depth().visit(n), 4)
+        self.assertEqual(Depth().visit(3), 0)
+        self.assertIs(Depth.visit_table[PolyNode], Depth.visit_default)
+
+        class Flat(Depth):
+            def visit_PolyNode(self, node):
+                return 1
+
+        self.assertEqual(Flat().visit(n), 3)
+        self.assertIs(Depth.visit_table[PolyNode], Depth.visit_default)
+
+        class Strict(NodeVisitor):
+            def visit_VarNode(self, node):
+                return node.name
+
+        self.assertEqual(Strict().visit(VarNode('x')), 'x')
+        self.assertRaises(TypeError, Strict().visit, NumNode(1))
+
+    def test_2(self):
+        for s in ['x^2 + 3*x*y - 1', 'log(2)_(x+1) / (x - 2)', 'x^(1/2) + tan(y)',
+                  'asin(x) * 2^x', '0*x + sin(z)', '(x-x)*y']:
+            n, e = canonical(s)
+            variables, exclusion, zero = analyze_node(n)
+            self.assertEqual(variables, get_unique_vars(n))
+            self.assertEqual(zero, NodeSimplifier()._is_zero(n))
+            # the simplifier takes the exclusion of the canonical tree from the analysis
+            for group in exclusion:
+                if not any(is_identity(x) for x in group):
+                    self.assertIn(group, e)
+
+        self.assertEqual(analyze_node(TermNode([]))[2], True)
+        self.assertEqual(analyze_node(FactorNode([VarNode('x')], [], (0, 1)))[2], True)
+        self.assertEqual(analyze_node(FactorNode([VarNode('x')], [NumNode(0)]))[2], False)
+
+    def test_3(self):
+        # a shared subtree is combined once
+        x = TermNode([VarNode('x'), NumNode(1)])
+        n = FactorNode([x, PolyNode(x, 2)], [x])
+        count = Count()
+        size, variables = FusedAnalysis(count, FreeVars()).run(n)
+        self.assertEqual(size, 11)
+        self.assertEqual(count.visits, 5)
+        self.assertEqual(variables, {'x'})
+        self.assertEqual(Count().run(VarNode('x')), 1)
+
+        class Vars(NodeAnalysis):
+            def combine_VarNode(self, node, children):
+                return 1
+
+        self.assertRaises(TypeError, Vars().run, NumNode(1))
+
+    def test_4(self):
+        # the node utilities dispatch by class as well
+        s, e = canonical('sin(x)^2 + 3*x*log(x)_2 - e^x/x')
+        self.assertEqual(count_nodes(s), Count().run(s))
+        self.assertEqual(0, count_ops(VarNode('x')))
+        self.assertEqual(2, count_ops(FactorNode([VarNode('x'), VarNode('y')], [], (2, 1))))
+
+        interner = NodeInterner()
+        self.assertEqual(interner.intern(copy.deepcopy(s)), interner.intern(s))
+        self.assertEqual(interner.intern(2), interner.intern(2))
+        self.assertNotEqual(interner.intern(2), interner.intern(2.0))
+        self.assertRaises(TypeError, interner.intern, 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+
+import json
+import time
+from mathlib.utils.test_util import *
+from mathlib.io import LaTeXGenerator, TextGenerator
+from mathlib.web.app import pipeline
+from mathlib.web.app.executor import *
+from mathlib.web.app.routes import math_app
+
+
+def components():
+    lexer = Lexer(lexer_grammar)
+    simplifier = NodeSimplifier()
+    return dict(lexer=lexer, parser=Parser(parser_grammar, lexer), builder=NodeBuilder(), simplifier=simplifier,
+                calculator=Calculator(simplifier), plotter=Plotter(), latex=LaTeXGenerator(), text=TextGenerator())
+
+
+def square(x):
+    return x * x
+
+
+def slow_square(x, seconds):
+    time.sleep(seconds)
+    return x * x
+
+
+def events(response):
+    # (name, data) of the server-sent events of a response
+    ans = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        name, data = block.split('\n')
+        ans.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return ans
+
+
+def slow_init(components: dict):
+    time.sleep(60)
+    pipeline.init_worker(components)
+
+
+class WebTest(unittest.TestCase):
+    def setUp(self):
+        self.config = dict(math_app.config)
+        math_app.config.update(components())
+        self.client = math_app.test_client()
+        self.executors = []
+
+    def tearDown(self):
+        for executor in self.executors:
+            executor.shutdown(wait=False)
+        math_app.config.clear()
+        math_app.config.update(self.config)
+
+    def executor(self, *args, **kwargs):
+        executor = PipelineExecutor(*args, **kwargs)
+        self.executors.append(executor)
+        return executor
+
+    def test_1(self):
+        executor = self.executor(1, 1, timeout=30)
+        self.assertEqual(9, executor.run(square, 3))
+        self.assertRaises(ValueError, PipelineExecutor, 2, 1)
+
+        # the only slot is taken until the job is done
+        future = executor.submit(time.sleep, 0.5)
+        self.assertRaises(ServerBusy, executor.submit, square, 3)
+        future.result()
+        self.assertEqual(16, executor.run(square, 4))
+
+    def test_2(self):
+        # a job which runs over its time is stopped with its worker, the next job gets a new one
+        executor = self.executor(1, 1)
+        start = time.time()
+        self.assertRaises(PipelineTimeout, executor.run, time.sleep, 60, timeout=0.5)
+        self.assertEqual(25, executor.run(square, 5, timeout=30))
+        self.assertLess(time.time() - start, 30)
+
+        # the job of another worker goes on while one is stopped
+        executor = self.executor(2, 2)
+        healthy = executor.submit(slow_square, 6, 2)
+        self.assertRaises(PipelineTimeout, executor.run, time.sleep, 60, timeout=0.5)
+        self.assertFalse(healthy.done())
+        self.assertEqual(36, healthy.result(timeout=30))
+        self.assertEqual(49, executor.run(square, 7, timeout=30))
+
+    def test_3(self):
+        pipeline.init_worker(None)
+        self.assertRaises(RuntimeError, pipeline.analyze_in_worker, 'x^2', '', (-1, 1))
+
+        executor = self.executor(1, 2, timeout=60, initializer=pipeline.init_worker, initargs=(components(),))
+        result, error_msg = executor.run(pipeline.analyze_in_worker, 'x^2+y', 'y=1', (-1, 1), True)
+        self.assertIsNone(error_msg)
+        self.assertEqual({'stream': 'x'}, result['Graph'])
+        self.assertEqual(result, pipeline.analyze(components(), 'x^2+y', 'y=1', (-1, 1), True)[0])
+
+        result, error_msg = executor.run(pipeline.analyze_in_worker, 'x+y', 'x=1, y=2', (-1, 1))
+        self.assertEqual(3, result['evaluation'])
+
+        # two variables give the grid for the page to draw, no figure is saved
+        graph = executor.run(pipeline.analyze_in_worker, 'x*y', '', (-1, 1))[0]['Graph']
+        self.assertEqual(['x', 'y'], graph['variables'])
+        self.assertLess(graph['zlim'][0], 0)
+        self.assertLess(0, graph['zlim'][1])
+        self.assertEqual(len(graph['y']), len(graph['z']))
+        json.dumps(graph, allow_nan=False)
+
+    def test_4(self):
+        form = {'notation': 'x^2', 'conditions': '', 'low': '-1', 'high': '1'}
+        response = self.client.post('/post', data=form)
+        self.assertEqual(200, response.status_code)
+        self.assertIn(b'streamPlot(', response.data)
+
+        # the curves come with the page when the browser cannot read a stream, or streaming is off
+        response = self.client.post('/post', data=dict(form, stream='0'))
+        self.assertIn(b'drawPlot(', response.data)
+        self.assertNotIn(b'streamPlot(', response.data)
+        math_app.config['stream'] = False
+        self.assertEqual(response.data.split(b'drawPlot(')[1].split(b');')[0],
+                         self.client.post('/post', data=form).data.split(b'drawPlot(')[1].split(b');')[0])
+        self.assertIn(b'drawHeatmap(', self.client.post('/post', data=dict(form, notation='x*y')).data)
+        math_app.config['stream'] = True
+
+        # no job gets through a full queue
+        executor = math_app.config['executor'] = self.executor(1, 1, timeout=60)
+        future = executor.submit(time.sleep, 2)
+        response = self.client.post('/post', data=form)
+        self.assertEqual(503, response.status_code)
+        self.assertIn(b'Server is busy', response.data)
+        future.result()
+
+        # a worker which is not ready within the time
+        math_app.config['executor'] = self.executor(1, 1, timeout=0.5, initializer=slow_init,
+                                                    initargs=(components(),))
+        response = self.client.post('/post', data=form)
+        self.assertEqual(503, response.status_code)
+        self.assertIn(b'Calculation timed out', response.data)
+
+    def test_5(self):
+        query = {'notation': 'x^2', 'low': '-1', 'high': '1'}
+        response = self.client.get('/stream', query_string=query)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('text/event-stream', response.mimetype)
+        local = events(response)
+        names = [name for name, _ in local]
+        self.assertEqual(['start', 'batch', 'batch'], names[:3])
+        self.assertEqual('done', names[-1])
+        self.assertEqual(['f(x)', "f'(x)"], local[0][1]['labels'])
+        self.assertEqual([-1.0, 1.0], local[0][1]['xlim'])
+
+        # a worker sends the same events
+        math_app.config['executor'] = self.executor(1, 1, timeout=60, initializer=pipeline.init_worker,
+                                                    initargs=(components(),))
+        response = self.client.get('/stream', query_string=query)
+        self.assertEqual(local, events(response))
+
+        response = self.client.get('/stream', query_string=dict(query, notation='x*y'))
+        self.assertEqual([('error', {'message': 'A curve needs exactly one free variable'})], events(response))
+
+        for low, high in [('a', '1'), ('1', '-1'), ('nan', '1'), ('0', 'inf')]:
+            response = self.client.get('/stream', query_string=dict(query, low=low, high=high))
+            self.assertEqual(400, response.status_code)
+        self.assertEqual(400, self.client.get('/stream', query_string={'notation': 'x'}).status_code)
+
+    def test_6(self):
+        query = {'notation': 'x^2', 'low': '-1', 'high': '1'}
+        executor = math_app.config['executor'] = self.executor(1, 1, timeout=60)
+        future = executor.submit(time.sleep, 2)
+        response = self.client.get('/stream', query_string=query)
+        self.assertEqual(503, response.status_code)
+        self.assertEqual('error', events(response)[0][0])
+        future.result()
+
+        # the stream ends with an error once its time is up
+        math_app.config['executor'] = self.executor(1, 1, timeout=0.5, initializer=slow_init,
+                                                    initargs=(components(),))
+        response = self.client.get('/stream', query_string=query)
+        self.assertEqual([('error', {'message': 'Calculation timed out'})], events(response))
+
+
+if __name__ == '__main__':
+    unittest.main()